@@ -0,0 +1,144 @@
+# Benchmark for parse_docx engines
+#
+# Builds DOCX packages of several sizes (paragraphs with formatted runs plus
+# a table every 50 paragraphs) and times the streaming "xml" engine against
+# the "python-docx" engine on each.
+#
+#   python -m benchmarks.processing.bench_docx
+#   python -m benchmarks.processing.bench_docx --paragraphs 1000 100000 --json
+#
+# python-docx slows down sharply with document size, so it only runs up to
+# --python-docx-max paragraphs.
+import argparse
+import io
+import json
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.processing.parsers import docx_pptx
+
+
+_CONTENT_TYPES = (
+    "<?xml version=\"1.0\" encoding=\"UTF-8\" standalone=\"yes\"?>"
+    "<Types xmlns=\"http://schemas.openxmlformats.org/package/2006/content-types\">"
+    "<Default Extension=\"rels\" ContentType=\"application/vnd.openxmlformats-package.relationships+xml\"/>"
+    "<Default Extension=\"xml\" ContentType=\"application/xml\"/>"
+    "<Override PartName=\"/word/document.xml\" "
+    "ContentType=\"application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml\"/>"
+    "</Types>"
+)
+
+_RELS = (
+    "<?xml version=\"1.0\" encoding=\"UTF-8\" standalone=\"yes\"?>"
+    "<Relationships xmlns=\"http://schemas.openxmlformats.org/package/2006/relationships\">"
+    "<Relationship Id=\"rId1\" "
+    "Type=\"http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument\" "
+    "Target=\"word/document.xml\"/></Relationships>"
+)
+
+
+def make_docx(path: Path, paragraphs: int) -> int:
+    """Write a python-docx readable package; returns document.xml size in bytes."""
+    parts: List[str] = []
+    parts.append(
+        "<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
+        "<w:document xmlns:w=\"http://schemas.openxmlformats.org/wordprocessingml/2006/main\"><w:body>"
+    )
+    i = 0
+    while i < paragraphs:
+        parts.append(
+            "<w:p><w:pPr><w:pStyle w:val=\"Normal\"/></w:pPr>"
+            "<w:r><w:rPr><w:b/></w:rPr><w:t xml:space=\"preserve\">Paragraph " + str(i) + " </w:t></w:r>"
+            "<w:r><w:t>with some body text &amp; a second run.</w:t></w:r></w:p>"
+        )
+        if i % 50 == 49:
+            parts.append("<w:tbl>")
+            r = 0
+            while r < 5:
+                parts.append("<w:tr>")
+                c = 0
+                while c < 4:
+                    parts.append("<w:tc><w:p><w:r><w:t>cell " + str(r) + "," + str(c) + "</w:t></w:r></w:p></w:tc>")
+                    c = c + 1
+                parts.append("</w:tr>")
+                r = r + 1
+            parts.append("</w:tbl>")
+        i = i + 1
+    parts.append("</w:body></w:document>")
+    xml = "".join(parts).encode("utf-8")
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        z.writestr("_rels/.rels", _RELS)
+        z.writestr("word/document.xml", xml)
+    path.write_bytes(buf.getvalue())
+    return len(xml)
+
+
+def _time_engine(src: Path, out: Path, engine: str, repeat: int) -> Dict[str, object]:
+    best = None
+    used = None
+    r = 0
+    while r < repeat:
+        t0 = time.perf_counter()
+        res = docx_pptx.parse_docx(src, out, engine=engine)
+        dt = time.perf_counter() - t0
+        used = res.get("engine")
+        if best is None or dt < best:
+            best = dt
+        r = r + 1
+    rec: Dict[str, object] = {}
+    rec["engine"] = used
+    rec["seconds"] = round(best, 4)
+    return rec
+
+
+def run_benchmarks(sizes: List[int], repeat: int, python_docx_max: int, report=None) -> List[Dict[str, object]]:
+    results: List[Dict[str, object]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        i = 0
+        while i < len(sizes):
+            src = root / ("doc" + str(sizes[i]) + ".docx")
+            xml_bytes = make_docx(src, sizes[i])
+            mb = xml_bytes / (1024 * 1024)
+            for engine in docx_pptx.DOCX_ENGINES:
+                if engine == "python-docx" and sizes[i] > python_docx_max:
+                    continue
+                rec = _time_engine(src, root / "out", engine, repeat)
+                rec["paragraphs"] = sizes[i]
+                rec["xml_mb"] = round(mb, 2)
+                rec["requested"] = engine
+                rec["mb_per_s"] = round(mb / rec["seconds"], 1) if rec["seconds"] > 0 else None
+                results.append(rec)
+                if report is not None:
+                    report(rec)
+            i = i + 1
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark DOCX extraction engines")
+    parser.add_argument("--paragraphs", type=int, nargs="+", default=[100, 2000, 200000], help="Document sizes to generate")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the best is reported")
+    parser.add_argument("--python-docx-max", type=int, default=5000, help="Largest document (paragraphs) to time with python-docx")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.json:
+        results = run_benchmarks(args.paragraphs, args.repeat, args.python_docx_max)
+        print(json.dumps(results, indent=2))
+        return 0
+    run_benchmarks(args.paragraphs, args.repeat, args.python_docx_max, _print_row)
+    return 0
+
+
+def _print_row(rec: Dict[str, object]) -> None:
+    print(f"{rec['paragraphs']:>8} paras {rec['xml_mb']:>8} MB  {rec['requested']:<12} (used {rec['engine']:<12}) {rec['seconds']:>9} s {rec['mb_per_s']:>8} MB/s", flush=True)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,207 @@
+# Micro-benchmark for src/processing/normalize.py
+#
+# Compares the character-loop implementations the parsers used before the
+# translate-table rewrite ("legacy") with the current step functions and the
+# fused normalize_text, in MB/s of UTF-8 input.
+#
+#   python -m benchmarks.processing.bench_normalize --mb 256
+#   python -m benchmarks.processing.bench_normalize --mb 512 --skip-legacy
+#
+# Legacy runs on at most --legacy-mb (default 32) because its loops cost
+# minutes on multi-hundred-MB inputs; MB/s stays comparable.
+import argparse
+import json
+import time
+from typing import Callable, Dict, List, Optional
+
+from src.processing import normalize as norm
+
+
+# Legacy implementations, kept verbatim for comparison
+
+def legacy_utf8_decode_remove_bom(data: bytes) -> str:
+    if len(data) >= 3:
+        if data[0] == 0xEF and data[1] == 0xBB and data[2] == 0xBF:
+            data = data[3:]
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError as e:
+        raise ValueError(f"Invalid UTF-8: {e}")
+
+
+def legacy_normalize_newlines(text: str) -> str:
+    text = text.replace("\r\n", "\n")
+    text = text.replace("\r", "\n")
+    if not text.endswith("\n"):
+        text = text + "\n"
+    return text
+
+
+def legacy_remove_control_chars(text: str) -> str:
+    out = []
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        code = ord(ch)
+        if code >= 32 or ch == "\n" or ch == "\t":
+            out.append(ch)
+        i = i + 1
+    return "".join(out)
+
+
+def legacy_join_columns_to_tabs(columns: List[Optional[str]]) -> str:
+    out = ""
+    i = 0
+    while i < len(columns):
+        if i > 0:
+            out = out + "\t"
+        val = columns[i]
+        if val is None:
+            val = ""
+        out = out + str(val)
+        i = i + 1
+    return out
+
+
+def legacy_trim_trailing_spaces_per_line(text: str) -> str:
+    lines = text.split("\n")
+    out_lines: List[str] = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        j = len(line) - 1
+        while j >= 0 and (line[j] == " " or line[j] == "\t"):
+            j = j - 1
+        out_lines.append(line[: j + 1])
+        i = i + 1
+    return "\n".join(out_lines)
+
+
+# Corpus
+
+def make_corpus(size_bytes: int) -> bytes:
+    """Deterministic UTF-8 text: CRLF/CR/LF endings, tabs, trailing spaces,
+    control characters and some non-ASCII, repeated up to size_bytes."""
+    words = ["alpha", "beta", "gamma", "delta", "résumé", "naïve", "中文", "\x00", "\x1b[0m", "\x0c"]
+    endings = ["\r\n", "\n", "\r", "  \n", "\t\r\n"]
+    parts: List[str] = []
+    i = 0
+    while i < 4000:
+        line: List[str] = []
+        j = 0
+        while j < 8:
+            line.append(words[(i * 7 + j * 3) % len(words)])
+            j = j + 1
+        parts.append(" ".join(line))
+        parts.append(endings[i % len(endings)])
+        i = i + 1
+    block = "".join(parts).encode("utf-8")
+    reps = size_bytes // len(block) + 1
+    return b"\xef\xbb\xbf" + (block * reps)[:size_bytes]
+
+
+# Cases
+
+def _legacy_chain(data: bytes) -> str:
+    text = legacy_utf8_decode_remove_bom(data)
+    text = legacy_normalize_newlines(text)
+    text = legacy_remove_control_chars(text)
+    return legacy_trim_trailing_spaces_per_line(text)
+
+
+def _step_chain(data: bytes) -> str:
+    text = norm.utf8_decode_remove_bom(data)
+    text = norm.normalize_newlines(text)
+    text = norm.remove_control_chars(text)
+    return norm.trim_trailing_spaces_per_line(text)
+
+
+def _fused(data: bytes) -> str:
+    return norm.normalize_text(data, trim_trailing=True)
+
+
+def _rows(data: bytes) -> List[List[Optional[str]]]:
+    text = data.decode("utf-8", "replace")
+    lines = text.split("\n")
+    rows: List[List[Optional[str]]] = []
+    i = 0
+    while i < len(lines):
+        rows.append(lines[i].split(" "))
+        i = i + 1
+    return rows
+
+
+def _time(fn: Callable, arg, repeat: int) -> float:
+    best = None
+    r = 0
+    while r < repeat:
+        t0 = time.perf_counter()
+        fn(arg)
+        dt = time.perf_counter() - t0
+        if best is None or dt < best:
+            best = dt
+        r = r + 1
+    return best
+
+
+def _join_all(join_fn: Callable) -> Callable:
+    def run(rows):
+        i = 0
+        while i < len(rows):
+            join_fn(rows[i])
+            i = i + 1
+    return run
+
+
+def run_benchmarks(mb: int, legacy_mb: int, repeat: int, skip_legacy: bool) -> List[Dict[str, object]]:
+    data = make_corpus(mb * 1024 * 1024)
+    results: List[Dict[str, object]] = []
+
+    def record(name: str, fn: Callable, arg, nbytes: int) -> None:
+        secs = _time(fn, arg, repeat)
+        rec: Dict[str, object] = {}
+        rec["case"] = name
+        rec["mb"] = round(nbytes / (1024 * 1024), 2)
+        rec["seconds"] = round(secs, 4)
+        rec["mb_per_s"] = round(nbytes / (1024 * 1024) / secs, 1) if secs > 0 else None
+        results.append(rec)
+
+    # Same contract before and after
+    small = data[: 1024 * 1024]
+    if _legacy_chain(small) != _fused(small) or _step_chain(small) != _fused(small):
+        raise SystemExit("normalizer outputs differ; benchmark aborted")
+
+    if not skip_legacy:
+        legacy_data = data[: min(mb, legacy_mb) * 1024 * 1024]
+        record("legacy chain", _legacy_chain, legacy_data, len(legacy_data))
+    record("step chain", _step_chain, data, len(data))
+    record("normalize_text", _fused, data, len(data))
+
+    rows = _rows(data[: min(mb, legacy_mb) * 1024 * 1024])
+    row_bytes = min(len(data), legacy_mb * 1024 * 1024)
+    if not skip_legacy:
+        record("legacy join_columns_to_tabs", _join_all(legacy_join_columns_to_tabs), rows, row_bytes)
+    record("join_columns_to_tabs", _join_all(norm.join_columns_to_tabs), rows, row_bytes)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark text normalization throughput")
+    parser.add_argument("--mb", type=int, default=256, help="Input size in MB")
+    parser.add_argument("--legacy-mb", type=int, default=32, help="Cap on the input given to the legacy loops")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the best is reported")
+    parser.add_argument("--skip-legacy", action="store_true", help="Only time the current implementation")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.mb, args.legacy_mb, args.repeat, args.skip_legacy)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    for rec in results:
+        print(f"{rec['case']:<30} {rec['mb']:>9} MB {rec['seconds']:>9} s {rec['mb_per_s']:>9} MB/s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
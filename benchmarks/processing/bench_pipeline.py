@@ -0,0 +1,226 @@
+# Throughput benchmark for the processing pipeline
+#
+# Generates a synthetic corpus (benchmarks.processing.corpus) and times, per
+# format:
+#   parser    the registered parser called directly on every file
+#   pipeline  run_pipeline_for_path on every file (batched mapping store)
+#   stages    detect / checksum / parse / record, timed one by one
+# then run_pipeline_for_dir over the whole corpus for each --dir-workers
+# value. Results are docs/s, MB/s and peak RSS, as JSON with --json/--out.
+#
+#   python -m benchmarks.processing.bench_pipeline --scale small
+#   python -m benchmarks.processing.bench_pipeline --scale medium --formats pdf docx --out bench.json
+#
+# Each case runs in a fresh spawned process, so peak_rss_mb is that case's
+# own high-water mark. --in-process keeps everything in this process, for
+# profiling; peak RSS then only grows from case to case.
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.processing.corpus import FORMATS, SCALES, make_corpus
+from src.processing import detection
+from src.processing import io as pio
+from src.processing import mapping as mp
+from src.processing import pipeline
+from src.processing import registry
+
+
+def _rss_mb(who: int) -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    if sys.platform == "darwin":
+        return round(peak / (1024 * 1024), 1)
+    return round(peak / 1024, 1)
+
+
+def _rates(n_files: int, n_bytes: int, seconds: float) -> Dict[str, object]:
+    rec: Dict[str, object] = {}
+    rec["seconds"] = round(seconds, 4)
+    rec["docs_per_s"] = round(n_files / seconds, 2) if seconds > 0 else None
+    rec["mb_per_s"] = round(n_bytes / (1024 * 1024) / seconds, 2) if seconds > 0 else None
+    return rec
+
+
+def _time_stages(fmt: str, files: List[str], work: Path) -> Dict[str, float]:
+    # The pipeline's per-file steps, timed separately
+    fn = registry.resolve(fmt)
+    store = mp.new_store(work / "stages", batch_size=200)
+    stages: Dict[str, float] = {"detect": 0.0, "checksum": 0.0, "parse": 0.0, "record": 0.0}
+    i = 0
+    while i < len(files):
+        p = Path(files[i])
+        t0 = time.perf_counter()
+        detection.detect_format(p)
+        t1 = time.perf_counter()
+        checksum = pio.file_checksum(p)
+        t2 = time.perf_counter()
+        out = fn(p, work / "stages")
+        t3 = time.perf_counter()
+        mp.store_upsert(store, {"source": str(p), "format": fmt, "out_path": out.get("out_path"), "checksum": checksum})
+        t4 = time.perf_counter()
+        stages["detect"] = stages["detect"] + (t1 - t0)
+        stages["checksum"] = stages["checksum"] + (t2 - t1)
+        stages["parse"] = stages["parse"] + (t3 - t2)
+        stages["record"] = stages["record"] + (t4 - t3)
+        i = i + 1
+    t0 = time.perf_counter()
+    mp.store_flush(store)
+    stages["record"] = stages["record"] + (time.perf_counter() - t0)
+    for key in stages:
+        stages[key] = round(stages[key], 4)
+    return stages
+
+
+def _best_of(repeat: int, run) -> float:
+    best = None
+    r = 0
+    while r < repeat:
+        t0 = time.perf_counter()
+        run()
+        dt = time.perf_counter() - t0
+        if best is None or dt < best:
+            best = dt
+        r = r + 1
+    return best
+
+
+def bench_format(fmt: str, files: List[str], n_bytes: int, work_dir: str, repeat: int) -> Dict[str, object]:
+    """Metrics for one format; module-level so it can run in a spawned process."""
+    work = Path(work_dir)
+    fn = registry.resolve(fmt)
+
+    def run_parser():
+        i = 0
+        while i < len(files):
+            fn(Path(files[i]), work / "parser")
+            i = i + 1
+
+    def run_pipeline():
+        store = mp.new_store(work / "pipeline", batch_size=200)
+        i = 0
+        while i < len(files):
+            res = pipeline.run_pipeline_for_path(Path(files[i]), work / "pipeline", store=store)
+            if res.get("error"):
+                raise RuntimeError(files[i] + ": " + str(res.get("error")))
+            i = i + 1
+        mp.store_flush(store)
+
+    rec: Dict[str, object] = {}
+    rec["format"] = fmt
+    rec["files"] = len(files)
+    rec["mb"] = round(n_bytes / (1024 * 1024), 2)
+    rec["parser"] = _rates(len(files), n_bytes, _best_of(repeat, run_parser))
+    rec["pipeline"] = _rates(len(files), n_bytes, _best_of(repeat, run_pipeline))
+    rec["stages"] = _time_stages(fmt, files, work)
+    rec["peak_rss_mb"] = _rss_mb(resource.RUSAGE_SELF)
+    return rec
+
+
+def bench_dir(corpus_root: str, n_files: int, n_bytes: int, work_dir: str, workers: int) -> Dict[str, object]:
+    # workers = process pool size; I/O-bound formats get twice as many threads.
+    # Pool workers are forkserver children, so peak_rss_mb covers the
+    # coordinating process only.
+    base = Path(work_dir) / ("dir_" + str(workers))
+    t0 = time.perf_counter()
+    summary = pipeline.run_pipeline_for_dir(Path(corpus_root), base, process_workers=workers, thread_workers=2 * workers)
+    seconds = time.perf_counter() - t0
+    rec = _rates(n_files, n_bytes, seconds)
+    rec["workers"] = workers
+    rec["errors"] = summary["errors"]
+    rec["peak_rss_mb"] = _rss_mb(resource.RUSAGE_SELF)
+    return rec
+
+
+def _call(in_process: bool, fn, *args):
+    if in_process:
+        return fn(*args)
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def run_benchmarks(scale: str, seed: int, formats: List[str], repeat: int, dir_workers: List[int], in_process: bool = False, report=None) -> Dict[str, object]:
+    results: Dict[str, object] = {}
+    results["scale"] = scale
+    results["seed"] = seed
+    results["python"] = platform.python_version()
+    results["cpu_count"] = os.cpu_count()
+    results["formats"] = []
+    results["dir"] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "corpus"
+        t0 = time.perf_counter()
+        manifest = make_corpus(root, scale, seed, formats)
+        results["corpus_seconds"] = round(time.perf_counter() - t0, 2)
+        total_bytes = 0
+        for fmt in formats:
+            files: List[str] = []
+            n_bytes = 0
+            for entry in manifest:
+                if entry["format"] == fmt:
+                    files.append(str(entry["path"]))
+                    n_bytes = n_bytes + int(entry["bytes"])
+            total_bytes = total_bytes + n_bytes
+            rec = _call(in_process, bench_format, fmt, files, n_bytes, str(Path(tmp) / ("work_" + fmt)), repeat)
+            results["formats"].append(rec)
+            if report is not None:
+                report(rec)
+        for workers in dir_workers:
+            rec = _call(in_process, bench_dir, str(root), len(manifest), total_bytes, tmp, workers)
+            results["dir"].append(rec)
+            if report is not None:
+                report(rec)
+    return results
+
+
+def _print_row(rec: Dict[str, object]) -> None:
+    if "format" in rec:
+        st = rec["stages"]
+        print(
+            f"{rec['format']:<6} {rec['files']:>5} files {rec['mb']:>9} MB  "
+            f"parser {rec['parser']['docs_per_s']:>8} docs/s {rec['parser']['mb_per_s']:>8} MB/s  "
+            f"pipeline {rec['pipeline']['docs_per_s']:>8} docs/s  "
+            f"detect {st['detect']} checksum {st['checksum']} parse {st['parse']} record {st['record']} s  "
+            f"rss {rec['peak_rss_mb']} MB",
+            flush=True,
+        )
+    else:
+        print(
+            f"dir    workers {rec['workers']:>3}  {rec['docs_per_s']:>8} docs/s {rec['mb_per_s']:>8} MB/s  "
+            f"{rec['seconds']} s  errors {rec['errors']}  rss {rec['peak_rss_mb']} MB",
+            flush=True,
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark document processing throughput")
+    parser.add_argument("--scale", choices=list(SCALES.keys()), default="small", help="Corpus size preset")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus content seed")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=FORMATS, help="Formats to benchmark")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case; the best is reported")
+    parser.add_argument("--dir-workers", type=int, nargs="*", default=[0, os.cpu_count() or 1], help="Process pool sizes for the whole-corpus run (none: skip it)")
+    parser.add_argument("--in-process", action="store_true", help="Run every case in this process")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--out", default=None, help="Also write the JSON results to this file")
+    args = parser.parse_args(argv)
+
+    report = None if args.json else _print_row
+    results = run_benchmarks(args.scale, args.seed, args.formats, args.repeat, args.dir_workers, args.in_process, report)
+    if args.out is not None:
+        Path(args.out).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    if args.json:
+        print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
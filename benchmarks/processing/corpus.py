@@ -0,0 +1,257 @@
+# Deterministic synthetic corpus for the processing benchmarks
+#
+# make_corpus(root, scale, seed) writes multi-page PDFs, DOCX/PPTX/XLSX
+# packages, CSV/TSV, Markdown/text, SVG and PNG/JPEG files under root. The
+# same scale and seed always produce the same content, so throughput
+# numbers from different runs and machines compare like for like.
+#
+#   python -m benchmarks.processing.corpus /tmp/corpus --scale medium
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.processing.bench_docx import make_docx
+
+
+# Files per format and the size of each file
+SCALES: Dict[str, Dict[str, int]] = {
+    "tiny": {
+        "files": 2, "pdf_pages": 3, "docx_paragraphs": 50, "pptx_slides": 5,
+        "xlsx_rows": 200, "csv_rows": 500, "text_lines": 500, "svg_shapes": 20, "image_px": 128,
+    },
+    "small": {
+        "files": 10, "pdf_pages": 20, "docx_paragraphs": 500, "pptx_slides": 20,
+        "xlsx_rows": 5000, "csv_rows": 20000, "text_lines": 20000, "svg_shapes": 200, "image_px": 512,
+    },
+    "medium": {
+        "files": 40, "pdf_pages": 100, "docx_paragraphs": 5000, "pptx_slides": 100,
+        "xlsx_rows": 50000, "csv_rows": 200000, "text_lines": 200000, "svg_shapes": 2000, "image_px": 1024,
+    },
+    "large": {
+        "files": 100, "pdf_pages": 500, "docx_paragraphs": 50000, "pptx_slides": 500,
+        "xlsx_rows": 200000, "csv_rows": 2000000, "text_lines": 1000000, "svg_shapes": 20000, "image_px": 2048,
+    },
+}
+
+FORMATS = ["pdf", "docx", "pptx", "xlsx", "csv", "tsv", "txt", "md", "svg", "png", "jpeg"]
+
+_WORDS = [
+    "ingest", "pipeline", "ticket", "budget", "latency", "résumé", "throughput",
+    "schema", "naïve", "review", "deploy", "中文", "owner", "scope", "metric", "plan",
+]
+
+
+def _sentence(rng: random.Random, n: int) -> str:
+    words: List[str] = []
+    i = 0
+    while i < n:
+        words.append(_WORDS[rng.randrange(len(_WORDS))])
+        i = i + 1
+    return " ".join(words)
+
+
+def _ascii_sentence(rng: random.Random, n: int) -> str:
+    # Built-in PDF/image fonts only cover Latin-1
+    return _sentence(rng, n).replace("中文", "zh").replace("résumé", "resume").replace("naïve", "naive")
+
+
+def make_pdf(path: Path, pages: int, rng: random.Random) -> None:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(str(path), pagesize=A4, invariant=1)
+    p = 0
+    while p < pages:
+        y = 800
+        while y > 60:
+            c.drawString(40, y, _ascii_sentence(rng, 10))
+            y = y - 14
+        c.showPage()
+        p = p + 1
+    c.save()
+
+
+def make_pptx(path: Path, slides: int, rng: random.Random) -> None:
+    from pptx import Presentation
+    from pptx.util import Inches
+
+    prs = Presentation()
+    layout = prs.slide_layouts[1]
+    s = 0
+    while s < slides:
+        slide = prs.slides.add_slide(layout)
+        slide.shapes.title.text = "Slide " + str(s) + ": " + _sentence(rng, 3)
+        body = slide.placeholders[1].text_frame
+        body.text = _sentence(rng, 8)
+        b = 0
+        while b < 4:
+            body.add_paragraph().text = _sentence(rng, 8)
+            b = b + 1
+        if s % 5 == 4:
+            table = slide.shapes.add_table(3, 3, Inches(1), Inches(5), Inches(6), Inches(1)).table
+            r = 0
+            while r < 3:
+                c = 0
+                while c < 3:
+                    table.cell(r, c).text = _sentence(rng, 2)
+                    c = c + 1
+                r = r + 1
+        slide.notes_slide.notes_text_frame.text = _sentence(rng, 12)
+        s = s + 1
+    prs.save(str(path))
+
+
+def make_xlsx(path: Path, rows: int, rng: random.Random) -> None:
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    per_sheet = rows // 2 + 1
+    sh = 0
+    while sh < 2:
+        ws = wb.create_sheet("Sheet" + str(sh + 1))
+        ws.append(["id", "name", "amount", "note"])
+        r = 0
+        while r < per_sheet:
+            ws.append([r, _sentence(rng, 2), rng.randrange(100000) / 100.0, _sentence(rng, 5)])
+            r = r + 1
+        sh = sh + 1
+    wb.save(str(path))
+
+
+def make_delimited(path: Path, rows: int, rng: random.Random, delimiter: str) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(delimiter.join(["id", "name", "amount", "note"]) + "\r\n")
+        r = 0
+        while r < rows:
+            f.write(delimiter.join([str(r), _sentence(rng, 2), str(rng.randrange(100000)), _sentence(rng, 6)]) + "\r\n")
+            r = r + 1
+
+
+def make_text(path: Path, lines: int, rng: random.Random, markdown: bool) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if markdown:
+            f.write("---\ntitle: " + _sentence(rng, 3) + "\n---\n")
+        i = 0
+        while i < lines:
+            if markdown and i % 40 == 0:
+                f.write("## " + _sentence(rng, 4) + "\n")
+            # Mixed line endings, trailing spaces and a control character
+            # now and then, as real exports have
+            ending = ["\n", "\r\n", "  \n"][i % 3]
+            line = _sentence(rng, 12)
+            if i % 97 == 0:
+                line = line + "\x0c"
+            f.write(line + ending)
+            i = i + 1
+
+
+def make_svg(path: Path, shapes: int, rng: random.Random) -> None:
+    parts: List[str] = ["<?xml version=\"1.0\" encoding=\"UTF-8\"?>"]
+    parts.append("<svg xmlns=\"http://www.w3.org/2000/svg\" width=\"1000\" height=\"1000\">")
+    parts.append("<title>" + _sentence(rng, 4) + "</title>")
+    # An embedded raster, as design exports carry
+    parts.append("<image href=\"data:image/png;base64," + ("iVBORw0KGgo" * (shapes * 40)) + "\"/>")
+    i = 0
+    while i < shapes:
+        d: List[str] = ["M0 0"]
+        k = 0
+        while k < 20:
+            d.append("L" + str(rng.randrange(1000)) + " " + str(rng.randrange(1000)))
+            k = k + 1
+        parts.append("<g><path d=\"" + " ".join(d) + "\"/>")
+        if i % 4 == 0:
+            parts.append("<text x=\"10\" y=\"" + str(i) + "\"><tspan x=\"10\" dy=\"0\">" + _sentence(rng, 4) + "</tspan><tspan x=\"10\" dy=\"12\">" + _sentence(rng, 4) + "</tspan></text>")
+        parts.append("</g>")
+        i = i + 1
+    parts.append("</svg>")
+    path.write_text("".join(parts), encoding="utf-8")
+
+
+def make_image(path: Path, px: int, rng: random.Random, fmt: str) -> None:
+    from PIL import Image, ImageDraw
+
+    img = Image.new("RGB", (px, px), color=(255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    y = 4
+    while y < px - 12:
+        draw.text((4, y), _ascii_sentence(rng, 6), fill=(0, 0, 0))
+        y = y + 14
+    img.save(str(path), format="PNG" if fmt == "png" else "JPEG")
+
+
+def _make_file(fmt: str, path: Path, spec: Dict[str, int], rng: random.Random) -> None:
+    if fmt == "pdf":
+        make_pdf(path, spec["pdf_pages"], rng)
+    elif fmt == "docx":
+        make_docx(path, spec["docx_paragraphs"])
+    elif fmt == "pptx":
+        make_pptx(path, spec["pptx_slides"], rng)
+    elif fmt == "xlsx":
+        make_xlsx(path, spec["xlsx_rows"], rng)
+    elif fmt == "csv":
+        make_delimited(path, spec["csv_rows"], rng, ",")
+    elif fmt == "tsv":
+        make_delimited(path, spec["csv_rows"], rng, "\t")
+    elif fmt == "txt":
+        make_text(path, spec["text_lines"], rng, False)
+    elif fmt == "md":
+        make_text(path, spec["text_lines"], rng, True)
+    elif fmt == "svg":
+        make_svg(path, spec["svg_shapes"], rng)
+    elif fmt == "png" or fmt == "jpeg":
+        make_image(path, spec["image_px"], rng, fmt)
+    else:
+        raise ValueError("unknown corpus format: " + fmt)
+
+
+def _extension(fmt: str) -> str:
+    if fmt == "jpeg":
+        return "jpg"
+    return fmt
+
+
+def make_corpus(root: Path, scale: str = "small", seed: int = 0, formats: Optional[List[str]] = None) -> List[Dict[str, object]]:
+    """Write the corpus under root/<format>/ and return its manifest.
+
+    Manifest entries are {"path", "format", "bytes"} in generation order.
+    Each file draws from its own generator seeded by (seed, format, index),
+    so restricting formats does not change the other files.
+    """
+    if scale not in SCALES:
+        raise ValueError("unknown scale: " + scale)
+    spec = SCALES[scale]
+    wanted = formats if formats is not None else FORMATS
+    manifest: List[Dict[str, object]] = []
+    for fmt in wanted:
+        folder = Path(root) / fmt
+        folder.mkdir(parents=True, exist_ok=True)
+        i = 0
+        while i < spec["files"]:
+            rng = random.Random(str(seed) + ":" + fmt + ":" + str(i))
+            path = folder / (fmt + "_" + str(i).zfill(4) + "." + _extension(fmt))
+            _make_file(fmt, path, spec, rng)
+            entry: Dict[str, object] = {}
+            entry["path"] = str(path)
+            entry["format"] = fmt
+            entry["bytes"] = path.stat().st_size
+            manifest.append(entry)
+            i = i + 1
+    return manifest
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic document corpus")
+    parser.add_argument("root", help="Output directory")
+    parser.add_argument("--scale", choices=list(SCALES.keys()), default="small", help="Corpus size preset")
+    parser.add_argument("--seed", type=int, default=0, help="Content seed")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=None, help="Formats to generate (default: all)")
+    args = parser.parse_args(argv)
+    manifest = make_corpus(Path(args.root), args.scale, args.seed, args.formats)
+    print(json.dumps(manifest, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
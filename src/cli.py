@@ -1,8 +1,15 @@
 import argparse
+import json
 import logging
+from pathlib import Path
 
 from src.logging.json_logger import get_logger
 from src.logging.handlers import get_console_handler
+from src.processing import cache as parse_cache
+from src.processing import chunking
+from src.processing import isolation
+from src.processing import metrics as doc_metrics
+from src.processing import pipeline
 
 
 def build_parser():
@@ -16,14 +23,42 @@ def build_parser():
         help="Enable verbose output",
     )
 
-    subparsers = parser.add_subparsers(dest="command", metavar="{run,process-docs,generate,evaluate,combine}")
+    subparsers = parser.add_subparsers(dest="command", metavar="{run,process-docs,generate,evaluate,combine,cache}")
 
     subparsers.add_parser("run", help="Execute full pipeline")
-    subparsers.add_parser("process-docs", help="Process input documents")
+    process_docs = subparsers.add_parser("process-docs", help="Process input documents")
+    process_docs.add_argument("--source-dir", default=None, help="Directory tree of source documents")
+    process_docs.add_argument("--base-dir", default=".", help="Output base directory (default: current directory)")
+    process_docs.add_argument("--workers", type=int, default=None, help="Process pool size for CPU-heavy formats (0 disables)")
+    process_docs.add_argument("--io-workers", type=int, default=None, help="Thread pool size for I/O-bound formats (0 disables)")
+    process_docs.add_argument("--max-in-flight", type=int, default=None, help="Maximum files outstanding at once")
+    process_docs.add_argument("--mapping-backend", choices=["json", "jsonl"], default="json", help="Record mapping entries by batched rewrite (json) or append-only journal (jsonl)")
+    process_docs.add_argument("--incremental", action="store_true", help="Skip files unchanged since the last run (checksum, parser version, options)")
+    process_docs.add_argument("--cache-dir", default=None, help="Shared parse cache directory (disabled when omitted)")
+    process_docs.add_argument("--cache-max-bytes", type=int, default=parse_cache.DEFAULT_MAX_BYTES, help="Parse cache size cap in bytes")
+    process_docs.add_argument("--ocr-threshold", type=int, default=None, help="Minimum extracted characters before OCR fallback")
+    process_docs.add_argument("--ocr-workers", type=int, default=None, help="Threads in the shared OCR executor (default: CPU count)")
+    process_docs.add_argument("--ocr-queue", type=int, default=None, help="Maximum OCR jobs queued or running at once")
+    process_docs.add_argument("--ocr-timeout", type=float, default=120.0, help="Seconds to wait for one image's OCR before giving up")
+    process_docs.add_argument("--parser-option", action="append", default=[], metavar="FMT.NAME=VALUE", help="Option for one format's parser, e.g. csv.max_rows=1000 (repeatable; VALUE is read as JSON when it parses)")
+    process_docs.add_argument("--detect", choices=["extension", "content"], default="extension", help="Route files by extension, or by sniffing their content and rejecting mismatches")
+    process_docs.add_argument("--isolate", action="store_true", help="Parse each file in a worker subprocess under the limits below")
+    process_docs.add_argument("--parse-timeout", type=float, default=isolation.DEFAULT_TIMEOUT, help="With --isolate: seconds before a parse is killed (0 disables)")
+    process_docs.add_argument("--memory-limit", type=int, default=isolation.DEFAULT_MEMORY_BYTES, help="With --isolate: address-space cap per parse worker in bytes (0 disables)")
+    process_docs.add_argument("--max-unzipped-bytes", type=int, default=isolation.DEFAULT_MAX_UNZIPPED_BYTES, help="With --isolate: largest decompressed size accepted for zip containers (0 disables)")
+    process_docs.add_argument("--chunk-tokens", type=int, default=None, help="Index processed texts as chunks of about this many tokens (chunks.jsonl)")
+    process_docs.add_argument("--chunk-overlap", type=int, default=0, help="Tokens repeated from the end of the previous chunk")
+    process_docs.add_argument("--report", action="store_true", help="Print the slowest files and per-format totals as JSON when done")
+    process_docs.add_argument("--report-top", type=int, default=10, help="Number of slowest files in --report")
     subparsers.add_parser("generate", help="Generate plans and tickets")
     subparsers.add_parser("evaluate", help="Evaluate attempts")
     subparsers.add_parser("combine", help="Combine multiple attempts")
 
+    cache_cmd = subparsers.add_parser("cache", help="Inspect or prune the parse cache")
+    cache_cmd.add_argument("action", choices=["stats", "prune"], help="stats: report usage; prune: evict least recently used entries")
+    cache_cmd.add_argument("--cache-dir", default=None, help="Cache directory (default: user cache dir)")
+    cache_cmd.add_argument("--max-bytes", type=int, default=parse_cache.DEFAULT_MAX_BYTES, help="Size cap to prune down to")
+
     return parser
 
 
@@ -32,8 +67,100 @@ def _cmd_run(logger):
     return 0
 
 
-def _cmd_process_docs(logger):
+def _parse_parser_options(items):
+    # ["csv.max_rows=1000", "docx.engine=python-docx"] -> {fmt: {name: value}}
+    options = {}
+    for item in items:
+        eq = item.find("=")
+        dot = item.find(".")
+        if eq == -1 or dot == -1 or dot > eq:
+            raise ValueError(f"parser option must look like FMT.NAME=VALUE: {item}")
+        fmt = item[:dot]
+        name = item[dot + 1:eq]
+        raw = item[eq + 1:]
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            value = raw
+        if fmt not in options:
+            options[fmt] = {}
+        options[fmt][name] = value
+    return options
+
+
+def _cmd_process_docs(logger, args):
     logger.info("process-docs selected")
+    source_dir = getattr(args, "source_dir", None)
+    if source_dir is None:
+        logger.info("process-docs: no --source-dir given, nothing to process")
+        return 0
+    if not Path(source_dir).is_dir():
+        logger.error("process-docs: source directory not found")
+        return 2
+    cache = None
+    if args.cache_dir is not None:
+        cache = parse_cache.new_cache(Path(args.cache_dir), max_bytes=args.cache_max_bytes)
+    try:
+        parser_options = _parse_parser_options(args.parser_option)
+        summary = _run_process_docs(source_dir, args, cache, parser_options)
+    except ValueError as e:
+        # Malformed --parser-option or chunk size, or options the pipeline
+        # rejects
+        logger.error(f"process-docs: {e}")
+        return 2
+    logger.info(
+        f"process-docs finished: total={summary['total']} ok={summary['ok']} errors={summary['errors']} skipped={summary['skipped']}"
+    )
+    if "chunks" in summary:
+        chunks = summary["chunks"]
+        logger.info(f"process-docs chunks: documents={chunks['documents']} chunks={chunks['chunks']} reused={chunks['reused']}")
+    if args.report:
+        # stdout, like the cache command: log redaction could mask numbers
+        report = doc_metrics.build_report(summary["items"], args.report_top, summary["skipped_sources"])
+        print(json.dumps(report, sort_keys=True))
+    return 0
+
+
+def _run_process_docs(source_dir, args, cache, parser_options):
+    chunk_settings = None
+    if args.chunk_tokens is not None:
+        chunk_settings = chunking.new_settings(args.chunk_tokens, args.chunk_overlap)
+    limits = None
+    if args.isolate:
+        limits = isolation.new_limits(args.parse_timeout, args.memory_limit, args.max_unzipped_bytes)
+    return pipeline.run_pipeline_for_dir(
+        Path(source_dir),
+        Path(args.base_dir),
+        ocr_threshold=args.ocr_threshold,
+        process_workers=args.workers,
+        thread_workers=args.io_workers,
+        max_in_flight=args.max_in_flight,
+        mapping_backend=args.mapping_backend,
+        incremental=args.incremental,
+        cache=cache,
+        ocr_workers=args.ocr_workers,
+        ocr_queue=args.ocr_queue,
+        ocr_timeout=args.ocr_timeout,
+        detect=args.detect,
+        parser_options=parser_options or None,
+        isolation_limits=limits,
+        chunk_settings=chunk_settings,
+    )
+
+
+def _cmd_cache(logger, args):
+    # Results go to stdout as JSON: log messages are redacted and would mask
+    # numbers that happen to match environment values.
+    root = Path(args.cache_dir) if args.cache_dir is not None else None
+    cache = parse_cache.new_cache(root, max_bytes=args.max_bytes)
+    if args.action == "prune":
+        logger.info("cache prune selected")
+        res = parse_cache.cache_prune(cache)
+        print(json.dumps(res, sort_keys=True))
+        return 0
+    logger.info("cache stats selected")
+    stats = parse_cache.cache_stats(cache)
+    print(json.dumps(stats, sort_keys=True))
     return 0
 
 
@@ -74,13 +201,15 @@ def main(argv=None):
     if args.command == "run":
         return _cmd_run(logger)
     if args.command == "process-docs":
-        return _cmd_process_docs(logger)
+        return _cmd_process_docs(logger, args)
     if args.command == "generate":
         return _cmd_generate(logger)
     if args.command == "evaluate":
         return _cmd_evaluate(logger)
     if args.command == "combine":
         return _cmd_combine(logger)
+    if args.command == "cache":
+        return _cmd_cache(logger, args)
 
     # Unknown command
     logger.error("unknown command")
@@ -0,0 +1,257 @@
+# Content-addressed on-disk cache shared across runs and base_dirs.
+# Functional style: a cache is a plain (picklable) dict, no OOP, no regex.
+#
+# Layout: <root>/<namespace>/<key[:2]>/<key>.data  (payload)
+#                                     /<key>.json  (metadata)
+# An entry's last use is the mtime of its .json file. Once the cache grows
+# past max_bytes, the least recently used entries are evicted until it is
+# down to PRUNE_TARGET of the cap, so the next writes fit without pruning.
+from pathlib import Path
+from typing import Dict, List, Optional
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Automatic pruning frees space down to this fraction of max_bytes
+PRUNE_TARGET = 0.9
+
+# Namespace used by the pipeline for parsed document text
+PARSE_NAMESPACE = "parse"
+
+# Namespace for OCR results keyed by image hash (images.cached_ocr_fn)
+OCR_NAMESPACE = "ocr"
+
+
+def default_cache_dir() -> Path:
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    if xdg:
+        return Path(xdg) / "ai-coding-automated-setup"
+    return Path.home() / ".cache" / "ai-coding-automated-setup"
+
+
+def new_cache(root: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> Dict[str, object]:
+    cache: Dict[str, object] = {}
+    cache["root"] = Path(root) if root is not None else default_cache_dir()
+    cache["max_bytes"] = int(max_bytes)
+    # Running size estimate, filled lazily on the first put
+    cache["approx_bytes"] = None
+    return cache
+
+
+def make_key(content_hash: str, parser: str, options: Optional[Dict[str, object]] = None) -> str:
+    payload = json.dumps([content_hash, parser, options], sort_keys=True, ensure_ascii=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _paths(cache: Dict[str, object], namespace: str, key: str) -> Dict[str, Path]:
+    d = Path(cache["root"]) / namespace / key[:2]
+    paths: Dict[str, Path] = {}
+    paths["dir"] = d
+    paths["data"] = d / (key + ".data")
+    paths["meta"] = d / (key + ".json")
+    return paths
+
+
+def _touch(path: Path) -> None:
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def cache_get(cache: Dict[str, object], namespace: str, key: str) -> Optional[Dict[str, object]]:
+    """Return the entry's metadata (plus "data_path") or None on a miss."""
+    paths = _paths(cache, namespace, key)
+    try:
+        with open(paths["meta"], "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(meta, dict) or not paths["data"].exists():
+        return None
+    _touch(paths["meta"])
+    meta["data_path"] = str(paths["data"])
+    return meta
+
+
+def cache_get_text(cache: Dict[str, object], namespace: str, key: str) -> Optional[str]:
+    meta = cache_get(cache, namespace, key)
+    if meta is None:
+        return None
+    try:
+        with open(meta["data_path"], "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _replace_from(tmp: Path, target: Path) -> None:
+    os.replace(str(tmp), str(target))
+
+
+def cache_put_file(cache: Dict[str, object], namespace: str, key: str, src_file: Path, meta: Dict[str, object]) -> None:
+    """Store a copy of src_file with its metadata under key.
+
+    Payload and metadata are written to temporary names and renamed into
+    place, metadata last, so readers never see a half-written entry.
+    """
+    paths = _paths(cache, namespace, key)
+    paths["dir"].mkdir(parents=True, exist_ok=True)
+    suffix = ".tmp-" + uuid.uuid4().hex
+    tmp_data = paths["data"].with_name(paths["data"].name + suffix)
+    tmp_meta = paths["meta"].with_name(paths["meta"].name + suffix)
+    shutil.copyfile(str(src_file), str(tmp_data))
+    with open(tmp_meta, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, sort_keys=True, default=str)
+    _replace_from(tmp_data, paths["data"])
+    _replace_from(tmp_meta, paths["meta"])
+    _account(cache, paths)
+
+
+def cache_put_text(cache: Dict[str, object], namespace: str, key: str, text: str, meta: Optional[Dict[str, object]] = None) -> None:
+    paths = _paths(cache, namespace, key)
+    paths["dir"].mkdir(parents=True, exist_ok=True)
+    suffix = ".tmp-" + uuid.uuid4().hex
+    tmp_data = paths["data"].with_name(paths["data"].name + suffix)
+    tmp_meta = paths["meta"].with_name(paths["meta"].name + suffix)
+    with open(tmp_data, "w", encoding="utf-8") as f:
+        f.write(text)
+    with open(tmp_meta, "w", encoding="utf-8") as f:
+        json.dump(meta if meta is not None else {}, f, ensure_ascii=False, sort_keys=True, default=str)
+    _replace_from(tmp_data, paths["data"])
+    _replace_from(tmp_meta, paths["meta"])
+    _account(cache, paths)
+
+
+def _entry_size(paths: Dict[str, Path]) -> int:
+    total = 0
+    for key in ["data", "meta"]:
+        try:
+            total = total + os.path.getsize(paths[key])
+        except OSError:
+            pass
+    return total
+
+
+def _account(cache: Dict[str, object], paths: Dict[str, Path]) -> None:
+    # Running size estimate; the directory is only walked when it crosses
+    # the cap. The estimate covers this process's writes only (pool workers
+    # each hold a copy of the cache dict), so the real total is measured
+    # before anything is evicted.
+    if cache["approx_bytes"] is not None:
+        cache["approx_bytes"] = cache["approx_bytes"] + _entry_size(paths)
+        if cache["approx_bytes"] <= cache["max_bytes"]:
+            return
+    entries = _list_entries(cache)
+    total = _total_bytes(entries)
+    if total > cache["max_bytes"]:
+        _evict(cache, entries, total, int(cache["max_bytes"] * PRUNE_TARGET))
+    else:
+        cache["approx_bytes"] = total
+
+
+def _list_entries(cache: Dict[str, object]) -> List[Dict[str, object]]:
+    # One record per entry: namespace, meta path, data path, size, last use
+    entries: List[Dict[str, object]] = []
+    root = Path(cache["root"])
+    if not root.is_dir():
+        return entries
+    for ns_dir in sorted(root.iterdir()):
+        if not ns_dir.is_dir():
+            continue
+        for shard in sorted(ns_dir.iterdir()):
+            if not shard.is_dir():
+                continue
+            for meta in sorted(shard.glob("*.json")):
+                data = meta.with_suffix(".data")
+                paths: Dict[str, Path] = {}
+                paths["meta"] = meta
+                paths["data"] = data
+                try:
+                    used = meta.stat().st_mtime
+                except OSError:
+                    continue
+                rec: Dict[str, object] = {}
+                rec["namespace"] = ns_dir.name
+                rec["meta"] = meta
+                rec["data"] = data
+                rec["bytes"] = _entry_size(paths)
+                rec["used"] = used
+                entries.append(rec)
+    return entries
+
+
+def cache_stats(cache: Dict[str, object]) -> Dict[str, object]:
+    entries = _list_entries(cache)
+    namespaces: Dict[str, Dict[str, int]] = {}
+    total = 0
+    i = 0
+    while i < len(entries):
+        rec = entries[i]
+        ns = rec["namespace"]
+        if ns not in namespaces:
+            namespaces[ns] = {"entries": 0, "bytes": 0}
+        namespaces[ns]["entries"] = namespaces[ns]["entries"] + 1
+        namespaces[ns]["bytes"] = namespaces[ns]["bytes"] + rec["bytes"]
+        total = total + rec["bytes"]
+        i = i + 1
+    stats: Dict[str, object] = {}
+    stats["root"] = str(cache["root"])
+    stats["entries"] = len(entries)
+    stats["bytes"] = total
+    stats["max_bytes"] = cache["max_bytes"]
+    stats["namespaces"] = namespaces
+    return stats
+
+
+def _used_key(rec: Dict[str, object]) -> float:
+    return rec["used"]
+
+
+def cache_prune(cache: Dict[str, object], max_bytes: Optional[int] = None) -> Dict[str, int]:
+    """Evict least recently used entries until the cache fits in max_bytes.
+
+    max_bytes defaults to the cache's own cap. Returns counts of removed
+    entries and freed bytes.
+    """
+    limit = int(max_bytes) if max_bytes is not None else int(cache["max_bytes"])
+    entries = _list_entries(cache)
+    return _evict(cache, entries, _total_bytes(entries), limit)
+
+
+def _total_bytes(entries: List[Dict[str, object]]) -> int:
+    total = 0
+    i = 0
+    while i < len(entries):
+        total = total + entries[i]["bytes"]
+        i = i + 1
+    return total
+
+
+def _evict(cache: Dict[str, object], entries: List[Dict[str, object]], total: int, limit: int) -> Dict[str, int]:
+    entries.sort(key=_used_key)
+
+    removed = 0
+    freed = 0
+    i = 0
+    while total > limit and i < len(entries):
+        rec = entries[i]
+        # Remove metadata first so a concurrent reader sees a clean miss
+        for key in ["meta", "data"]:
+            try:
+                os.remove(rec[key])
+            except OSError:
+                pass
+        total = total - rec["bytes"]
+        freed = freed + rec["bytes"]
+        removed = removed + 1
+        i = i + 1
+    cache["approx_bytes"] = total
+    result: Dict[str, int] = {}
+    result["removed"] = removed
+    result["freed_bytes"] = freed
+    return result
@@ -0,0 +1,456 @@
+# Token-sized chunks of processed documents, and budget-based selection.
+# Functional style, no OOP or regex.
+#
+# build_chunk_index(base_dir, settings) splits every processed text listed
+# in mapping.json and writes two files under processed_documents/:
+#
+#   chunks.jsonl      one JSON line per chunk: id, source, out_path, index,
+#                     start/end (characters), byte_start/byte_end (UTF-8
+#                     bytes of the text file) and tokens
+#   chunk_index.json  compact per-document offset table, also used to skip
+#                     texts that have not changed since the last build
+#
+# Chunks follow paragraph, then line, then word boundaries. Token counts
+# come from settings["count_fn"] (any str -> int, e.g. a tokenizer's
+# len(encode(text))) or the built-in approx_tokens estimate.
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+
+from . import mapping as mp
+
+DEFAULT_CHUNK_TOKENS = 512
+
+CHUNKS_FILE = "chunks.jsonl"
+INDEX_FILE = "chunk_index.json"
+INDEX_VERSION = 1
+
+# Boundaries tried in order when a span is too large for one chunk
+_SEPARATORS = ["\n\n", "\n", " "]
+
+# Query words shorter than this do not count towards relevance
+_MIN_TERM_CHARS = 4
+_TERM_STRIP = ".,;:!?()[]{}<>\"'`*#|/\\-_=+"
+
+
+def approx_tokens(text: str) -> int:
+    """Estimate the token count of text without a tokenizer.
+
+    About 3.5 ASCII characters per token, and one token per non-ASCII
+    character (CJK text is roughly one token per character). Both counts
+    come from the string and its UTF-8 length, so no Python-level loop
+    runs over the characters.
+    """
+    if len(text) == 0:
+        return 0
+    extra = len(text.encode("utf-8")) - len(text)
+    # 2- and 3-byte characters dominate; count each as 2 extra bytes
+    non_ascii = (extra + 1) // 2
+    ascii_chars = len(text) - non_ascii
+    if ascii_chars < 0:
+        ascii_chars = 0
+    return (ascii_chars * 2 + 6) // 7 + non_ascii
+
+
+def new_settings(max_tokens: int = DEFAULT_CHUNK_TOKENS, overlap_tokens: int = 0, count_fn: Optional[Callable[[str], int]] = None) -> Dict[str, object]:
+    if max_tokens < 1:
+        raise ValueError("chunk size must be at least one token")
+    if overlap_tokens < 0 or overlap_tokens >= max_tokens:
+        raise ValueError("chunk overlap must be below the chunk size")
+    settings: Dict[str, object] = {}
+    settings["max_tokens"] = int(max_tokens)
+    settings["overlap_tokens"] = int(overlap_tokens)
+    settings["count_fn"] = count_fn
+    return settings
+
+
+def _counter_name(count_fn: Optional[Callable]) -> str:
+    if count_fn is None:
+        return "approx"
+    module = getattr(count_fn, "__module__", None) or ""
+    name = getattr(count_fn, "__qualname__", None) or getattr(count_fn, "__name__", None) or type(count_fn).__name__
+    return module + "." + name
+
+
+def _settings_fingerprint(settings: Dict[str, object]) -> Dict[str, object]:
+    fp: Dict[str, object] = {}
+    fp["max_tokens"] = settings["max_tokens"]
+    fp["overlap_tokens"] = settings["overlap_tokens"]
+    fp["counter"] = _counter_name(settings.get("count_fn"))
+    return fp
+
+
+# Splitting
+
+def _split_at(text: str, start: int, end: int, sep: str) -> List[Tuple[int, int]]:
+    # [start, end) cut after each sep; separators stay with the piece before
+    spans: List[Tuple[int, int]] = []
+    pos = start
+    while pos < end:
+        hit = text.find(sep, pos, end)
+        if hit == -1:
+            spans.append((pos, end))
+            break
+        cut = hit + len(sep)
+        # A run of separators stays in one piece
+        while text.startswith(sep, cut) and cut < end:
+            cut = cut + len(sep)
+        spans.append((pos, cut))
+        pos = cut
+    return spans
+
+
+def _hard_split(text: str, start: int, end: int, max_tokens: int, count: Callable[[str], int]) -> List[Tuple[int, int, int]]:
+    # No boundary left: cut by characters, sized from the span's density
+    units: List[Tuple[int, int, int]] = []
+    pos = start
+    while pos < end:
+        total = count(text[pos:end])
+        if total <= max_tokens:
+            units.append((pos, end, total))
+            break
+        size = (end - pos) * max_tokens // total
+        if size < 1:
+            size = 1
+        n = count(text[pos:pos + size])
+        while n > max_tokens and size > 1:
+            size = size // 2
+            n = count(text[pos:pos + size])
+        units.append((pos, pos + size, n))
+        pos = pos + size
+    return units
+
+
+def _units(text: str, start: int, end: int, level: int, max_tokens: int, count: Callable[[str], int], out: List[Tuple[int, int, int]]) -> None:
+    # (start, end, tokens) spans of at most max_tokens each, in order
+    n = count(text[start:end])
+    if n <= max_tokens:
+        out.append((start, end, n))
+        return
+    if level >= len(_SEPARATORS):
+        for unit in _hard_split(text, start, end, max_tokens, count):
+            out.append(unit)
+        return
+    spans = _split_at(text, start, end, _SEPARATORS[level])
+    if len(spans) == 1:
+        _units(text, start, end, level + 1, max_tokens, count, out)
+        return
+    for span in spans:
+        _units(text, span[0], span[1], level + 1, max_tokens, count, out)
+
+
+def split_text(text: str, max_tokens: int = DEFAULT_CHUNK_TOKENS, overlap_tokens: int = 0, count_fn: Optional[Callable[[str], int]] = None) -> List[Dict[str, int]]:
+    """Split text into chunks of about max_tokens tokens.
+
+    Returns [{"start", "end", "tokens"}] character spans in order. Spans
+    cover the text without gaps, except that whitespace-only chunks are
+    dropped; with overlap_tokens each chunk repeats up to that many tokens
+    from the end of the one before.
+    """
+    count = count_fn if count_fn is not None else approx_tokens
+    units: List[Tuple[int, int, int]] = []
+    _units(text, 0, len(text), 0, max_tokens, count, units)
+
+    chunks: List[Dict[str, int]] = []
+    first = 0
+    while first < len(units):
+        used = units[first][2]
+        last = first
+        while last + 1 < len(units) and used + units[last + 1][2] <= max_tokens:
+            last = last + 1
+            used = used + units[last][2]
+        start = units[first][0]
+        end = units[last][1]
+        if len(text[start:end].strip()) > 0:
+            chunks.append({"start": start, "end": end, "tokens": count(text[start:end])})
+        if last + 1 >= len(units):
+            break
+        # Step back over trailing units for the overlap, always moving on
+        nxt = last + 1
+        back = 0
+        while nxt - 1 > first and back + units[nxt - 1][2] <= overlap_tokens:
+            nxt = nxt - 1
+            back = back + units[nxt][2]
+        first = nxt
+    return chunks
+
+
+def _chunk_ids(doc_key: str, text: str, spans: List[Dict[str, int]]) -> List[str]:
+    # Content-derived: an unchanged chunk keeps its id when other parts of
+    # the document change. Repeats within a document get a -<n> suffix.
+    ids: List[str] = []
+    seen: Dict[str, int] = {}
+    for span in spans:
+        digest = hashlib.sha256((doc_key + "\0" + text[span["start"]:span["end"]]).encode("utf-8")).hexdigest()[:16]
+        n = seen.get(digest, 0)
+        seen[digest] = n + 1
+        ids.append(digest if n == 0 else digest + "-" + str(n))
+    return ids
+
+
+def _byte_offsets(text: str, positions: List[int]) -> List[int]:
+    # UTF-8 offsets of non-decreasing character positions, in one pass
+    out: List[int] = []
+    char_pos = 0
+    byte_pos = 0
+    for pos in positions:
+        byte_pos = byte_pos + len(text[char_pos:pos].encode("utf-8"))
+        char_pos = pos
+        out.append(byte_pos)
+    return out
+
+
+def chunk_document(text: str, doc_key: str, settings: Dict[str, object]) -> List[Dict[str, object]]:
+    """Chunk records for one document: id, index, start, end, byte_start,
+    byte_end and tokens. doc_key (e.g. the output file name) seeds the ids."""
+    spans = split_text(text, int(settings["max_tokens"]), int(settings["overlap_tokens"]), settings.get("count_fn"))
+    ids = _chunk_ids(doc_key, text, spans)
+    starts: List[int] = []
+    ends: List[int] = []
+    for span in spans:
+        starts.append(span["start"])
+        ends.append(span["end"])
+    byte_starts = _byte_offsets(text, starts)
+    byte_ends = _byte_offsets(text, ends)
+    records: List[Dict[str, object]] = []
+    i = 0
+    while i < len(spans):
+        rec: Dict[str, object] = {}
+        rec["id"] = ids[i]
+        rec["index"] = i
+        rec["start"] = spans[i]["start"]
+        rec["end"] = spans[i]["end"]
+        rec["byte_start"] = byte_starts[i]
+        rec["byte_end"] = byte_ends[i]
+        rec["tokens"] = spans[i]["tokens"]
+        records.append(rec)
+        i = i + 1
+    return records
+
+
+# Index files
+
+def chunks_path(base_dir: Path) -> Path:
+    return Path(base_dir) / "processed_documents" / CHUNKS_FILE
+
+
+def index_path(base_dir: Path) -> Path:
+    return Path(base_dir) / "processed_documents" / INDEX_FILE
+
+
+def _read_index(base_dir: Path) -> Dict[str, object]:
+    try:
+        with open(index_path(base_dir), "r", encoding="utf-8") as f:
+            doc = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(doc, dict) or doc.get("version") != INDEX_VERSION:
+        return {}
+    return doc
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    tmp.replace(path)
+
+
+# Columns of a chunk row in chunk_index.json
+_ROW_KEYS = ["id", "start", "end", "byte_start", "byte_end", "tokens"]
+
+
+def _row(rec: Dict[str, object]) -> List[object]:
+    row: List[object] = []
+    for key in _ROW_KEYS:
+        row.append(rec[key])
+    return row
+
+
+def _record(row: List[object], index: int) -> Dict[str, object]:
+    rec: Dict[str, object] = {}
+    k = 0
+    while k < len(_ROW_KEYS):
+        rec[_ROW_KEYS[k]] = row[k]
+        k = k + 1
+    rec["index"] = index
+    return rec
+
+
+def build_chunk_index(base_dir: Path, settings: Optional[Dict[str, object]] = None) -> Dict[str, object]:
+    """Chunk every processed text in mapping.json and write the index files.
+
+    Entries with an error or a missing output are left out. A text whose
+    size and mtime match the previous index built with the same settings
+    is not read again. Returns {"documents", "chunks", "tokens", "reused"}.
+    """
+    base = Path(base_dir)
+    cfg = settings if settings is not None else new_settings()
+    fp = _settings_fingerprint(cfg)
+    prev = _read_index(base)
+    prev_docs: Dict[str, Dict[str, object]] = {}
+    if prev.get("settings") == fp:
+        for doc in prev.get("docs") or []:
+            prev_docs[str(doc.get("out_path"))] = doc
+
+    docs: List[Dict[str, object]] = []
+    lines: List[str] = []
+    total_chunks = 0
+    total_tokens = 0
+    reused = 0
+    for entry in mp.read_mapping(base).get("items") or []:
+        out_path = entry.get("out_path")
+        if entry.get("error") is not None or not out_path:
+            continue
+        try:
+            st = os.stat(str(out_path))
+        except OSError:
+            continue
+        old = prev_docs.get(str(out_path))
+        if old is not None and old.get("size") == st.st_size and old.get("mtime_ns") == st.st_mtime_ns:
+            rows = old.get("chunks") or []
+            reused = reused + 1
+        else:
+            with open(str(out_path), "rb") as f:
+                text = f.read().decode("utf-8", errors="replace")
+            rows = []
+            for rec in chunk_document(text, Path(str(out_path)).name, cfg):
+                rows.append(_row(rec))
+        doc: Dict[str, object] = {}
+        doc["source"] = entry.get("source")
+        doc["out_path"] = str(out_path)
+        doc["size"] = st.st_size
+        doc["mtime_ns"] = st.st_mtime_ns
+        doc["chunks"] = rows
+        docs.append(doc)
+        i = 0
+        while i < len(rows):
+            rec = _record(rows[i], i)
+            line: Dict[str, object] = {"id": rec["id"], "source": doc["source"], "out_path": doc["out_path"]}
+            for key in ["index", "start", "end", "byte_start", "byte_end", "tokens"]:
+                line[key] = rec[key]
+            lines.append(json.dumps(line, ensure_ascii=False, separators=(",", ":")) + "\n")
+            total_tokens = total_tokens + int(rec["tokens"])
+            i = i + 1
+        total_chunks = total_chunks + len(rows)
+
+    index: Dict[str, object] = {"version": INDEX_VERSION, "settings": fp, "docs": docs}
+    _write_atomic(chunks_path(base), "".join(lines))
+    _write_atomic(index_path(base), json.dumps(index, ensure_ascii=False, separators=(",", ":")))
+
+    summary: Dict[str, object] = {}
+    summary["documents"] = len(docs)
+    summary["chunks"] = total_chunks
+    summary["tokens"] = total_tokens
+    summary["reused"] = reused
+    return summary
+
+
+def load_chunks(base_dir: Path) -> List[Dict[str, object]]:
+    # Chunk records from chunks.jsonl, in document and chunk order, with
+    # "count" (chunks in the same document) added as in document_chunks
+    records: List[Dict[str, object]] = []
+    try:
+        with open(chunks_path(base_dir), "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    records.append(json.loads(line))
+    except OSError:
+        return records
+    counts: Dict[str, int] = {}
+    for rec in records:
+        key = str(rec.get("out_path"))
+        counts[key] = counts.get(key, 0) + 1
+    for rec in records:
+        rec["count"] = counts[str(rec.get("out_path"))]
+    return records
+
+
+def chunk_text(chunk: Dict[str, object]) -> str:
+    """Text of a chunk: its "text" if present, else read by byte offsets."""
+    if isinstance(chunk.get("text"), str):
+        return str(chunk["text"])
+    start = int(chunk["byte_start"])
+    with open(str(chunk["out_path"]), "rb") as f:
+        f.seek(start)
+        data = f.read(int(chunk["byte_end"]) - start)
+    return data.decode("utf-8", errors="replace")
+
+
+def document_chunks(docs: List[Dict[str, object]], settings: Optional[Dict[str, object]] = None) -> List[Dict[str, object]]:
+    """Chunk in-memory documents ({"text", "metadata": {"source"}}).
+
+    Records carry "text", "source" and "count" (chunks in that document)
+    besides the chunk_document keys. Documents without a source are named
+    document_<n>, counting from 1.
+    """
+    cfg = settings if settings is not None else new_settings()
+    records: List[Dict[str, object]] = []
+    n = 0
+    for doc in docs:
+        n = n + 1
+        text = doc.get("text") or ""
+        meta = doc.get("metadata") or {}
+        source = str(meta.get("source") or ("document_" + str(n)))
+        doc_records = chunk_document(text, source, cfg)
+        for rec in doc_records:
+            rec["source"] = source
+            rec["text"] = text[int(rec["start"]):int(rec["end"])]
+            rec["count"] = len(doc_records)
+            records.append(rec)
+    return records
+
+
+# Selection
+
+def _terms(text: str) -> Dict[str, bool]:
+    terms: Dict[str, bool] = {}
+    for word in text.lower().split():
+        word = word.strip(_TERM_STRIP)
+        if len(word) >= _MIN_TERM_CHARS:
+            terms[word] = True
+    return terms
+
+
+def select_chunks(chunks: List[Dict[str, object]], budget_tokens: int, query: Optional[str] = None, overhead_tokens: int = 0) -> List[Dict[str, object]]:
+    """Pick chunks whose tokens (plus overhead_tokens each) fit budget_tokens.
+
+    Without a query, documents are covered breadth-first: every document's
+    first chunk, then every second chunk, and so on. With a query, chunks
+    sharing more distinct words (of 4+ characters) with it come first,
+    breadth-first order breaking ties. Chunks that do not fit are passed
+    over for smaller ones. The result is in document and chunk order.
+    """
+    order: List[int] = []
+    i = 0
+    while i < len(chunks):
+        order.append(i)
+        i = i + 1
+    # Stable sorts: breadth-first, then by relevance
+    order.sort(key=lambda k: int(chunks[k].get("index") or 0))
+    if query:
+        wanted = _terms(query)
+        scores: Dict[int, int] = {}
+        for k in order:
+            found = _terms(chunk_text(chunks[k]))
+            score = 0
+            for term in wanted:
+                if term in found:
+                    score = score + 1
+            scores[k] = score
+        order.sort(key=lambda k: -scores[k])
+
+    picked: List[int] = []
+    used = 0
+    for k in order:
+        cost = int(chunks[k].get("tokens") or 0) + overhead_tokens
+        if used + cost <= budget_tokens:
+            picked.append(k)
+            used = used + cost
+    picked.sort()
+    selected: List[Dict[str, object]] = []
+    for k in picked:
+        selected.append(chunks[k])
+    return selected
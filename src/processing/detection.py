@@ -1,6 +1,10 @@
+import codecs
 import logging
+import zipfile
 from pathlib import Path
-from typing import Optional, Union
+from typing import Dict, Optional, Union
+
+from . import registry
 
 
 _LOG = logging.getLogger(__name__)
@@ -28,17 +32,7 @@ def _get_extension_lower(name: str) -> str:
     return name[idx + 1 :].lower()
 
 
-def detect_handler(pathlike: Union[str, Path]) -> Optional[str]:
-    """
-    Determine handler key from file extension.
-
-    Returns one of: txt, md, docx, xlsx, csv, tsv, pdf, pptx, png, jpeg, svg
-    Returns None for unsupported types and logs a skip reason.
-    """
-    p = _to_path(pathlike)
-    name = p.name
-    ext = _get_extension_lower(name)
-
+def _handler_for_extension(ext: str) -> Optional[str]:
     # Explicit routing without regex, using clear if/elif blocks
     if ext == "txt":
         return "txt"
@@ -65,7 +59,206 @@ def detect_handler(pathlike: Union[str, Path]) -> Optional[str]:
         return "jpeg"
     elif ext == "svg":
         return "svg"
+    return None
+
+
+def extension_handler(pathlike: Union[str, Path]) -> Optional[str]:
+    # detect_handler without the skip log
+    ext = _get_extension_lower(_to_path(pathlike).name)
+    handler = _handler_for_extension(ext)
+    if handler is None and ext:
+        # Formats added through the parser registry (register_parser/entry points)
+        handler = registry.format_for_extension(ext)
+    return handler
+
+
+def detect_handler(pathlike: Union[str, Path]) -> Optional[str]:
+    """
+    Determine handler key from file extension.
+
+    Returns one of: txt, md, docx, xlsx, csv, tsv, pdf, pptx, png, jpeg, svg
+    Returns None for unsupported types and logs a skip reason.
+    """
+    p = _to_path(pathlike)
+    name = p.name
+    ext = _get_extension_lower(name)
+    handler = extension_handler(p)
+    if handler is not None:
+        return handler
 
     # Unknown / unsupported
     _LOG.info("skip: unsupported extension '%s' for file '%s'", ext or "(none)", name)
     return None
+
+
+# Content sniffing
+#
+# detect_format reads the first HEADER_BYTES of a file once and checks them
+# against the formats' signatures (zip containers are inspected by their
+# member names). Files whose content contradicts their extension are
+# rejected before any parser runs. The header is returned so callers can
+# hand it to the parser instead of reading small files a second time.
+
+HEADER_BYTES = 8192
+
+TEXT_HANDLERS = ["txt", "md", "csv", "tsv"]
+
+_PNG_SIG = b"\x89PNG\r\n\x1a\n"
+_JPEG_SIG = b"\xff\xd8\xff"
+_OLE2_SIG = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+_ZIP_SIGS = [b"PK\x03\x04", b"PK\x05\x06"]
+_UTF16_BOMS = [b"\xff\xfe", b"\xfe\xff"]
+
+
+def read_header(pathlike: Union[str, Path], size: int = HEADER_BYTES) -> Dict[str, object]:
+    """Read up to size bytes; "complete" is True when that is the whole file."""
+    with open(_to_path(pathlike), "rb") as f:
+        data = f.read(size)
+        complete = len(data) < size or len(f.read(1)) == 0
+    header: Dict[str, object] = {}
+    header["data"] = data
+    header["complete"] = complete
+    return header
+
+
+def _zip_handler(p: Path) -> Optional[str]:
+    # Office Open XML packages are recognised by their main part
+    try:
+        with zipfile.ZipFile(p, "r") as z:
+            names = z.namelist()
+    except (zipfile.BadZipFile, OSError):
+        return None
+    i = 0
+    while i < len(names):
+        name = names[i]
+        if name == "word/document.xml":
+            return "docx"
+        if name == "xl/workbook.xml":
+            return "xlsx"
+        if name == "ppt/presentation.xml" or name.startswith("ppt/slides/"):
+            return "pptx"
+        i = i + 1
+    return None
+
+
+def _utf8_text(data: bytes, complete: bool) -> Optional[str]:
+    # Decoded header, or None when it is not UTF-8. An incomplete header may
+    # end inside a multi-byte character.
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    try:
+        return decoder.decode(data, complete)
+    except UnicodeDecodeError:
+        return None
+
+
+def _text_kind(text: str) -> str:
+    head = text.lstrip().lower()
+    if head.startswith("<svg") or (head.startswith("<?xml") and head.find("<svg") != -1):
+        return "svg"
+    if head.startswith("<!doctype html") or head.startswith("<html"):
+        return "html"
+    if head.startswith("<?xml"):
+        return "xml"
+    return "text"
+
+
+def _is_pdf(data: bytes, by_ext: Optional[str]) -> bool:
+    # %PDF- opens the file, after at most a BOM and whitespace. Readers also
+    # accept junk before it within the first 1 KiB, but only a .pdf file is
+    # given that benefit: text that merely mentions "%PDF-" stays text.
+    i = 3 if data.startswith(b"\xef\xbb\xbf") else 0
+    while i < len(data) and data[i:i + 1] in (b" ", b"\t", b"\r", b"\n", b"\f"):
+        i = i + 1
+    if data.startswith(b"%PDF-", i):
+        return True
+    return by_ext == "pdf" and data.find(b"%PDF-", 0, 1024) != -1
+
+
+def _sniff_content(p: Path, data: bytes, complete: bool, by_ext: Optional[str] = None) -> Dict[str, object]:
+    # What the bytes say; the extension only matters for a late PDF header
+    found: Dict[str, object] = {}
+    found["handler"] = None
+    found["reason"] = ""
+    if _is_pdf(data, by_ext):
+        found["handler"] = "pdf"
+    elif data.startswith(_PNG_SIG):
+        found["handler"] = "png"
+    elif data.startswith(_JPEG_SIG):
+        found["handler"] = "jpeg"
+    elif data.startswith(_OLE2_SIG):
+        found["reason"] = "legacy Office (OLE2) file"
+    elif data[:4] in _ZIP_SIGS:
+        found["handler"] = _zip_handler(p)
+        if found["handler"] is None:
+            found["reason"] = "zip archive without an Office document"
+    elif data[:2] in _UTF16_BOMS:
+        found["reason"] = "UTF-16 text"
+    elif data.find(b"\x00") != -1:
+        found["reason"] = "binary content"
+    else:
+        text = _utf8_text(data, complete)
+        if text is None:
+            found["reason"] = "content is not UTF-8 text"
+        else:
+            found["text_kind"] = _text_kind(text)
+            if found["text_kind"] == "svg":
+                found["handler"] = "svg"
+    return found
+
+
+def detect_format(pathlike: Union[str, Path], header: Optional[Dict[str, object]] = None) -> Dict[str, object]:
+    """Detect the handler from the file's content and extension.
+
+    Returns {"handler", "confidence", "reason", "header", "complete"}:
+    handler is None for rejected files, with the reason why. confidence is
+    1.0 when content and extension agree, 0.9 when a binary signature
+    overrides the extension, 0.8 for text routed by its extension and 0.5
+    when there is nothing to check (empty file). header/complete are as
+    returned by read_header.
+    """
+    p = _to_path(pathlike)
+    ext = _get_extension_lower(p.name)
+    by_ext = _handler_for_extension(ext)
+    if header is None:
+        header = read_header(p)
+    data = header["data"]
+    plugin = None
+    if by_ext is None and ext:
+        plugin = registry.format_for_extension(ext)
+
+    result: Dict[str, object] = {}
+    result["handler"] = None
+    result["confidence"] = 0.0
+    result["reason"] = ""
+    result["header"] = data
+    result["complete"] = header["complete"]
+
+    if plugin is not None:
+        # Registered third-party format: its content is not known here, so
+        # the extension is trusted
+        result["handler"] = plugin
+        result["confidence"] = 0.5
+    elif len(data) == 0:
+        result["handler"] = by_ext
+        result["confidence"] = 0.5 if by_ext is not None else 0.0
+        result["reason"] = "empty file" if by_ext is not None else "unsupported extension"
+    else:
+        found = _sniff_content(p, data, header["complete"], by_ext)
+        kind = found.get("text_kind")
+        if found["handler"] is not None and (kind is None or by_ext not in TEXT_HANDLERS):
+            # Binary signature, or an SVG without a text-type extension
+            result["handler"] = found["handler"]
+            result["confidence"] = 1.0 if found["handler"] == by_ext else 0.9
+        elif kind is not None and by_ext in TEXT_HANDLERS:
+            result["handler"] = by_ext
+            result["confidence"] = 0.8
+        elif kind is not None and by_ext is not None:
+            result["reason"] = "extension '" + ext + "' but content is " + str(kind)
+        elif by_ext is None:
+            result["reason"] = "unsupported extension"
+        else:
+            result["reason"] = "extension '" + ext + "' but " + str(found["reason"] or "content does not match")
+
+    if result["handler"] is None:
+        _LOG.info("skip: %s for file '%s'", result["reason"], p.name)
+    return result
@@ -1,7 +1,24 @@
 # Image processing helpers for OCR (functional style)
 # These are lightweight stubs to avoid external binary deps in core lib.
 from pathlib import Path
-from typing import List
+from typing import Callable, Dict, List, Optional, Union
+import functools
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from . import cache as cache_mod
+
+
+_LOG = logging.getLogger(__name__)
+
+DEFAULT_OCR_TIMEOUT = 120.0
+
+# Image data handed to OCR: bytes, or a memoryview over a mapped file
+BytesLike = Union[bytes, memoryview]
 
 
 def rasterize_pdf_to_images(pdf_path: Path) -> List[bytes]:
@@ -19,3 +36,222 @@ def preprocess_image_for_ocr(image_bytes: bytes) -> bytes:
     No-op placeholder to allow future enhancement.
     """
     return image_bytes
+
+
+# Shared OCR executor
+#
+# OCR engines (tesseract, cloud APIs) spend their time outside the
+# interpreter, so a thread pool scales OCR with cores. Every OCR call made
+# by parse_image and parse_pdf goes through one executor per process:
+# - workers: concurrent OCR calls
+# - max_queue: calls waiting for a worker; submitters block beyond that
+# - timeout: seconds a caller waits for one image before giving up on it
+
+def _default_workers() -> int:
+    n = os.cpu_count()
+    if n is None or n < 1:
+        return 1
+    return n
+
+
+def new_ocr_executor(workers: Optional[int] = None, max_queue: Optional[int] = None, timeout: Optional[float] = DEFAULT_OCR_TIMEOUT) -> Dict[str, object]:
+    n = workers if workers is not None and workers > 0 else _default_workers()
+    q = max_queue if max_queue is not None and max_queue >= 0 else n * 4
+    executor: Dict[str, object] = {}
+    executor["workers"] = n
+    executor["max_queue"] = q
+    executor["timeout"] = timeout
+    executor["pool"] = ThreadPoolExecutor(max_workers=n, thread_name_prefix="ocr")
+    executor["slots"] = threading.BoundedSemaphore(n + q)
+    return executor
+
+
+def executor_config(executor: Dict[str, object]) -> Dict[str, object]:
+    cfg: Dict[str, object] = {}
+    cfg["workers"] = executor["workers"]
+    cfg["max_queue"] = executor["max_queue"]
+    cfg["timeout"] = executor["timeout"]
+    return cfg
+
+
+def shutdown_ocr_executor(executor: Dict[str, object]) -> None:
+    # Do not wait: a hung OCR call must not block shutdown
+    executor["pool"].shutdown(wait=False, cancel_futures=True)
+
+
+_SHARED: Dict[str, object] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def get_ocr_executor() -> Dict[str, object]:
+    """Return this process's shared OCR executor, creating it on first use."""
+    with _SHARED_LOCK:
+        if "executor" not in _SHARED:
+            _SHARED["executor"] = new_ocr_executor()
+        return _SHARED["executor"]
+
+
+def configure_ocr_executor(workers: Optional[int] = None, max_queue: Optional[int] = None, timeout: Optional[float] = DEFAULT_OCR_TIMEOUT) -> Dict[str, object]:
+    """Replace the shared executor unless it already has these settings."""
+    with _SHARED_LOCK:
+        current = _SHARED.get("executor")
+        if current is not None:
+            cfg = executor_config(current)
+            same = cfg["timeout"] == timeout
+            if workers is not None and workers > 0 and cfg["workers"] != workers:
+                same = False
+            if max_queue is not None and max_queue >= 0 and cfg["max_queue"] != max_queue:
+                same = False
+            if same:
+                return current
+            shutdown_ocr_executor(current)
+        _SHARED["executor"] = new_ocr_executor(workers, max_queue, timeout)
+        return _SHARED["executor"]
+
+
+def apply_ocr_config(cfg: Dict[str, object]) -> Dict[str, object]:
+    # cfg: the pipeline's ocr_config dict (workers, max_queue, timeout)
+    return configure_ocr_executor(cfg.get("workers"), cfg.get("max_queue"), cfg.get("timeout", DEFAULT_OCR_TIMEOUT))
+
+
+def _release_slot(executor: Dict[str, object]) -> Callable[[Future], None]:
+    def done(_fut: Future) -> None:
+        executor["slots"].release()
+    return done
+
+
+def ocr_input(ocr_fn: Callable[[bytes], str], image: BytesLike) -> BytesLike:
+    """Return image in the form ocr_fn takes.
+
+    Images may arrive as memoryviews over mapped files (io.mapped_file).
+    Hooks that set ``accepts_memoryview = True`` get the view as-is; all
+    others get bytes, which costs one copy.
+    """
+    if isinstance(image, bytes) or getattr(ocr_fn, "accepts_memoryview", False):
+        return image
+    return bytes(image)
+
+
+def submit_ocr(ocr_fn: Callable[[bytes], str], image: BytesLike, executor: Optional[Dict[str, object]] = None) -> Future:
+    """Queue one OCR call; blocks while the executor's queue is full."""
+    ex = executor if executor is not None else get_ocr_executor()
+    ex["slots"].acquire()
+    try:
+        fut = ex["pool"].submit(ocr_fn, ocr_input(ocr_fn, image))
+    except Exception:
+        ex["slots"].release()
+        raise
+    fut.add_done_callback(_release_slot(ex))
+    return fut
+
+
+# Errors that mean the OCR engine is not set up (missing binary, package or
+# language data) rather than that one image could not be read
+OCR_SETUP_ERRORS = (ImportError, OSError)
+
+
+class OCRSetupError(RuntimeError):
+    """The OCR engine cannot run at all; fails the document."""
+
+
+def ocr_result(fut: Future, executor: Optional[Dict[str, object]] = None, failures: Optional[List[str]] = None) -> str:
+    """Wait for an OCR call.
+
+    A timeout or an error from the engine is logged and yields empty text;
+    its reason is appended to failures when a list is given. OCR_SETUP_ERRORS
+    raise OCRSetupError instead, so a broken install is not mistaken for
+    blank pages.
+    """
+    ex = executor if executor is not None else get_ocr_executor()
+    try:
+        return fut.result(timeout=ex["timeout"]) or ""
+    except FutureTimeout:
+        # The worker thread cannot be interrupted; it keeps its slot until
+        # the OCR call returns, but the pipeline moves on.
+        fut.cancel()
+        _LOG.warning("ocr timed out after %s seconds", ex["timeout"])
+        reason = "timeout"
+    except OCR_SETUP_ERRORS as e:
+        raise OCRSetupError(f"ocr engine unavailable: {e}") from e
+    except Exception as e:
+        _LOG.warning("ocr failed: %s: %s", type(e).__name__, e)
+        reason = str(e) or type(e).__name__
+    if failures is not None:
+        failures.append(reason)
+    return ""
+
+
+def run_ocr(ocr_fn: Callable[[bytes], str], image: BytesLike, executor: Optional[Dict[str, object]] = None, failures: Optional[List[str]] = None) -> str:
+    return ocr_result(submit_ocr(ocr_fn, image, executor), executor, failures)
+
+
+def run_ocr_batch(ocr_fn: Callable[[bytes], str], images: List[bytes], executor: Optional[Dict[str, object]] = None) -> List[str]:
+    """OCR several images concurrently; results keep the input order."""
+    ex = executor if executor is not None else get_ocr_executor()
+    futures: List[Future] = []
+    i = 0
+    while i < len(images):
+        futures.append(submit_ocr(ocr_fn, images[i], ex))
+        i = i + 1
+    texts: List[str] = []
+    i = 0
+    while i < len(futures):
+        texts.append(ocr_result(futures[i], ex))
+        i = i + 1
+    return texts
+
+
+# OCR result cache
+#
+# Identical scans (letterheads, repeated appendices) recur across inputs.
+# cached_ocr_fn wraps an ocr_fn so each distinct image is OCR'd once: the
+# result is stored in the cache's "ocr" namespace under the sha256 of the
+# image bytes plus the engine name and settings. The wrapper is a
+# functools.partial, so it pickles whenever ocr_fn does and can be handed to
+# process-pool workers. Failed calls raise as before and are not cached.
+
+def _engine_name(ocr_fn: Callable) -> str:
+    module = getattr(ocr_fn, "__module__", None) or ""
+    name = getattr(ocr_fn, "__qualname__", None) or getattr(ocr_fn, "__name__", None) or type(ocr_fn).__name__
+    return module + "." + name
+
+
+def ocr_cache_key(image: BytesLike, engine: str, settings: Optional[Dict[str, object]] = None) -> str:
+    digest = "sha256:" + hashlib.sha256(image).hexdigest()
+    return cache_mod.make_key(digest, engine, settings)
+
+
+def _ocr_with_cache(ocr_fn: Callable[[bytes], str], cache: Dict[str, object], engine: str, settings: Optional[Dict[str, object]], image: BytesLike) -> str:
+    # Hashing takes the buffer directly; only a miss may need a bytes copy
+    key = ocr_cache_key(image, engine, settings)
+    hit = cache_mod.cache_get_text(cache, cache_mod.OCR_NAMESPACE, key)
+    if hit is not None:
+        return hit
+    text = ocr_fn(ocr_input(ocr_fn, image)) or ""
+    meta: Dict[str, object] = {}
+    meta["engine"] = engine
+    meta["image_bytes"] = len(image)
+    try:
+        cache_mod.cache_put_text(cache, cache_mod.OCR_NAMESPACE, key, text, meta)
+    except OSError as e:
+        _LOG.info("ocr cache store failed: %s", e)
+    return text
+
+
+def cached_ocr_fn(ocr_fn: Callable[[bytes], str], cache: Dict[str, object], settings: Optional[Dict[str, object]] = None, engine: Optional[str] = None) -> Callable[[bytes], str]:
+    """Wrap ocr_fn with a persistent, content-addressed result cache.
+
+    settings should hold every engine option that changes the output
+    (language, page segmentation mode, DPI, ...). engine defaults to the
+    callable's qualified name.
+    """
+    name = engine if engine is not None else _engine_name(ocr_fn)
+    wrapped = functools.partial(_ocr_with_cache, ocr_fn, cache, name, settings)
+    # Lets callers (e.g. the pipeline's options fingerprint) see the engine
+    wrapped.__wrapped__ = ocr_fn
+    wrapped.accepts_memoryview = True
+    return wrapped
+
+
+def is_cached_ocr_fn(fn: Optional[Callable]) -> bool:
+    return isinstance(fn, functools.partial) and fn.func is _ocr_with_cache
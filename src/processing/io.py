@@ -1,4 +1,15 @@
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator, List, Optional, Set
+import hashlib
+import logging
+import mmap
+
+_LOG = logging.getLogger(__name__)
+
+# Parsers with a stream option write files larger than this straight to disk
+# when stream=None (auto)
+STREAM_THRESHOLD_BYTES = 64 * 1024 * 1024
 
 
 def ensure_output_dir(base_dir: Path) -> Path:
@@ -10,3 +21,115 @@ def ensure_output_dir(base_dir: Path) -> Path:
 def write_text_file(path: Path, text: str) -> None:
     with open(path, "w", encoding="utf-8") as f:
         f.write(text)
+
+
+def should_stream(path: Path, stream: Optional[bool]) -> bool:
+    if stream is not None:
+        return stream
+    try:
+        return Path(path).stat().st_size > STREAM_THRESHOLD_BYTES
+    except OSError:
+        return False
+
+
+@contextmanager
+def mapped_file(path: Path) -> Iterator[memoryview]:
+    """Yield a read-only memoryview of the file's bytes, backed by mmap.
+
+    Nothing is copied into Python memory: pages are read on demand and
+    shared with the OS page cache. Empty files yield an empty view (mmap
+    cannot map zero bytes). Do not keep the view, or slices of it, past the
+    with block.
+    """
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Zero-length file
+            yield memoryview(b"")
+            return
+        view = memoryview(mm)
+        try:
+            yield view
+        finally:
+            try:
+                view.release()
+                mm.close()
+            except BufferError:
+                # A slice is still referenced (e.g. by an OCR call that timed
+                # out); the mapping is freed once that reference goes away.
+                _LOG.info("mapped file still referenced at close: %s", path)
+
+
+def file_checksum(path: Path) -> str:
+    # Content hash used by incremental processing and the caches, formatted
+    # "sha256:<hex>". Hashing the mapped file avoids read buffers; hashlib
+    # releases the GIL while it digests.
+    h = hashlib.sha256()
+    with mapped_file(path) as view:
+        h.update(view)
+    return "sha256:" + h.hexdigest()
+
+
+def output_name_for(fmt: str, src_name: str) -> str:
+    # File name the parser for fmt writes under processed_documents/text
+    if fmt == "txt":
+        return src_name
+    if fmt == "md" and src_name.lower().endswith(".md"):
+        return src_name[: -len(".md")] + ".txt"
+    if fmt == "md":
+        return src_name + ".txt"
+    return Path(src_name).stem + ".txt"
+
+
+def _suffixed_name(name: str, rel_path: str, taken: Set[str]) -> str:
+    # "<stem>-<hash of rel_path>.<ext>", lengthening the hash on the (rare)
+    # chance that name is taken too
+    dot = name.rfind(".")
+    stem = name[:dot] if dot > 0 else name
+    ext = name[dot:] if dot > 0 else ""
+    digest = hashlib.sha1(rel_path.encode("utf-8")).hexdigest()
+    size = 8
+    while size <= len(digest):
+        candidate = stem + "-" + digest[:size] + ext
+        if candidate.lower() not in taken:
+            return candidate
+        size = size + 4
+    n = 2
+    while True:
+        candidate = stem + "-" + digest + "-" + str(n) + ext
+        if candidate.lower() not in taken:
+            return candidate
+        n = n + 1
+
+
+def reserve_output_names(sources: List[Path], root: Path, fmts: List[Optional[str]]) -> List[Optional[str]]:
+    """Collision-free output names for sources (None where fmts[i] is None).
+
+    The first source, in list order, to want a name keeps output_name_for's
+    name; later ones get a "-<hash>" suffix derived from their path relative
+    to root. Names are compared case-insensitively so outputs do not clash
+    on case-insensitive filesystems either. The result depends only on the
+    source list, so parallel workers each own their output file.
+    """
+    taken: Set[str] = set()
+    names: List[Optional[str]] = []
+    i = 0
+    while i < len(sources):
+        fmt = fmts[i]
+        if fmt is None:
+            names.append(None)
+            i = i + 1
+            continue
+        src = Path(sources[i])
+        name = output_name_for(fmt, src.name)
+        if name.lower() in taken:
+            try:
+                rel = src.relative_to(root).as_posix()
+            except ValueError:
+                rel = src.as_posix()
+            name = _suffixed_name(name, rel, taken)
+        taken.add(name.lower())
+        names.append(name)
+        i = i + 1
+    return names
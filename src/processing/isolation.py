@@ -0,0 +1,280 @@
+# Isolated parser calls: each parse runs in a worker subprocess with a
+# wall-clock timeout and an address-space cap, after a decompressed-size
+# check for zip containers. Functional style: limits and workers are plain
+# dicts.
+#
+# A parser that hangs, recurses without end, exhausts memory or crashes
+# the interpreter then fails only its own file; the caller records the
+# IsolationError and moves on.
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import atexit
+import os
+import signal
+import threading
+import time
+import zipfile
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+from . import images
+from .pools import pool_context
+
+
+DEFAULT_TIMEOUT = 300.0
+DEFAULT_MEMORY_BYTES = 4 * 1024 * 1024 * 1024
+DEFAULT_MAX_UNZIPPED_BYTES = 1024 * 1024 * 1024
+
+_ZIP_MAGIC = b"PK\x03\x04"
+
+# IsolationError.reason values
+REASONS = ["timeout", "memory", "zip_size", "crashed"]
+
+
+class IsolationError(RuntimeError):
+    """A parse stopped by a limit; reason is one of REASONS."""
+
+    def __init__(self, reason: str, message: str):
+        RuntimeError.__init__(self, message)
+        self.reason = reason
+
+
+def new_limits(timeout: Optional[float] = DEFAULT_TIMEOUT, memory_bytes: Optional[int] = DEFAULT_MEMORY_BYTES, max_unzipped_bytes: Optional[int] = DEFAULT_MAX_UNZIPPED_BYTES) -> Dict[str, object]:
+    # None (or <= 0) disables a limit
+    limits: Dict[str, object] = {}
+    limits["timeout"] = timeout if timeout is not None and timeout > 0 else None
+    limits["memory_bytes"] = memory_bytes if memory_bytes is not None and memory_bytes > 0 else None
+    limits["max_unzipped_bytes"] = max_unzipped_bytes if max_unzipped_bytes is not None and max_unzipped_bytes > 0 else None
+    return limits
+
+
+def check_zip(path: Path, max_bytes: Optional[int]) -> None:
+    """Raise IsolationError if a zip container would expand past max_bytes.
+
+    Sizes come from the central directory. zipfile never returns more than
+    a member's recorded size, so a member that lies about its size cannot
+    expand further when the parser reads it. Non-zip files pass.
+    """
+    if max_bytes is None:
+        return
+    p = Path(path)
+    try:
+        with open(p, "rb") as f:
+            if f.read(len(_ZIP_MAGIC)) != _ZIP_MAGIC:
+                return
+        with zipfile.ZipFile(p, "r") as z:
+            infos = z.infolist()
+    except (zipfile.BadZipFile, OSError):
+        # Let the parser report the broken container
+        return
+    total = 0
+    for info in infos:
+        total = total + info.file_size
+        if total > max_bytes:
+            raise IsolationError("zip_size", f"zip container expands past {max_bytes} bytes ({len(infos)} members)")
+
+
+def preload(modules: List[str]) -> None:
+    """Import modules once in the forkserver, so isolated parses fork with
+    their parser already loaded. Has no effect once the forkserver runs."""
+    ctx = pool_context()
+    if ctx.get_start_method() == "forkserver" and len(modules) > 0:
+        ctx.set_forkserver_preload(modules)
+
+
+def _compact(out: Dict[str, object]) -> Dict[str, object]:
+    # The text is already in out_path; send its length instead
+    small: Dict[str, object] = {}
+    for key in out:
+        if key != "text":
+            small[key] = out[key]
+    text = out.get("text")
+    if isinstance(text, str) and "chars" not in small:
+        small["chars"] = len(text)
+    return small
+
+
+def _cpu_time() -> float:
+    # CPU seconds of this worker: all its threads (OCR included) plus child
+    # processes it has reaped, such as a finished page_workers pool
+    if resource is None:
+        return time.process_time()
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def _run_job(job) -> Tuple[str, object]:
+    fn, src, base, kwargs, ocr_config = job
+    try:
+        if ocr_config is not None:
+            images.apply_ocr_config(ocr_config)
+        cpu = _cpu_time()
+        out = fn(Path(src), Path(base), **kwargs)
+        small = _compact(out)
+        small["cpu_s"] = round(_cpu_time() - cpu, 6)
+        return ("ok", small)
+    except MemoryError:
+        return ("memory", None)
+    except BaseException as e:
+        return ("error", str(e) or type(e).__name__)
+
+
+def _worker_main(conn, memory_bytes: Optional[int]) -> None:
+    # Own process group, so a timeout also kills the parser's own workers
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    if memory_bytes is not None and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        except MemoryError:
+            conn.send(("memory", None))
+            return
+        except Exception as e:
+            # The parser could not be unpickled (e.g. import failure)
+            conn.send(("error", str(e) or type(e).__name__))
+            continue
+        if job is None:
+            return
+        msg = _run_job(job)
+        try:
+            conn.send(msg)
+        except MemoryError:
+            conn.send(("memory", None))
+        if msg[0] == "memory":
+            # The heap may be in no state to run another parse
+            return
+
+
+# Parse workers
+#
+# Each thread that calls run_parser owns one long-lived worker process, so
+# a parse costs a pipe round trip instead of a process start. A worker is
+# replaced only after it is killed (timeout), dies, or runs out of memory.
+
+_WORKERS: Dict[str, object] = {"local": threading.local(), "all": [], "lock": threading.Lock(), "atexit": False}
+
+
+def _start_worker(memory_bytes: Optional[int]) -> Dict[str, object]:
+    ctx = pool_context()
+    conn, child_conn = ctx.Pipe(duplex=True)
+    proc = ctx.Process(target=_worker_main, args=(child_conn, memory_bytes))
+    proc.start()
+    child_conn.close()
+    worker: Dict[str, object] = {"proc": proc, "conn": conn, "memory_bytes": memory_bytes, "busy": False}
+    with _WORKERS["lock"]:
+        _WORKERS["all"].append(worker)
+        if not _WORKERS["atexit"]:
+            # Workers are not daemonic (parsers may start their own pools),
+            # so stop them before multiprocessing joins its children
+            atexit.register(shutdown_workers)
+            _WORKERS["atexit"] = True
+    return worker
+
+
+def _kill(proc) -> None:
+    if proc.pid is None:
+        return
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except OSError:
+            # Gone, or killed before it made its own group
+            pass
+    proc.kill()
+
+
+def _discard(worker: Dict[str, object], kill: bool) -> None:
+    if getattr(_WORKERS["local"], "worker", None) is worker:
+        _WORKERS["local"].worker = None
+    with _WORKERS["lock"]:
+        if worker in _WORKERS["all"]:
+            _WORKERS["all"].remove(worker)
+    proc = worker["proc"]
+    if kill and proc.is_alive():
+        _kill(proc)
+    worker["conn"].close()
+    proc.join(5.0)
+    if proc.is_alive():
+        _kill(proc)
+        proc.join()
+
+
+def _thread_worker(memory_bytes: Optional[int]) -> Dict[str, object]:
+    worker = getattr(_WORKERS["local"], "worker", None)
+    if worker is not None and (worker["memory_bytes"] != memory_bytes or not worker["proc"].is_alive()):
+        _discard(worker, True)
+        worker = None
+    if worker is None:
+        worker = _start_worker(memory_bytes)
+        _WORKERS["local"].worker = worker
+    return worker
+
+
+def shutdown_workers() -> None:
+    """Stop every idle parse worker; the next run_parser starts new ones."""
+    workers: List[Dict[str, object]] = []
+    with _WORKERS["lock"]:
+        for worker in _WORKERS["all"]:
+            if not worker["busy"]:
+                workers.append(worker)
+    for worker in workers:
+        try:
+            worker["conn"].send(None)
+        except OSError:
+            pass
+        _discard(worker, False)
+
+
+def _exit_reason(exitcode: Optional[int]) -> str:
+    if exitcode is not None and exitcode < 0:
+        try:
+            return "killed by " + signal.Signals(-exitcode).name
+        except ValueError:
+            return f"killed by signal {-exitcode}"
+    return f"exit code {exitcode}"
+
+
+def run_parser(fn: Callable, src_path: Path, base_dir: Path, kwargs: Dict[str, object], limits: Dict[str, object], ocr_config: Optional[Dict[str, object]] = None) -> Dict[str, object]:
+    """Call fn(src_path, base_dir, **kwargs) in a worker process under limits.
+
+    Returns the parser's result with "text" replaced by its length
+    ("chars") and the worker's CPU seconds for the call in "cpu_s".
+    ocr_config (workers, max_queue, timeout) configures the worker's OCR
+    executor first. fn, kwargs and the result must be picklable. Raises
+    IsolationError when a limit stops the parse or the worker dies, and
+    RuntimeError with the parser's message when it raises.
+    """
+    check_zip(src_path, limits.get("max_unzipped_bytes"))
+    memory_bytes = limits.get("memory_bytes")
+    worker = _thread_worker(memory_bytes)
+    conn = worker["conn"]
+    timeout = limits.get("timeout")
+    worker["busy"] = True
+    try:
+        conn.send((fn, str(src_path), str(base_dir), kwargs, ocr_config))
+        # poll() also returns when the worker exits without answering
+        if not conn.poll(timeout):
+            _discard(worker, True)
+            raise IsolationError("timeout", f"parse timed out after {timeout}s")
+        status, payload = conn.recv()
+    except (EOFError, OSError):
+        proc = worker["proc"]
+        proc.join(5.0)
+        _discard(worker, True)
+        raise IsolationError("crashed", "parser process died: " + _exit_reason(proc.exitcode))
+    finally:
+        worker["busy"] = False
+    if status == "memory":
+        _discard(worker, False)
+        raise IsolationError("memory", f"parse exceeded the {memory_bytes} byte memory limit")
+    if status == "error":
+        raise RuntimeError(payload)
+    return payload
@@ -1,7 +1,19 @@
 # Mapping writer for processed_documents/mapping.json
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional
 import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+# Mapping backends: "json" rewrites mapping.json in batches, "jsonl" appends
+# each entry to processed_documents/mapping.jsonl and compacts at the end.
+BACKENDS = ["json", "jsonl"]
 
 
 def mapping_path(base_dir: Path) -> Path:
@@ -33,6 +45,19 @@ def write_mapping(base_dir: Path, doc: Dict[str, object]) -> None:
     tmp.replace(mp)
 
 
+def find_item(doc: Dict[str, object], source: str) -> Optional[Dict[str, object]]:
+    items = doc.get("items")
+    if not isinstance(items, list):
+        return None
+    i = 0
+    while i < len(items):
+        it = items[i]
+        if isinstance(it, dict) and it.get("source") == source:
+            return it
+        i = i + 1
+    return None
+
+
 def upsert_item(base_dir: Path, entry: Dict[str, object]) -> None:
     doc = read_mapping(base_dir)
     items = doc.get("items")
@@ -56,6 +81,271 @@ def upsert_item(base_dir: Path, entry: Dict[str, object]) -> None:
     write_mapping(base_dir, doc)
 
 
+def journal_path(base_dir: Path) -> Path:
+    d = Path(base_dir) / "processed_documents"
+    d.mkdir(parents=True, exist_ok=True)
+    return d / "mapping.jsonl"
+
+
+def _compacting_path(base_dir: Path) -> Path:
+    return journal_path(base_dir).with_suffix(".jsonl.compacting")
+
+
+def _lock_path(base_dir: Path) -> Path:
+    return journal_path(base_dir).with_suffix(".jsonl.lock")
+
+
+def _open_journal_locked(base_dir: Path) -> int:
+    # Append descriptor on the current mapping.jsonl, holding a shared lock.
+    # Compaction renames the journal under an exclusive lock, so a writer
+    # that opened the old file before the rename sees it moved once it gets
+    # the lock and reopens the new one.
+    jp = str(journal_path(base_dir))
+    while True:
+        fd = os.open(jp, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if fcntl is None:
+            return fd
+        fcntl.flock(fd, fcntl.LOCK_SH)
+        try:
+            current = os.stat(jp)
+        except FileNotFoundError:
+            current = None
+        if current is not None and os.path.samestat(os.fstat(fd), current):
+            return fd
+        os.close(fd)
+
+
+def append_journal(base_dir: Path, entry: Dict[str, object]) -> None:
+    """Append one entry to mapping.jsonl with a single O_APPEND write.
+
+    Writers share a lock, so records from concurrent writers (threads or
+    processes) go out as whole lines without waiting on each other; only
+    compact_journal excludes them, while it moves the journal aside.
+    """
+    line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+    data = line.encode("utf-8")
+    fd = _open_journal_locked(base_dir)
+    try:
+        os.write(fd, data)
+    finally:
+        # Closing the descriptor releases the lock
+        os.close(fd)
+
+
+def _read_journal_file(path: Path) -> List[Dict[str, object]]:
+    entries: List[Dict[str, object]] = []
+    if not path.exists():
+        return entries
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if len(line.strip()) == 0:
+                continue
+            try:
+                obj = json.loads(line)
+            except Exception:
+                # Torn record from a crash mid-append; skip it
+                continue
+            if isinstance(obj, dict):
+                entries.append(obj)
+    return entries
+
+
+def replay_journal(base_dir: Path) -> List[Dict[str, object]]:
+    """Return journal entries in append order, including an interrupted compaction."""
+    entries = _read_journal_file(_compacting_path(base_dir))
+    more = _read_journal_file(journal_path(base_dir))
+    i = 0
+    while i < len(more):
+        entries.append(more[i])
+        i = i + 1
+    return entries
+
+
+def _merge_entries(doc: Dict[str, object], entries: List[Dict[str, object]]) -> None:
+    items = doc.get("items")
+    if not isinstance(items, list):
+        items = []
+    index: Dict[str, int] = {}
+    i = 0
+    while i < len(items):
+        it = items[i]
+        if isinstance(it, dict) and it.get("source") not in index:
+            index[it.get("source")] = i
+        i = i + 1
+    j = 0
+    while j < len(entries):
+        entry = entries[j]
+        src = entry.get("source")
+        if src in index:
+            items[index[src]] = entry
+        else:
+            index[src] = len(items)
+            items.append(entry)
+        j = j + 1
+    doc["items"] = items
+
+
+def _set_aside_journal(jp: Path, cp: Path) -> None:
+    # Rename the journal while no append is in progress; appends waiting on
+    # the lock then find it moved and go to a fresh journal
+    if fcntl is None:
+        jp.replace(cp)
+        return
+    try:
+        fd = os.open(str(jp), os.O_RDONLY)
+    except FileNotFoundError:
+        return
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        if jp.exists() and os.path.samestat(os.fstat(fd), os.stat(jp)):
+            jp.replace(cp)
+    finally:
+        os.close(fd)
+
+
+def compact_journal(base_dir: Path) -> int:
+    """Fold mapping.jsonl into mapping.json and clear the journal.
+
+    The journal is first renamed aside so appends that start during
+    compaction land in a fresh journal; the rename waits for appends in
+    flight, so none is lost in the renamed file. If the process dies before
+    the mapping is written, the renamed file is replayed again on the next
+    compaction. Compactions of one base_dir run one at a time, also across
+    processes. Returns the number of journal records applied.
+
+    Without fcntl (Windows) there is no locking: only compact while no
+    other process appends.
+    """
+    jp = journal_path(base_dir)
+    cp = _compacting_path(base_dir)
+    applied = 0
+    lock_fd = None
+    if fcntl is not None:
+        lock_fd = os.open(str(_lock_path(base_dir)), os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(lock_fd, fcntl.LOCK_EX)
+    try:
+        # At most two passes: a leftover from an interrupted compaction,
+        # then the live journal.
+        while cp.exists() or jp.exists():
+            if not cp.exists():
+                _set_aside_journal(jp, cp)
+                if not cp.exists():
+                    break
+            entries = _read_journal_file(cp)
+            if len(entries) > 0:
+                doc = read_mapping(base_dir)
+                _merge_entries(doc, entries)
+                write_mapping(base_dir, doc)
+            cp.unlink()
+            applied = applied + len(entries)
+    finally:
+        if lock_fd is not None:
+            os.close(lock_fd)
+    return applied
+
+
+def recover_mapping(base_dir: Path) -> int:
+    """Replay any journal left behind by an interrupted run into mapping.json."""
+    if journal_path(base_dir).exists() or _compacting_path(base_dir).exists():
+        return compact_journal(base_dir)
+    return 0
+
+
+def _now_default() -> float:
+    return time.monotonic()
+
+
+def new_store(base_dir: Path, batch_size: int = 200, flush_interval: float = 5.0, now_fn: Optional[Callable[[], float]] = None, backend: str = "json") -> Dict[str, object]:
+    """Open an in-memory mapping store for base_dir.
+
+    Any journal left by an interrupted run is replayed first, then the
+    current mapping.json is read once and indexed by source. With the "json"
+    backend upserts are applied in memory and written back with write_mapping
+    (atomic replace) once batch_size upserts are pending or flush_interval
+    seconds have passed since the last write. With the "jsonl" backend every
+    upsert is appended to mapping.jsonl instead and store_flush compacts the
+    journal into mapping.json. Call store_flush at the end of a run.
+
+    All store operations are guarded by a lock so several worker threads may
+    feed the same store. Use one store per base_dir at a time.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown mapping backend: {backend}")
+    recover_mapping(base_dir)
+    doc = read_mapping(base_dir)
+    items = doc.get("items")
+    if not isinstance(items, list):
+        items = []
+    doc["items"] = items
+    index: Dict[str, int] = {}
+    i = 0
+    while i < len(items):
+        it = items[i]
+        if isinstance(it, dict) and it.get("source") not in index:
+            index[it.get("source")] = i
+        i = i + 1
+
+    store: Dict[str, object] = {}
+    store["base_dir"] = Path(base_dir)
+    store["backend"] = backend
+    store["doc"] = doc
+    store["index"] = index
+    store["pending"] = 0
+    store["batch_size"] = int(batch_size) if batch_size and batch_size > 0 else 1
+    store["flush_interval"] = float(flush_interval)
+    if now_fn is None:
+        store["now_fn"] = _now_default
+    else:
+        store["now_fn"] = now_fn
+    store["last_flush"] = store["now_fn"]()
+    store["lock"] = threading.RLock()
+    return store
+
+
+def _store_flush_locked(store: Dict[str, object]) -> None:
+    if store["pending"] > 0:
+        if store["backend"] == "jsonl":
+            compact_journal(store["base_dir"])
+        else:
+            write_mapping(store["base_dir"], store["doc"])
+        store["pending"] = 0
+    store["last_flush"] = store["now_fn"]()
+
+
+def store_upsert(store: Dict[str, object], entry: Dict[str, object]) -> None:
+    with store["lock"]:
+        items = store["doc"]["items"]
+        index = store["index"]
+        src = entry.get("source")
+        if src in index:
+            items[index[src]] = entry
+        else:
+            index[src] = len(items)
+            items.append(entry)
+        store["pending"] = store["pending"] + 1
+        if store["backend"] == "jsonl":
+            append_journal(store["base_dir"], entry)
+            return
+        due = store["pending"] >= store["batch_size"]
+        if not due and store["now_fn"]() - store["last_flush"] >= store["flush_interval"]:
+            due = True
+        if due:
+            _store_flush_locked(store)
+
+
+def store_get(store: Dict[str, object], source: str) -> Optional[Dict[str, object]]:
+    with store["lock"]:
+        index = store["index"]
+        if source not in index:
+            return None
+        return store["doc"]["items"][index[source]]
+
+
+def store_flush(store: Dict[str, object]) -> None:
+    with store["lock"]:
+        _store_flush_locked(store)
+
+
 def capture_paths(original_path: Path, processed_path: Path) -> Dict[str, str]:
     # Compatibility helper used by some parsers' tests
     return {
@@ -0,0 +1,158 @@
+# Per-document processing metrics and the run report built from them.
+# Functional style: metrics are plain dicts stored in each mapping entry
+# under "metrics", no OOP, no regex.
+#
+# Keys of a metrics dict (counts only when the parser reports them):
+#   wall_s        seconds from stat to parser return, in the worker
+#   cpu_s         CPU seconds of the thread that ran the parser; work the
+#                 parser hands to its own pools (page_workers, OCR) is not
+#                 included. Isolated parses report the worker process's CPU
+#                 time instead (see isolation.run_parser).
+#   input_bytes   source file size
+#   output_chars  characters of extracted text
+#   pages, slides, rows, sheets, ocr_pages
+#   cache_hit     True when the text came from the parse cache
+# Files skipped by an incremental run keep the metrics of the run that
+# parsed them.
+from typing import Dict, List, Optional
+import time
+
+
+def start() -> Dict[str, float]:
+    # Clock readings taken before a document is processed
+    clock: Dict[str, float] = {}
+    clock["wall"] = time.perf_counter()
+    clock["cpu"] = time.thread_time()
+    return clock
+
+
+def elapsed(clock: Dict[str, float], input_bytes: Optional[int]) -> Dict[str, object]:
+    metrics: Dict[str, object] = {}
+    metrics["wall_s"] = round(time.perf_counter() - clock["wall"], 6)
+    metrics["cpu_s"] = round(time.thread_time() - clock["cpu"], 6)
+    if input_bytes is not None:
+        metrics["input_bytes"] = input_bytes
+    return metrics
+
+
+def add_parser_counts(metrics: Dict[str, object], out: Dict[str, object]) -> None:
+    # Counts from a parser (or cached parser) result
+    text = out.get("text")
+    if isinstance(text, str):
+        metrics["output_chars"] = len(text)
+    elif isinstance(out.get("chars"), int):
+        metrics["output_chars"] = out.get("chars")
+    for key in ["pages", "slides", "rows"]:
+        if isinstance(out.get(key), int):
+            metrics[key] = out.get(key)
+    sheets = out.get("sheets")
+    if isinstance(sheets, list):
+        metrics["sheets"] = len(sheets)
+        rows = 0
+        for sheet in sheets:
+            if isinstance(sheet, dict) and isinstance(sheet.get("rows"), int):
+                rows = rows + sheet.get("rows")
+        metrics["rows"] = rows
+    ocr_pages = out.get("ocr_pages")
+    if isinstance(ocr_pages, list):
+        metrics["ocr_pages"] = len(ocr_pages)
+    elif out.get("ocr_used") is True:
+        # An image is one OCR'd page
+        metrics["ocr_pages"] = 1
+    if isinstance(out.get("ocr_failures"), int):
+        metrics["ocr_failures"] = out.get("ocr_failures")
+    if isinstance(out.get("cpu_s"), float):
+        # Measured in an isolation worker; the calling thread only waited
+        metrics["cpu_s"] = out.get("cpu_s")
+    if out.get("cache_hit") is True:
+        metrics["cache_hit"] = True
+
+
+def event(entry: Dict[str, object]) -> Dict[str, object]:
+    """Flat log record for one mapping entry: source, format, error, metrics."""
+    fields: Dict[str, object] = {}
+    fields["event"] = "document_processed"
+    fields["source"] = entry.get("source")
+    fields["format"] = entry.get("format")
+    fields["error"] = entry.get("error")
+    m = entry.get("metrics") or {}
+    for key in m:
+        fields[key] = m[key]
+    return fields
+
+
+# Summed per format in the report
+_TOTAL_KEYS = ["wall_s", "cpu_s", "input_bytes", "output_chars", "pages", "slides", "rows", "sheets", "ocr_pages"]
+
+
+def _new_totals() -> Dict[str, object]:
+    totals: Dict[str, object] = {"files": 0, "errors": 0, "skipped": 0, "cache_hits": 0}
+    for key in _TOTAL_KEYS:
+        totals[key] = 0
+    return totals
+
+
+def build_report(items: List[Dict[str, object]], top: int = 10, skipped_sources: Optional[List[str]] = None) -> Dict[str, object]:
+    """Summarize mapping entries: the slowest files and per-format totals.
+
+    Entries whose source is in skipped_sources (an incremental run's
+    summary) are only counted; their metrics belong to an earlier run.
+    Formats are keyed "" for unsupported files.
+    """
+    skipped = set(skipped_sources or [])
+    by_format: Dict[str, Dict[str, object]] = {}
+    timed: List[Dict[str, object]] = []
+    i = 0
+    while i < len(items):
+        entry = items[i]
+        fmt = str(entry.get("format") or "")
+        if fmt not in by_format:
+            by_format[fmt] = _new_totals()
+        totals = by_format[fmt]
+        totals["files"] = totals["files"] + 1
+        if entry.get("error") is not None:
+            totals["errors"] = totals["errors"] + 1
+        m = entry.get("metrics") or {}
+        i = i + 1
+        if entry.get("source") in skipped:
+            totals["skipped"] = totals["skipped"] + 1
+            continue
+        if m.get("cache_hit") is True:
+            totals["cache_hits"] = totals["cache_hits"] + 1
+        for key in _TOTAL_KEYS:
+            value = m.get(key)
+            if isinstance(value, (int, float)):
+                totals[key] = totals[key] + value
+        if isinstance(m.get("wall_s"), (int, float)):
+            row: Dict[str, object] = {}
+            row["source"] = entry.get("source")
+            row["format"] = fmt
+            row["wall_s"] = m.get("wall_s")
+            row["cpu_s"] = m.get("cpu_s")
+            row["input_bytes"] = m.get("input_bytes")
+            if entry.get("error") is not None:
+                row["error"] = entry.get("error")
+            timed.append(row)
+
+    for fmt in by_format:
+        totals = by_format[fmt]
+        totals["wall_s"] = round(totals["wall_s"], 6)
+        totals["cpu_s"] = round(totals["cpu_s"], 6)
+        if totals["wall_s"] > 0:
+            totals["mb_per_s"] = round(totals["input_bytes"] / (1024 * 1024) / totals["wall_s"], 3)
+        else:
+            totals["mb_per_s"] = None
+
+    # Slowest first; ties keep walk order
+    timed.sort(key=lambda row: -row["wall_s"])
+    slowest: List[Dict[str, object]] = []
+    k = 0
+    while k < len(timed) and k < top:
+        slowest.append(timed[k])
+        k = k + 1
+
+    report: Dict[str, object] = {}
+    report["files"] = len(items)
+    report["slowest"] = slowest
+    report["formats"] = by_format
+    return report
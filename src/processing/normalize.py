@@ -1,16 +1,59 @@
 # Normalization helpers (functional style)
 # No regex, no OOP, no list comprehensions
 
-from typing import AnyStr, List, Optional
+from typing import Dict, List, Optional, Union
+import codecs
+
+
+def _build_control_table() -> Dict[int, Optional[int]]:
+    table: Dict[int, Optional[int]] = {}
+    code = 0
+    while code < 32:
+        if code != 10 and code != 9:
+            table[code] = None
+        code = code + 1
+    return table
+
+
+# Translate tables, built once. Each step is a single pass in C instead of a
+# Python loop over characters.
+# - _CONTROL_TABLE drops ASCII control characters except newline and tab
+# - _CR_CONTROL_TABLE additionally turns a lone CR into LF, so newline
+#   normalization and control-character removal share one pass
+# str.translate is only fast for pure-ASCII strings; other text goes
+# through UTF-8 bytes, where these characters are always single bytes below
+# 0x80 and bytes.translate deletes or maps them in bulk.
+_CONTROL_TABLE = _build_control_table()
+_CR_CONTROL_TABLE: Dict[int, Optional[int]] = dict(_CONTROL_TABLE)
+_CR_CONTROL_TABLE[13] = 10
+_CONTROL_BYTES = bytes(_CONTROL_TABLE.keys())
+_CR_TO_LF_BYTES = bytes.maketrans(b"\r", b"\n")
+_NO_CR_BYTES = _CONTROL_BYTES.replace(b"\r", b"")
+
+_BOM = b"\xef\xbb\xbf"
+
+
+def _drop_controls(text: str, cr_to_lf: bool) -> str:
+    # Remove control characters (except \n and \t); with cr_to_lf a CR
+    # becomes LF instead of being removed.
+    if text.isascii():
+        return text.translate(_CR_CONTROL_TABLE if cr_to_lf else _CONTROL_TABLE)
+    # surrogatepass keeps lone surrogates (seen in PDF text) intact
+    data = text.encode("utf-8", "surrogatepass")
+    if cr_to_lf:
+        data = data.translate(_CR_TO_LF_BYTES, _NO_CR_BYTES)
+    else:
+        data = data.translate(None, _CONTROL_BYTES)
+    return data.decode("utf-8", "surrogatepass")
 
 
 def utf8_decode_remove_bom(data: bytes) -> str:
-    # Remove UTF-8 BOM if present
-    if len(data) >= 3:
-        if data[0] == 0xEF and data[1] == 0xBB and data[2] == 0xBF:
-            data = data[3:]
+    # Remove UTF-8 BOM if present; the memoryview slice avoids copying data
+    view = memoryview(data)
+    if len(view) >= 3 and view[:3] == _BOM:
+        view = view[3:]
     try:
-        return data.decode("utf-8")
+        return str(view, "utf-8")
     except UnicodeDecodeError as e:
         raise ValueError(f"Invalid UTF-8: {e}")
 
@@ -28,15 +71,7 @@ def normalize_newlines(text: str) -> str:
 def remove_control_chars(text: str) -> str:
     # Remove ASCII control characters except newline and tab
     # Keep chars with code >= 32, plus \n and \t
-    out = []
-    i = 0
-    while i < len(text):
-        ch = text[i]
-        code = ord(ch)
-        if code >= 32 or ch == "\n" or ch == "\t":
-            out.append(ch)
-        i = i + 1
-    return "".join(out)
+    return _drop_controls(text, False)
 
 
 def join_columns_to_tabs(columns: List[Optional[str]]) -> str:
@@ -44,91 +79,153 @@ def join_columns_to_tabs(columns: List[Optional[str]]) -> str:
 
     Avoids list comprehensions and handles None as empty string.
     """
-    out = ""
+    vals: List[str] = []
     i = 0
     while i < len(columns):
-        if i > 0:
-            out = out + "\t"
         val = columns[i]
         if val is None:
-            val = ""
-        out = out + str(val)
+            vals.append("")
+        else:
+            vals.append(str(val))
         i = i + 1
-    return out
+    return "\t".join(vals)
 
 
 def trim_trailing_spaces_per_line(text: str) -> str:
     """Remove trailing spaces and tabs from each line."""
     lines = text.split("\n")
-    out_lines: List[str] = []
     i = 0
     while i < len(lines):
-        line = lines[i]
-        # trim only spaces and tabs from end
-        j = len(line) - 1
-        while j >= 0 and (line[j] == " " or line[j] == "\t"):
-            j = j - 1
-        out_lines.append(line[: j + 1])
+        lines[i] = lines[i].rstrip(" \t")
         i = i + 1
-    return "\n".join(out_lines)
+    return "\n".join(lines)
 
 
 def strip_outer_blank_lines(text: str) -> str:
-    """Remove leading and trailing blank lines (ignoring spaces/tabs)."""
+    """Remove blank lines (spaces/tabs only), including those between lines."""
     lines = text.split("\n")
-    start = 0
-    end = len(lines) - 1
+    kept: List[str] = []
+    i = 0
+    while i < len(lines):
+        if len(lines[i].strip(" \t")) > 0:
+            kept.append(lines[i])
+        i = i + 1
+    return "\n".join(kept)
 
-    # find first non-blank
-    while start <= end:
-        s = lines[start]
-        # check if blank (spaces/tabs only)
-        k = 0
-        all_blank = True
-        while k < len(s):
-            ch = s[k]
-            if ch != " " and ch != "\t":
-                all_blank = False
-                break
-            k = k + 1
-        if all_blank:
-            start = start + 1
-        else:
-            break
 
-    # find last non-blank
-    while end >= start:
-        s = lines[end]
-        k = 0
-        all_blank = True
-        while k < len(s):
-            ch = s[k]
-            if ch != " " and ch != "\t":
-                all_blank = False
-                break
-            k = k + 1
-        if all_blank:
-            end = end - 1
+def normalize_text(
+    data: Union[str, bytes, bytearray, memoryview],
+    newlines: bool = True,
+    control_chars: bool = True,
+    trim_trailing: bool = False,
+    strip_blank_lines: bool = False,
+) -> str:
+    """Fused normalizer with the same output as chaining the steps above.
+
+    Bytes are decoded first (utf8_decode_remove_bom). Then, in order and
+    each only if selected: normalize_newlines, remove_control_chars,
+    trim_trailing_spaces_per_line, strip_outer_blank_lines. Newline and
+    control-character handling share a single translate pass.
+    """
+    if isinstance(data, str):
+        text = data
+    else:
+        text = utf8_decode_remove_bom(data)
+
+    if newlines:
+        text = text.replace("\r\n", "\n")
+        # Decide on the trailing newline before control characters go, as
+        # normalize_newlines would: "a\n\x00" still gains a final "\n"
+        add_newline = not (text.endswith("\n") or text.endswith("\r"))
+        if control_chars:
+            text = _drop_controls(text, True)
         else:
-            break
+            text = text.replace("\r", "\n")
+        if add_newline:
+            text = text + "\n"
+    elif control_chars:
+        text = _drop_controls(text, False)
 
-    kept: List[str] = []
-    idx = start
-    while idx <= end:
-        # Skip entirely blank lines (spaces/tabs only)
-        s = lines[idx]
-        k = 0
-        all_blank = True
-        while k < len(s):
-            ch = s[k]
-            if ch != " " and ch != "\t":
-                all_blank = False
-                break
-            k = k + 1
-        if not all_blank:
-            kept.append(s)
-        idx = idx + 1
-    return "\n".join(kept)
+    if trim_trailing:
+        text = trim_trailing_spaces_per_line(text)
+    if strip_blank_lines:
+        text = strip_outer_blank_lines(text)
+    return text
+
+
+# Streaming normalization
+#
+# Same output as normalize_text over the whole input, produced chunk by
+# chunk so memory is bounded by the chunk size. An incremental utf-8-sig
+# decoder handles a BOM and multi-byte characters split across chunks; a CR
+# at the end of a chunk is held back in case the next chunk starts with LF.
+
+STREAM_CHUNK_BYTES = 1024 * 1024
+
+
+def new_stream_normalizer(newlines: bool = True, control_chars: bool = True) -> Dict[str, object]:
+    state: Dict[str, object] = {}
+    state["decoder"] = codecs.getincrementaldecoder("utf-8-sig")()
+    state["newlines"] = newlines
+    state["control_chars"] = control_chars
+    # Held-back CR, and the last decoded character (for the trailing newline)
+    state["cr"] = ""
+    state["last"] = ""
+    return state
+
+
+def _stream_decode(state: Dict[str, object], data: bytes, final: bool) -> str:
+    try:
+        return state["decoder"].decode(data, final)
+    except UnicodeDecodeError as e:
+        raise ValueError(f"Invalid UTF-8: {e}")
+
+
+def _stream_step(state: Dict[str, object], decoded: str, final: bool) -> str:
+    if len(decoded) > 0:
+        state["last"] = decoded[-1]
+    if not state["newlines"]:
+        if state["control_chars"]:
+            return _drop_controls(decoded, False)
+        return decoded
+    text = state["cr"] + decoded
+    state["cr"] = ""
+    if not final and text.endswith("\r"):
+        state["cr"] = "\r"
+        text = text[:-1]
+    text = text.replace("\r\n", "\n")
+    if state["control_chars"]:
+        text = _drop_controls(text, True)
+    else:
+        text = text.replace("\r", "\n")
+    if final and state["last"] != "\n" and state["last"] != "\r":
+        text = text + "\n"
+    return text
+
+
+def stream_normalize(state: Dict[str, object], data: bytes) -> str:
+    """Normalize the next chunk of raw bytes; returns the text ready to write."""
+    return _stream_step(state, _stream_decode(state, data, False), False)
+
+
+def stream_finish(state: Dict[str, object]) -> str:
+    """Flush held-back input at end of file (raises on a truncated character)."""
+    return _stream_step(state, _stream_decode(state, b"", True), True)
+
+
+def iter_normalized_file(f, chunk_size: int = STREAM_CHUNK_BYTES, newlines: bool = True, control_chars: bool = True):
+    """Yield normalized text pieces read from binary file object f."""
+    state = new_stream_normalizer(newlines, control_chars)
+    while True:
+        data = f.read(chunk_size)
+        if not data:
+            break
+        piece = stream_normalize(state, data)
+        if piece:
+            yield piece
+    piece = stream_finish(state)
+    if piece:
+        yield piece
 
 
 def safe_filename(name: str) -> str:
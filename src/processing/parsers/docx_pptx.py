@@ -1,13 +1,19 @@
 # Parsers for Office documents (functional style)
 
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+import posixpath
+import xml.etree.ElementTree as ET
 import zipfile
 
-from ..normalize import normalize_newlines, utf8_decode_remove_bom, remove_control_chars
+from ..normalize import normalize_newlines, normalize_text, utf8_decode_remove_bom
 from ..io import ensure_output_dir, write_text_file
+from ..pools import pool_context, split_ranges
 from .. import mapping
 
+PARSER_VERSION = "3"
+
 _HAS_DOCX = False
 _HAS_PPTX = False
 try:
@@ -50,50 +56,206 @@ def _extract_all_between(s: str, start: str, end: str) -> List[str]:
     return results
 
 
-def parse_docx(src_path: Path, base_dir: Path) -> Dict[str, object]:
+# Streaming WordprocessingML extraction
+#
+# Parts are parsed with ElementTree.iterparse straight from the zip member,
+# and each finished paragraph or table is cleared from the tree, so memory
+# stays flat for very large documents. Paragraphs become lines; a table row
+# becomes one line of tab-separated cells (a cell's paragraphs joined by a
+# space). Run-level <w:tab/> and <w:br/> become a tab and a line break.
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_P = _W_NS + "p"
+_W_R = _W_NS + "r"
+_W_T = _W_NS + "t"
+_W_TAB = _W_NS + "tab"
+_W_BR = _W_NS + "br"
+_W_CR = _W_NS + "cr"
+_W_TBL = _W_NS + "tbl"
+_W_TR = _W_NS + "tr"
+_W_TC = _W_NS + "tc"
+
+# Engines for parse_docx: "xml" streams the package parts; "python-docx"
+# reads body paragraphs through the library (and falls back to "xml").
+DOCX_ENGINES = ["xml", "python-docx"]
+
+
+def _end_paragraph(para: List[str], tables: List[Dict[str, List[str]]], lines: List[str], keep_empty: bool) -> None:
+    text = "".join(para)
+    del para[:]
+    if len(tables) > 0:
+        tables[-1]["cell"].append(text)
+    elif keep_empty or len(text.strip()) > 0:
+        lines.append(text)
+
+
+def _end_cell(tables: List[Dict[str, List[str]]]) -> None:
+    kept: List[str] = []
+    cell = tables[-1]["cell"]
+    i = 0
+    while i < len(cell):
+        if len(cell[i].strip()) > 0:
+            kept.append(cell[i])
+        i = i + 1
+    tables[-1]["row"].append(" ".join(kept))
+    tables[-1]["cell"] = []
+
+
+def _end_row(tables: List[Dict[str, List[str]]], lines: List[str]) -> None:
+    line = "\t".join(tables[-1]["row"])
+    tables[-1]["row"] = []
+    if len(tables) > 1:
+        # Nested table: the row becomes text of the enclosing cell
+        tables[-2]["cell"].append(line)
+    else:
+        lines.append(line)
+
+
+def _release(elem, open_elems: List[object]) -> None:
+    # Drop a consumed element so the tree does not keep every finished
+    # paragraph or shape; open_elems are its ancestors, innermost last
+    elem.clear()
+    if len(open_elems) > 0:
+        open_elems[-1].remove(elem)
+
+
+def _docx_part_lines(stream, keep_empty: bool) -> List[str]:
+    lines: List[str] = []
+    para: List[str] = []
+    tables: List[Dict[str, List[str]]] = []
+    run_depth = 0
+    open_elems: List[object] = []
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            open_elems.append(elem)
+            if tag == _W_R:
+                run_depth = run_depth + 1
+            elif tag == _W_TBL:
+                tables.append({"row": [], "cell": []})
+            continue
+        open_elems.pop()
+        if tag == _W_T:
+            if elem.text:
+                para.append(elem.text)
+        elif tag == _W_TAB or tag == _W_BR or tag == _W_CR:
+            # Outside runs <w:tab> is a tab-stop definition, not text
+            if run_depth > 0:
+                para.append("\t" if tag == _W_TAB else "\n")
+        elif tag == _W_R:
+            run_depth = run_depth - 1
+        elif tag == _W_P:
+            _end_paragraph(para, tables, lines, keep_empty)
+        elif tag == _W_TC:
+            _end_cell(tables)
+        elif tag == _W_TR:
+            _end_row(tables, lines)
+        elif tag == _W_TBL:
+            tables.pop()
+        if len(tables) == 0 and (tag == _W_P or tag == _W_TBL):
+            # Everything parsed so far has been consumed
+            _release(elem, open_elems)
+    return lines
+
+
+def _docx_part_lines_fallback(z: zipfile.ZipFile, name: str) -> List[str]:
+    # Malformed XML: literal scan for plain <w:t> runs
+    xml = utf8_decode_remove_bom(z.read(name))
+    return _extract_all_between(xml, "<w:t>", "</w:t>")
+
+
+def _numbered_parts(names: List[str], prefix: str) -> List[str]:
+    # e.g. word/header2.xml, word/header10.xml in numeric order
+    found: List[str] = []
+    i = 0
+    while i < len(names):
+        if names[i].startswith(prefix) and names[i].endswith(".xml"):
+            found.append(names[i])
+        i = i + 1
+    found.sort(key=_part_number)
+    return found
+
+
+def _part_number(name: str) -> int:
+    digits = ""
+    i = name.rfind("/") + 1
+    while i < len(name):
+        if "0" <= name[i] <= "9":
+            digits = digits + name[i]
+        i = i + 1
+    return int(digits) if digits else 0
+
+
+def _docx_lines_xml(p: Path, headers_footers: bool, notes: bool) -> List[str]:
+    # Headers, then the body, then footers, footnotes and endnotes. Empty
+    # paragraphs are kept only in the body.
+    lines: List[str] = []
+    with zipfile.ZipFile(p, "r") as z:
+        names = z.namelist()
+        parts: List[str] = []
+        if headers_footers:
+            parts.extend(_numbered_parts(names, "word/header"))
+        parts.append("word/document.xml")
+        if headers_footers:
+            parts.extend(_numbered_parts(names, "word/footer"))
+        if notes:
+            for name in ["word/footnotes.xml", "word/endnotes.xml"]:
+                if name in names:
+                    parts.append(name)
+        i = 0
+        while i < len(parts):
+            name = parts[i]
+            keep_empty = name == "word/document.xml"
+            try:
+                with z.open(name) as stream:
+                    lines.extend(_docx_part_lines(stream, keep_empty))
+            except ET.ParseError:
+                lines.extend(_docx_part_lines_fallback(z, name))
+            i = i + 1
+    return lines
+
+
+def _docx_lines_python_docx(p: Path) -> List[str]:
+    doc = _docx_mod.Document(str(p))
+    lines: List[str] = []
+    i = 0
+    while i < len(doc.paragraphs):
+        lines.append(doc.paragraphs[i].text)
+        i = i + 1
+    return lines
+
+
+def parse_docx(src_path: Path, base_dir: Path, engine: str = "xml", headers_footers: bool = True, notes: bool = True, out_name: Optional[str] = None) -> Dict[str, object]:
+    # engine="python-docx" returns body paragraphs only; headers_footers and
+    # notes apply to the xml engine. The engine actually used is reported.
+    # out_name overrides the output file name (default: <stem>.txt).
     p = Path(src_path)
     base = Path(base_dir)
+    if engine not in DOCX_ENGINES:
+        raise ValueError("unknown docx engine: " + str(engine))
 
-    paragraphs: List[str] = []
-    if _HAS_DOCX:
+    paragraphs: Optional[List[str]] = None
+    used = "xml"
+    if engine == "python-docx" and _HAS_DOCX:
         try:
-            doc = _docx_mod.Document(str(p))
-            i = 0
-            while i < len(doc.paragraphs):
-                paragraphs.append(doc.paragraphs[i].text)
-                i = i + 1
+            paragraphs = _docx_lines_python_docx(p)
+            used = "python-docx"
         except Exception:
             # Fallback to zip-based parsing
-            with zipfile.ZipFile(p, "r") as z:
-                xml_bytes = z.read("word/document.xml")
-                xml = utf8_decode_remove_bom(xml_bytes)
-                texts = _extract_all_between(xml, "<w:t>", "</w:t>")
-                j = 0
-                while j < len(texts):
-                    paragraphs.append(texts[j])
-                    j = j + 1
-    else:
-        with zipfile.ZipFile(p, "r") as z:
-            xml_bytes = z.read("word/document.xml")
-            xml = utf8_decode_remove_bom(xml_bytes)
-            texts = _extract_all_between(xml, "<w:t>", "</w:t>")
-            j = 0
-            while j < len(texts):
-                paragraphs.append(texts[j])
-                j = j + 1
+            paragraphs = None
+    if paragraphs is None:
+        paragraphs = _docx_lines_xml(p, headers_footers, notes)
 
     # Join as lines and normalize
-    text = "\n".join(paragraphs)
-    text = normalize_newlines(text)
-    text = remove_control_chars(text)
+    text = normalize_text("\n".join(paragraphs))
 
     out_dir = _ensure_output_dir(base)
-    out_name = p.stem + ".txt"
+    if not out_name:
+        out_name = p.stem + ".txt"
     out_path = out_dir / out_name
     _write_text_file(out_path, text)
 
     map_entry = mapping.capture_paths(p, out_path)
-    return {"out_path": str(out_path), "text": text, "mapping": map_entry}
+    return {"out_path": str(out_path), "text": text, "mapping": map_entry, "engine": used}
 
 
 def _slide_index_from_name(name: str) -> int:
@@ -118,105 +280,287 @@ def _slide_index_from_name(name: str) -> int:
     return n
 
 
-def parse_pptx(src_path: Path, base_dir: Path) -> Dict[str, object]:
+# Streaming PresentationML extraction
+#
+# Each text run (<a:t>) is one line, matching the python-pptx engine. Table
+# rows become tab-separated lines and slide-number fields in notes are
+# skipped. Slides follow the deck order from presentation.xml, or the
+# slide number in the part name when that is missing.
+_A_NS = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_A_T = _A_NS + "t"
+_A_P = _A_NS + "p"
+_A_TBL = _A_NS + "tbl"
+_A_TR = _A_NS + "tr"
+_A_TC = _A_NS + "tc"
+_A_FLD = _A_NS + "fld"
+_P_NS = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+_P_SLD_ID = _P_NS + "sldId"
+# Shape containers: their finished children are whole shapes
+_P_SHAPE_TREES = [_P_NS + "spTree", _P_NS + "grpSp"]
+_R_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+
+PPTX_ENGINES = ["xml", "python-pptx"]
+
+# Decks with fewer slides than this are extracted in-process: a slide takes
+# well under a millisecond to stream, so a smaller deck does not pay for the
+# process pool start-up
+PARALLEL_MIN_SLIDES = 1000
+
+
+def _slide_lines_xml(stream, tables: bool, skip_fields: bool) -> List[str]:
+    lines: List[str] = []
+    row: List[str] = []
+    cell: List[str] = []
+    para: List[str] = []
+    in_table = 0
+    in_field = 0
+    open_elems: List[object] = []
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            open_elems.append(elem)
+            if tag == _A_TBL:
+                in_table = in_table + 1
+            elif tag == _A_FLD:
+                in_field = in_field + 1
+            continue
+        open_elems.pop()
+        if tag == _A_T:
+            if in_field > 0 and skip_fields:
+                pass
+            elif in_table > 0:
+                if tables and elem.text:
+                    para.append(elem.text)
+            else:
+                lines.append(elem.text or "")
+        elif tag == _A_FLD:
+            in_field = in_field - 1
+        elif tag == _A_P and in_table > 0:
+            # A cell's paragraphs are joined by a space, its runs directly
+            if len(para) > 0:
+                cell.append("".join(para))
+            para = []
+        elif tag == _A_TC:
+            row.append(" ".join(cell))
+            cell = []
+        elif tag == _A_TR:
+            if tables:
+                lines.append("\t".join(row))
+            row = []
+        elif tag == _A_TBL:
+            in_table = in_table - 1
+        if in_table == 0 and (tag == _A_P or tag == _A_TBL):
+            _release(elem, open_elems)
+        elif len(open_elems) > 0 and open_elems[-1].tag in _P_SHAPE_TREES:
+            # A finished shape (p:sp, p:graphicFrame, p:pic, ...)
+            _release(elem, open_elems)
+    return lines
+
+
+def _slide_lines(z: zipfile.ZipFile, name: str, tables: bool, skip_fields: bool) -> List[str]:
+    try:
+        with z.open(name) as stream:
+            return _slide_lines_xml(stream, tables, skip_fields)
+    except ET.ParseError:
+        # Malformed XML: literal scan for plain <a:t> runs
+        xml = utf8_decode_remove_bom(z.read(name))
+        return _extract_all_between(xml, "<a:t>", "</a:t>")
+
+
+def _read_rels(z: zipfile.ZipFile, rels_name: str) -> List[Dict[str, str]]:
+    rels: List[Dict[str, str]] = []
+    try:
+        with z.open(rels_name) as stream:
+            for _event, elem in ET.iterparse(stream):
+                if elem.tag == _REL:
+                    rel: Dict[str, str] = {}
+                    rel["id"] = elem.get("Id") or ""
+                    rel["type"] = elem.get("Type") or ""
+                    rel["target"] = elem.get("Target") or ""
+                    rels.append(rel)
+    except (KeyError, ET.ParseError):
+        return []
+    return rels
+
+
+def _resolve_target(part_dir: str, target: str) -> str:
+    # Relationship targets are relative to the source part's folder, or
+    # absolute from the package root when they start with "/"
+    if target.startswith("/"):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(part_dir, target))
+
+
+def _slide_order(z: zipfile.ZipFile, names: List[str]) -> List[str]:
+    slides: List[str] = []
+    i = 0
+    while i < len(names):
+        if names[i].startswith("ppt/slides/slide") and names[i].endswith(".xml"):
+            slides.append(names[i])
+        i = i + 1
+    by_number = sorted(slides, key=_slide_index_from_name)
+
+    # Deck order: presentation.xml lists slide relationship ids in order
+    targets: Dict[str, str] = {}
+    rels = _read_rels(z, "ppt/_rels/presentation.xml.rels")
+    i = 0
+    while i < len(rels):
+        targets[rels[i]["id"]] = _resolve_target("ppt", rels[i]["target"])
+        i = i + 1
+    ordered: List[str] = []
+    try:
+        with z.open("ppt/presentation.xml") as stream:
+            for _event, elem in ET.iterparse(stream):
+                if elem.tag == _P_SLD_ID:
+                    ordered.append(targets.get(elem.get(_R_ID) or "", ""))
+    except (KeyError, ET.ParseError):
+        return by_number
+    if len(ordered) == 0 or sorted(ordered) != sorted(slides):
+        return by_number
+    return ordered
+
+
+def _notes_part(z: zipfile.ZipFile, slide_name: str) -> Optional[str]:
+    folder = posixpath.dirname(slide_name)
+    rels = _read_rels(z, folder + "/_rels/" + posixpath.basename(slide_name) + ".rels")
+    i = 0
+    while i < len(rels):
+        if rels[i]["type"].endswith("/notesSlide"):
+            return _resolve_target(folder, rels[i]["target"])
+        i = i + 1
+    return None
+
+
+def _format_slide(lines: List[str], notes: List[str]) -> str:
+    if len(notes) > 0:
+        lines = lines + ["Notes:"] + notes
+    slide_text = normalize_newlines("\n".join(lines))
+    return slide_text.rstrip("\n")
+
+
+def _slides_from_zip(z: zipfile.ZipFile, names: List[str], tables: bool, notes: bool) -> List[str]:
+    out: List[str] = []
+    i = 0
+    while i < len(names):
+        note_lines: List[str] = []
+        if notes:
+            part = _notes_part(z, names[i])
+            if part is not None:
+                note_lines = _slide_lines(z, part, tables, True)
+        out.append(_format_slide(_slide_lines(z, names[i], tables, False), note_lines))
+        i = i + 1
+    return out
+
+
+def _extract_slides(pptx_path: str, names: List[str], tables: bool, notes: bool) -> List[str]:
+    # Process pool worker: each worker reads the package on its own
+    with zipfile.ZipFile(pptx_path, "r") as z:
+        return _slides_from_zip(z, names, tables, notes)
+
+
+def _pptx_slides_xml(p: Path, tables: bool, notes: bool, slide_workers: int) -> List[str]:
+    with zipfile.ZipFile(p, "r") as z:
+        names = _slide_order(z, z.namelist())
+        if slide_workers <= 1 or len(names) < PARALLEL_MIN_SLIDES:
+            return _slides_from_zip(z, names, tables, notes)
+    # Contiguous slide ranges, several per worker, reassembled in deck order
+    ranges = split_ranges(names, slide_workers * 4)
+    slides: List[str] = []
+    with ProcessPoolExecutor(max_workers=slide_workers, mp_context=pool_context()) as pool:
+        futures = []
+        r = 0
+        while r < len(ranges):
+            futures.append(pool.submit(_extract_slides, str(p), ranges[r], tables, notes))
+            r = r + 1
+        f = 0
+        while f < len(futures):
+            slides.extend(futures[f].result())
+            f = f + 1
+    return slides
+
+
+def _shape_lines(shp, tables: bool) -> List[str]:
+    lines: List[str] = []
+    if getattr(shp, "has_text_frame", False) and shp.has_text_frame:
+        paras = shp.text_frame.paragraphs
+        pi = 0
+        while pi < len(paras):
+            runs = paras[pi].runs
+            ri = 0
+            while ri < len(runs):
+                lines.append(runs[ri].text)
+                ri = ri + 1
+            pi = pi + 1
+    elif tables and getattr(shp, "has_table", False) and shp.has_table:
+        for tr in shp.table.rows:
+            cells: List[str] = []
+            for tc in tr.cells:
+                cells.append(tc.text.replace("\n", " "))
+            lines.append("\t".join(cells))
+    return lines
+
+
+def _pptx_slides_python_pptx(p: Path, tables: bool, notes: bool) -> List[str]:
+    prs = _Presentation(str(p))
+    slides: List[str] = []
+    for slide in prs.slides:
+        chunks: List[str] = []
+        for shp in slide.shapes:
+            try:
+                chunks.extend(_shape_lines(shp, tables))
+            except Exception:
+                # Ignore shapes we cannot parse
+                pass
+        note_lines: List[str] = []
+        if notes and slide.has_notes_slide:
+            text = slide.notes_slide.notes_text_frame.text
+            if len(text.strip()) > 0:
+                note_lines = text.split("\n")
+        slides.append(_format_slide(chunks, note_lines))
+    return slides
+
+
+def parse_pptx(
+    src_path: Path,
+    base_dir: Path,
+    engine: str = "xml",
+    notes: bool = False,
+    tables: bool = True,
+    slide_workers: int = 0,
+    out_name: Optional[str] = None,
+) -> Dict[str, object]:
+    # Slides are separated by a "---" line. notes appends each slide's
+    # speaker notes after a "Notes:" line; tables adds table rows as
+    # tab-separated lines. With slide_workers > 1, decks of at least
+    # PARALLEL_MIN_SLIDES slides are split across a process pool (xml engine).
+    # out_name is as for parse_docx.
     p = Path(src_path)
     base = Path(base_dir)
+    if engine not in PPTX_ENGINES:
+        raise ValueError("unknown pptx engine: " + str(engine))
 
-    slides_texts: List[str] = []
-    if _HAS_PPTX:
+    slides_texts: Optional[List[str]] = None
+    used = "xml"
+    if engine == "python-pptx" and _HAS_PPTX:
         try:
-            prs = _Presentation(str(p))
-            si = 0
-            while si < len(prs.slides):
-                slide = prs.slides[si]
-                chunks = []
-                # Walk shapes and collect text runs
-                sj = 0
-                shapes = slide.shapes
-                while sj < len(shapes):
-                    shp = shapes[sj]
-                    try:
-                        if hasattr(shp, "has_text_frame") and shp.has_text_frame:
-                            tf = shp.text_frame
-                            pi = 0
-                            while pi < len(tf.paragraphs):
-                                para = tf.paragraphs[pi]
-                                ri = 0
-                                while ri < len(para.runs):
-                                    chunks.append(para.runs[ri].text)
-                                    ri = ri + 1
-                                pi = pi + 1
-                    except Exception:
-                        # Ignore shapes we cannot parse
-                        pass
-                    sj = sj + 1
-                slide_text = "\n".join(chunks)
-                slide_text = normalize_newlines(slide_text)
-                slides_texts.append(slide_text.rstrip("\n"))
-                si = si + 1
+            slides_texts = _pptx_slides_python_pptx(p, tables, notes)
+            used = "python-pptx"
         except Exception:
             # Fallback to zip-based parsing
-            with zipfile.ZipFile(p, "r") as z:
-                names = []
-                for name in z.namelist():
-                    if name.startswith("ppt/slides/slide") and name.endswith(".xml"):
-                        names.append(name)
-                ordered = []
-                while len(names) > 0:
-                    best_idx = 0
-                    k = 1
-                    while k < len(names):
-                        if _slide_index_from_name(names[k]) < _slide_index_from_name(names[best_idx]):
-                            best_idx = k
-                        k = k + 1
-                    ordered.append(names[best_idx])
-                    del names[best_idx]
-                si = 0
-                while si < len(ordered):
-                    name = ordered[si]
-                    xml_bytes = z.read(name)
-                    xml = utf8_decode_remove_bom(xml_bytes)
-                    texts = _extract_all_between(xml, "<a:t>", "</a:t>")
-                    slide_text = "\n".join(texts)
-                    slide_text = normalize_newlines(slide_text)
-                    slides_texts.append(slide_text.rstrip("\n"))
-                    si = si + 1
-    else:
-        with zipfile.ZipFile(p, "r") as z:
-            names = []
-            for name in z.namelist():
-                if name.startswith("ppt/slides/slide") and name.endswith(".xml"):
-                    names.append(name)
-            ordered = []
-            while len(names) > 0:
-                best_idx = 0
-                k = 1
-                while k < len(names):
-                    if _slide_index_from_name(names[k]) < _slide_index_from_name(names[best_idx]):
-                        best_idx = k
-                    k = k + 1
-                ordered.append(names[best_idx])
-                del names[best_idx]
-            si = 0
-            while si < len(ordered):
-                name = ordered[si]
-                xml_bytes = z.read(name)
-                xml = utf8_decode_remove_bom(xml_bytes)
-                texts = _extract_all_between(xml, "<a:t>", "</a:t>")
-                slide_text = "\n".join(texts)
-                slide_text = normalize_newlines(slide_text)
-                slides_texts.append(slide_text.rstrip("\n"))
-                si = si + 1
+            slides_texts = None
+    if slides_texts is None:
+        slides_texts = _pptx_slides_xml(p, tables, notes, slide_workers)
 
     # Join slides with separator line
     combined = "\n---\n".join(slides_texts)
-    text = normalize_newlines(combined)
-    text = remove_control_chars(text)
+    text = normalize_text(combined)
 
     out_dir = _ensure_output_dir(base)
-    out_name = p.stem + ".txt"
+    if not out_name:
+        out_name = p.stem + ".txt"
     out_path = out_dir / out_name
     _write_text_file(out_path, text)
 
     map_entry = mapping.capture_paths(p, out_path)
-    return {"out_path": str(out_path), "text": text, "mapping": map_entry}
+    return {"out_path": str(out_path), "text": text, "mapping": map_entry, "engine": used, "slides": len(slides_texts)}
@@ -1,83 +1,171 @@
 # Image (PNG/JPEG) OCR and SVG text extraction parsers
 from pathlib import Path
-from typing import Callable, Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor
+import xml.etree.ElementTree as ET
 
-from ..io import ensure_output_dir, write_text_file
-from ..normalize import normalize_newlines, remove_control_chars
+from ..io import ensure_output_dir, mapped_file, write_text_file
+from ..pools import pool_context
+from ..normalize import normalize_text
+from ..images import ocr_result, run_ocr, submit_ocr
 
+PARSER_VERSION = "2"
 
-def parse_image(src_path: Path, base_dir: Path, ocr_fn: Optional[Callable[[bytes], str]] = None) -> Dict[str, object]:
-    p = Path(src_path)
-    base = Path(base_dir)
-    try:
-        data = p.read_bytes()
-    except Exception:
-        data = b""
+# SVG elements whose text is extracted, one or more lines each. Text of
+# tspan/textPath joins the enclosing <text>; a tspan positioned with x, y
+# or dy starts a new line.
+_SVG_BLOCKS = ["text", "title", "desc"]
+_SVG_INLINE = ["tspan", "textPath"]
+_LINE_ATTRS = ["x", "y", "dy"]
 
-    text = ""
-    ocr_used = False
-    if ocr_fn is not None:
-        try:
-            text = ocr_fn(data) or ""
-        except Exception:
-            text = ""
-        ocr_used = True if len((text or "").strip()) > 0 else False
+# Bytes fed to the SVG pull parser at a time. ET.iterparse reads 16 KiB
+# chunks, and expat re-scans a partial token on every feed, so multi-MB
+# base64 attributes would cost far more than the document itself.
+SVG_READ_BYTES = 1024 * 1024
+
+# Batch mode: SVGs per process-pool task, and images mapped and queued for
+# OCR ahead of the writer
+BATCH_CHUNK_FILES = 32
+BATCH_IMAGE_LOOKAHEAD = 16
 
-    text = normalize_newlines(text)
-    text = remove_control_chars(text)
+
+def _image_output(ocr_text: str) -> Tuple[str, bool]:
+    # (text to write, ocr_used) for an image's OCR result
+    ocr_used = True if len((ocr_text or "").strip()) > 0 else False
+    text = normalize_text(ocr_text or "")
     # For images, keep exact OCR text semantics without forcing trailing newline
     if text.endswith("\n"):
         text = text[:-1]
     # Coerce whitespace-only to empty string for deterministic output
     if len(text.strip()) == 0:
         text = ""
+    return text, ocr_used
+
+
+def parse_image(src_path: Path, base_dir: Path, ocr_fn: Optional[Callable[[bytes], str]] = None, ocr_executor: Optional[Dict[str, object]] = None, out_name: Optional[str] = None) -> Dict[str, object]:
+    # OCR runs on ocr_executor (default: the shared one from images), so a
+    # timed-out or failing OCR call yields empty text instead of stalling.
+    # The image is memory-mapped and handed to OCR as a memoryview (see
+    # images.ocr_input); without ocr_fn it is not read at all.
+    # out_name overrides the output file name (default: <stem>.txt).
+    p = Path(src_path)
+    base = Path(base_dir)
+
+    text = ""
+    failures: List[str] = []
+    if ocr_fn is not None:
+        try:
+            with mapped_file(p) as data:
+                text = run_ocr(ocr_fn, data, ocr_executor, failures)
+        except OSError:
+            text = ""
+    text, ocr_used = _image_output(text)
 
     out_dir = ensure_output_dir(base)
-    out_path = out_dir / (p.stem + ".txt")
+    out_path = out_dir / (out_name if out_name else p.stem + ".txt")
     write_text_file(out_path, text)
 
     result: Dict[str, object] = {}
     result["out_path"] = str(out_path)
     result["text"] = text
     result["ocr_used"] = ocr_used
+    if len(failures) > 0:
+        result["ocr_failures"] = len(failures)
     return result
 
 
-def parse_svg(src_path: Path, base_dir: Path) -> Dict[str, object]:
-    # Use ElementTree to extract <text> nodes
-    p = Path(src_path)
-    base = Path(base_dir)
-    try:
-        import xml.etree.ElementTree as ET
-    except Exception as e:
-        raise RuntimeError(f"XML parser required: {e}")
+def _local_name(tag) -> str:
+    # Tag without its namespace; comments and PIs have non-str tags
+    if not isinstance(tag, str):
+        return ""
+    brace = tag.rfind("}")
+    if brace != -1:
+        return tag[brace + 1:]
+    return tag
+
+
+def _starts_line(elem) -> bool:
+    for attr in _LINE_ATTRS:
+        if elem.get(attr) is not None:
+            return True
+    return False
+
+
+def _flush_line(parts: List[str], lines: List[str]) -> None:
+    # SVG collapses whitespace when rendering; so does the extracted line
+    line = " ".join("".join(parts).split())
+    if len(line) > 0:
+        lines.append(line)
+    del parts[:]
+
+
+def _block_lines(elem, parts: List[str], lines: List[str], top: bool) -> None:
+    if not top and _local_name(elem.tag) in _SVG_INLINE and _starts_line(elem):
+        _flush_line(parts, lines)
+    if elem.text:
+        parts.append(elem.text)
+    for child in elem:
+        _block_lines(child, parts, lines, False)
+        if child.tail:
+            parts.append(child.tail)
+
+
+def _svg_events(src_path: Path):
+    # ("start"|"end", element) pairs, as ET.iterparse yields them
+    parser = ET.XMLPullParser(events=("start", "end"))
+    with open(src_path, "rb") as f:
+        while True:
+            chunk = f.read(SVG_READ_BYTES)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            for item in parser.read_events():
+                yield item
+    parser.close()
+    for item in parser.read_events():
+        yield item
 
+
+def _svg_text(src_path: Path) -> str:
+    """Normalized text of an SVG's <text> (with tspans), <title> and <desc>.
+
+    The document is streamed through a pull parser. Every element outside
+    those blocks is cleared when it ends, and each finished top-level
+    subtree is dropped from the root, so embedded base64 rasters and path
+    data never accumulate. A malformed document yields the text read
+    before the error.
+    """
+    lines: List[str] = []
+    depth = 0
+    block_depth = -1
+    root = None
     try:
-        tree = ET.parse(str(p))
-        root = tree.getroot()
-    except Exception:
-        # Malformed SVG → empty output
-        root = None
-
-    lines = []
-    if root is not None:
-        # Traverse elements and collect text where tag endswith 'text'
-        for elem in root.iter():
-            tag = elem.tag
-            # handle namespaces by checking suffix
-            suffix = "text"
-            if isinstance(tag, str):
-                if tag.endswith(suffix):
-                    t = elem.text or ""
-                    if len(t) > 0:
-                        lines.append(t)
-
-    text = "\n".join(lines)
-    text = normalize_newlines(text)
-    text = remove_control_chars(text)
+        for event, elem in _svg_events(src_path):
+            if event == "start":
+                depth = depth + 1
+                if root is None:
+                    root = elem
+                if block_depth == -1 and _local_name(elem.tag) in _SVG_BLOCKS:
+                    block_depth = depth
+                continue
+            if depth == block_depth:
+                parts: List[str] = []
+                _block_lines(elem, parts, lines, True)
+                _flush_line(parts, lines)
+                block_depth = -1
+            depth = depth - 1
+            if block_depth == -1:
+                elem.clear()
+                if depth == 1 and root is not None:
+                    root.clear()
+    except ET.ParseError:
+        pass
+    return normalize_text("\n".join(lines))
 
+
+def _write_svg(p: Path, base: Path, text: str, out_name: Optional[str]) -> Dict[str, object]:
     out_dir = ensure_output_dir(base)
-    out_path = out_dir / (p.stem + ".txt")
+    out_path = out_dir / (out_name if out_name else p.stem + ".txt")
     write_text_file(out_path, text)
 
     result: Dict[str, object] = {}
@@ -85,3 +173,194 @@ def parse_svg(src_path: Path, base_dir: Path) -> Dict[str, object]:
     result["text"] = text
     result["ocr_used"] = False
     return result
+
+
+def parse_svg(src_path: Path, base_dir: Path, out_name: Optional[str] = None) -> Dict[str, object]:
+    # One line per <text> line, <title> and <desc>, in document order
+    p = Path(src_path)
+    return _write_svg(p, Path(base_dir), _svg_text(p), out_name)
+
+
+# Batch mode
+
+def _svg_texts(paths: List[str]) -> List[Tuple[Optional[str], Optional[str]]]:
+    # Process-pool task: (text, error) per path
+    out: List[Tuple[Optional[str], Optional[str]]] = []
+    i = 0
+    while i < len(paths):
+        try:
+            out.append((_svg_text(Path(paths[i])), None))
+        except Exception as e:
+            out.append((None, str(e)))
+        i = i + 1
+    return out
+
+
+def _is_svg(p: Path) -> bool:
+    return p.suffix.lower() == ".svg"
+
+
+def _batch_state(sources: List[Path], workers: int) -> Dict[str, object]:
+    # SVG indices grouped into pool tasks, in input order
+    chunks: List[List[int]] = []
+    chunk_of: Dict[int, int] = {}
+    images: List[int] = []
+    i = 0
+    while i < len(sources):
+        if _is_svg(sources[i]):
+            if len(chunks) == 0 or len(chunks[-1]) >= BATCH_CHUNK_FILES:
+                chunks.append([])
+            chunk_of[i] = len(chunks) - 1
+            chunks[-1].append(i)
+        else:
+            images.append(i)
+        i = i + 1
+    state: Dict[str, object] = {}
+    state["chunks"] = chunks
+    state["chunk_of"] = chunk_of
+    state["images"] = images
+    state["svg_futures"] = {}
+    state["svg_done"] = {}
+    state["next_chunk"] = 0
+    state["ocr_futures"] = {}
+    state["ocr_maps"] = {}
+    state["next_image"] = 0
+    state["window"] = 2 * workers if workers > 0 else 1
+    return state
+
+
+def _submit_svg_chunks(state: Dict[str, object], sources: List[Path], pool) -> None:
+    chunks = state["chunks"]
+    futures = state["svg_futures"]
+    while state["next_chunk"] < len(chunks) and len(futures) < state["window"]:
+        c = state["next_chunk"]
+        paths: List[str] = []
+        for idx in chunks[c]:
+            paths.append(str(sources[idx]))
+        futures[c] = pool.submit(_svg_texts, paths)
+        state["next_chunk"] = c + 1
+
+
+def _svg_result(state: Dict[str, object], sources: List[Path], idx: int, pool) -> Tuple[Optional[str], Optional[str]]:
+    done = state["svg_done"]
+    if idx not in done:
+        c = state["chunk_of"][idx]
+        chunk = state["chunks"][c]
+        if pool is None:
+            paths: List[str] = []
+            for j in chunk:
+                paths.append(str(sources[j]))
+            texts = _svg_texts(paths)
+        else:
+            _submit_svg_chunks(state, sources, pool)
+            try:
+                texts = state["svg_futures"].pop(c).result()
+            except Exception as e:
+                # Worker died; fail the chunk, keep the batch going
+                texts = []
+                for _ in chunk:
+                    texts.append((None, str(e)))
+            _submit_svg_chunks(state, sources, pool)
+        k = 0
+        while k < len(chunk):
+            done[chunk[k]] = texts[k]
+            k = k + 1
+    return done.pop(idx)
+
+
+def _submit_images(state: Dict[str, object], sources: List[Path], upto: int, ocr_fn: Callable, ocr_executor: Optional[Dict[str, object]]) -> None:
+    # Queue OCR for images up to input index upto; submit_ocr blocks while
+    # the OCR executor's queue is full. Each image is memory-mapped, as in
+    # parse_image, and stays mapped until _close_image.
+    images = state["images"]
+    futures = state["ocr_futures"]
+    maps = state["ocr_maps"]
+    while state["next_image"] < len(images) and images[state["next_image"]] <= upto:
+        idx = images[state["next_image"]]
+        state["next_image"] = state["next_image"] + 1
+        futures[idx] = None
+        try:
+            mapping = mapped_file(sources[idx])
+            data = mapping.__enter__()
+        except OSError:
+            continue
+        maps[idx] = mapping
+        futures[idx] = submit_ocr(ocr_fn, data, ocr_executor)
+
+
+def _close_image(state: Dict[str, object], idx: int) -> None:
+    mapping = state["ocr_maps"].pop(idx, None)
+    if mapping is not None:
+        mapping.__exit__(None, None, None)
+
+
+def parse_batch(
+    sources: List[Path],
+    base_dir: Path,
+    workers: int = 0,
+    ocr_fn: Optional[Callable[[bytes], str]] = None,
+    ocr_executor: Optional[Dict[str, object]] = None,
+    out_names: Optional[List[Optional[str]]] = None,
+) -> List[Dict[str, object]]:
+    """Parse many SVGs and images with a single output writer.
+
+    SVG text is extracted on a process pool of workers (0 or 1: in this
+    process), BATCH_CHUNK_FILES files per task. Images are OCR'd on
+    ocr_executor (default: the shared one), up to BATCH_IMAGE_LOOKAHEAD
+    files ahead of the writer. Every output file is written by the calling
+    thread, in input order. Results match parse_svg/parse_image without
+    "text"; a file that fails gets {"source", "error"} and the batch goes
+    on. out_names[i] overrides the output name of sources[i].
+    """
+    srcs: List[Path] = []
+    for s in sources:
+        srcs.append(Path(s))
+    base = Path(base_dir)
+    state = _batch_state(srcs, workers)
+    pool = None
+    if workers > 1 and len(state["chunks"]) > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=pool_context())
+
+    results: List[Dict[str, object]] = []
+    try:
+        if pool is not None:
+            _submit_svg_chunks(state, srcs, pool)
+        i = 0
+        while i < len(srcs):
+            p = srcs[i]
+            out_name = out_names[i] if out_names is not None else None
+            if ocr_fn is not None:
+                _submit_images(state, srcs, i + BATCH_IMAGE_LOOKAHEAD, ocr_fn, ocr_executor)
+            try:
+                if _is_svg(p):
+                    text, err = _svg_result(state, srcs, i, pool)
+                    if err is not None:
+                        raise RuntimeError(err)
+                    res = _write_svg(p, base, text, out_name)
+                else:
+                    ocr_text = ""
+                    failures: List[str] = []
+                    fut: Optional[Future] = state["ocr_futures"].pop(i, None)
+                    try:
+                        if fut is not None:
+                            ocr_text = ocr_result(fut, ocr_executor, failures)
+                    finally:
+                        _close_image(state, i)
+                    text, ocr_used = _image_output(ocr_text)
+                    out_path = ensure_output_dir(base) / (out_name if out_name else p.stem + ".txt")
+                    write_text_file(out_path, text)
+                    res = {"out_path": str(out_path), "ocr_used": ocr_used}
+                    if len(failures) > 0:
+                        res["ocr_failures"] = len(failures)
+                res.pop("text", None)
+            except Exception as e:
+                res = {"error": str(e)}
+            res["source"] = str(p)
+            results.append(res)
+            i = i + 1
+    finally:
+        for idx in list(state["ocr_maps"].keys()):
+            _close_image(state, idx)
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+    return results
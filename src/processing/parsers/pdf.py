@@ -1,87 +1,254 @@
 # PDF parser with optional OCR fallback (functional style)
 from pathlib import Path
-from typing import Callable, Dict, List, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor
 
-from ..io import ensure_output_dir, write_text_file
-from ..normalize import normalize_newlines, remove_control_chars
+from ..io import ensure_output_dir, write_text_file, file_checksum
+from ..pools import pool_context, split_ranges
+from .. import cache as cache_mod
+from ..images import get_ocr_executor, ocr_result, submit_ocr
+from ..normalize import normalize_text
 
+PARSER_VERSION = "2"
 
-def _extract_text_pypdf(pdf_path: Path) -> List[str]:
-    pages: List[str] = []
+
+# Documents with fewer uncached pages than this are extracted in-process
+PARALLEL_MIN_PAGES = 64
+PAGE_NAMESPACE = "pdf_pages"
+
+
+def _open_reader(pdf_path: Path):
     try:
         from pypdf import PdfReader  # type: ignore
     except Exception as e:
         raise RuntimeError(f"pypdf is required for PDF parsing: {e}")
+    return PdfReader(str(pdf_path))
+
+
+def _page_key(doc_hash: str, index: int) -> str:
+    return cache_mod.make_key(doc_hash, "pdf-page@" + PARSER_VERSION, {"page": index})
+
+
+def _extract_page(reader, index: int) -> Optional[str]:
+    # None marks a page that failed to extract (it is never cached)
+    try:
+        return reader.pages[index].extract_text() or ""
+    except Exception:
+        return None
+
+
+def _extract_pages(pdf_path: str, indices: List[int], page_cache: Optional[Dict[str, object]], doc_hash: Optional[str]) -> List[Tuple[int, Optional[str]]]:
+    # Process pool worker: extract the given pages and cache each one as soon
+    # as it is done, so an interrupted run keeps the pages already finished.
+    reader = _open_reader(Path(pdf_path))
+    out: List[Tuple[int, Optional[str]]] = []
+    i = 0
+    while i < len(indices):
+        idx = indices[i]
+        text = _extract_page(reader, idx)
+        if text is not None and page_cache is not None and doc_hash is not None:
+            cache_mod.cache_put_text(page_cache, PAGE_NAMESPACE, _page_key(doc_hash, idx), text)
+        out.append((idx, text))
+        i = i + 1
+    return out
+
+
+def _extract_text_pypdf(pdf_path: Path, page_workers: int = 0, page_cache: Optional[Dict[str, object]] = None) -> List[str]:
+    """Extract the text of every page, in page order.
+
+    With page_cache (a cache.new_cache dict) each page is cached under the
+    document's content hash and page index, and only uncached pages are
+    extracted. With page_workers > 1 and at least PARALLEL_MIN_PAGES pages
+    to extract, page ranges are spread over a process pool.
+    """
+    reader = _open_reader(pdf_path)
+    count = len(reader.pages)
+    texts: List[Optional[str]] = []
+    i = 0
+    while i < count:
+        texts.append(None)
+        i = i + 1
 
-    reader = PdfReader(str(pdf_path))
+    doc_hash = None
+    missing: List[int] = []
+    if page_cache is not None:
+        doc_hash = file_checksum(pdf_path)
     i = 0
-    while i < len(reader.pages):
-        page = reader.pages[i]
-        try:
-            text = page.extract_text() or ""
-        except Exception:
-            text = ""
-        pages.append(text)
+    while i < count:
+        cached = None
+        if doc_hash is not None:
+            cached = cache_mod.cache_get_text(page_cache, PAGE_NAMESPACE, _page_key(doc_hash, i))
+        if cached is None:
+            missing.append(i)
+        else:
+            texts[i] = cached
+        i = i + 1
+
+    if page_workers > 1 and len(missing) >= PARALLEL_MIN_PAGES:
+        # Several ranges per worker keep the pool busy when pages vary in cost
+        ranges = split_ranges(missing, page_workers * 4)
+        with ProcessPoolExecutor(max_workers=page_workers, mp_context=pool_context()) as pool:
+            futures = []
+            r = 0
+            while r < len(ranges):
+                futures.append(pool.submit(_extract_pages, str(pdf_path), ranges[r], page_cache, doc_hash))
+                r = r + 1
+            f = 0
+            while f < len(futures):
+                done = futures[f].result()
+                j = 0
+                while j < len(done):
+                    texts[done[j][0]] = done[j][1]
+                    j = j + 1
+                f = f + 1
+    else:
+        i = 0
+        while i < len(missing):
+            idx = missing[i]
+            text = _extract_page(reader, idx)
+            if text is not None and doc_hash is not None:
+                cache_mod.cache_put_text(page_cache, PAGE_NAMESPACE, _page_key(doc_hash, idx), text)
+            texts[idx] = text
+            i = i + 1
+
+    pages: List[str] = []
+    i = 0
+    while i < count:
+        t = texts[i]
+        pages.append(t if t is not None else "")
         i = i + 1
     return pages
 
 
+def _page_coverage(text: str) -> int:
+    # Characters of real text on a page, after normalization
+    return len(normalize_text(text).strip())
+
+
+def _low_coverage_pages(pages: List[str], ocr_threshold: int) -> List[int]:
+    low: List[int] = []
+    i = 0
+    while i < len(pages):
+        if _page_coverage(pages[i]) < ocr_threshold:
+            low.append(i)
+        i = i + 1
+    return low
+
+
+def _page_images(
+    p: Path,
+    indices: List[int],
+    rasterize_fn: Optional[Callable[[Path], List[bytes]]],
+    rasterize_page_fn: Optional[Callable[[Path, int], bytes]],
+) -> Iterator[Tuple[int, bytes]]:
+    # (page index, image) for the requested pages, rendered one at a time
+    # with rasterize_page_fn; pages that fail are left out
+    if rasterize_page_fn is not None:
+        i = 0
+        while i < len(indices):
+            try:
+                image = rasterize_page_fn(p, indices[i])
+            except Exception:
+                image = None
+            if image is not None:
+                yield indices[i], image
+            i = i + 1
+        return
+    if rasterize_fn is None:
+        return
+    # Whole-document rasterizer: render once and pick the pages we need
+    try:
+        all_images = rasterize_fn(p)
+    except Exception:
+        all_images = []
+    i = 0
+    while i < len(indices):
+        if indices[i] < len(all_images):
+            yield indices[i], all_images[indices[i]]
+        i = i + 1
+
+
+def _ocr_images(ocr_fn: Callable[[bytes], str], page_images: Iterator[Tuple[int, bytes]], ocr_executor: Optional[Dict[str, object]], failures: List[str]) -> Dict[int, str]:
+    # Each page is submitted as soon as it is rendered. submit_ocr blocks
+    # while the executor's queue is full, so rendering waits for OCR and at
+    # most workers + max_queue page images are held at once.
+    ex = ocr_executor if ocr_executor is not None else get_ocr_executor()
+    indices: List[int] = []
+    futures: List[Future] = []
+    for idx, image in page_images:
+        indices.append(idx)
+        futures.append(submit_ocr(ocr_fn, image, ex))
+    texts: Dict[int, str] = {}
+    i = 0
+    while i < len(futures):
+        texts[indices[i]] = ocr_result(futures[i], ex, failures)
+        i = i + 1
+    return texts
+
+
 def parse_pdf(
     src_path: Path,
     base_dir: Path,
     ocr_threshold: int = 10,
     rasterize_fn: Optional[Callable[[Path], List[bytes]]] = None,
     ocr_fn: Optional[Callable[[bytes], str]] = None,
+    page_workers: int = 0,
+    page_cache: Optional[Dict[str, object]] = None,
+    rasterize_page_fn: Optional[Callable[[Path, int], bytes]] = None,
+    ocr_executor: Optional[Dict[str, object]] = None,
+    out_name: Optional[str] = None,
 ) -> Dict[str, object]:
+    """Extract PDF text, falling back to OCR page by page.
+
+    Every page whose extracted text has fewer than ocr_threshold characters
+    is rasterized and OCR'd; other pages keep their text. rasterize_page_fn
+    (path, page_index) renders just those pages; the older rasterize_fn
+    (path) renders the whole document and the needed pages are picked from
+    it. OCR calls go through ocr_executor (images.new_ocr_executor), by
+    default the process-wide shared one, so they run concurrently and a page
+    whose OCR times out simply keeps its extracted text. An OCR result
+    replaces a page's text only when it is non-empty; "ocr_pages" lists
+    those pages (1-based). out_name overrides the output file name
+    (default: <stem>.txt).
+    """
     p = Path(src_path)
     base = Path(base_dir)
 
     # Extract searchable text
-    pages = _extract_text_pypdf(p)
-    combined = "\n".join(pages)
-    combined = normalize_newlines(combined)
-    combined = remove_control_chars(combined)
+    pages = _extract_text_pypdf(p, page_workers=page_workers, page_cache=page_cache)
 
-    ocr_used = False
-
-    # OCR fallback if text yield is too low and hooks provided
-    if len(combined.strip()) < int(ocr_threshold):
+    ocr_pages: List[int] = []
+    ocr_failures: List[str] = []
+    low = _low_coverage_pages(pages, int(ocr_threshold))
+    if len(low) > 0 and ocr_fn is not None:
         # Provide default rasterizer if not supplied
-        if rasterize_fn is None:
+        if rasterize_fn is None and rasterize_page_fn is None:
             try:
                 from ..images import rasterize_pdf_to_images  # type: ignore
                 rasterize_fn = rasterize_pdf_to_images
             except Exception:
                 rasterize_fn = None
-        if rasterize_fn is not None and ocr_fn is not None:
-            try:
-                images = rasterize_fn(p)
-            except Exception:
-                images = []
-            ocr_texts: List[str] = []
-            j = 0
-            while j < len(images):
-                try:
-                    t = ocr_fn(images[j])
-                except Exception:
-                    t = ""
-                ocr_texts.append(t)
-                j = j + 1
-            ocr_combined = "\n".join(ocr_texts)
-            ocr_combined = normalize_newlines(ocr_combined)
-            ocr_combined = remove_control_chars(ocr_combined)
-            # Only mark OCR used if we actually obtained any non-empty text
-            if len(ocr_combined.strip()) > 0:
-                combined = ocr_combined
-                ocr_used = True
+        ocr_texts = _ocr_images(ocr_fn, _page_images(p, low, rasterize_fn, rasterize_page_fn), ocr_executor, ocr_failures)
+        for idx in sorted(ocr_texts.keys()):
+            # Only count OCR as used where it produced real text
+            if _page_coverage(ocr_texts[idx]) > 0:
+                pages[idx] = ocr_texts[idx]
+                ocr_pages.append(idx + 1)
+
+    combined = "\n".join(pages)
+    combined = normalize_text(combined)
 
     out_dir = ensure_output_dir(base)
-    out_path = out_dir / (p.stem + ".txt")
+    out_path = out_dir / (out_name if out_name else p.stem + ".txt")
     write_text_file(out_path, combined)
 
     result: Dict[str, object] = {}
     result["out_path"] = str(out_path)
     result["text"] = combined
     result["pages"] = max(1, len(pages))
-    result["ocr_used"] = ocr_used
+    result["ocr_used"] = len(ocr_pages) > 0
+    result["ocr_pages"] = ocr_pages
+    if len(ocr_failures) > 0:
+        # Pages whose OCR timed out or failed and kept their extracted text
+        result["ocr_failures"] = len(ocr_failures)
     return result
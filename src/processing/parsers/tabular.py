@@ -1,95 +1,300 @@
 # Tabular parsers (CSV/TSV/XLSX)
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 import csv
 
-from ..io import ensure_output_dir, write_text_file
+from ..io import ensure_output_dir, should_stream, write_text_file
 from ..normalize import normalize_newlines, join_columns_to_tabs
 
+PARSER_VERSION = "1"
+
 
 def _row_to_tabs(row: List[str]) -> str:
     # Delegate to shared normalization helper
     return join_columns_to_tabs(row)
 
 
-def _write_out(base_dir: Path, stem: str, text: str) -> Path:
+def _write_out(base_dir: Path, name: str, text: str) -> Path:
     out_dir = ensure_output_dir(base_dir)
-    out_path = out_dir / (stem + ".txt")
+    out_path = out_dir / name
     write_text_file(out_path, text)
     return out_path
 
 
-def parse_csv(src_path: Path, base_dir: Path) -> Dict[str, object]:
-    p = Path(src_path)
-    base = Path(base_dir)
-    lines: List[str] = []
-    rows_count = 0
-    with open(p, "r", encoding="utf-8", newline="") as f:
-        reader = csv.reader(f)
-        for row in reader:
-            # Avoid list comprehension, build explicitly
-            line = _row_to_tabs(row)
-            lines.append(line)
-            rows_count = rows_count + 1
-    text = "\n".join(lines)
-    text = normalize_newlines(text)
-    out_path = _write_out(base, p.stem, text)
-    return {"out_path": str(out_path), "text": text, "rows": rows_count}
-
-
-def parse_tsv(src_path: Path, base_dir: Path) -> Dict[str, object]:
-    p = Path(src_path)
-    base = Path(base_dir)
-    lines: List[str] = []
-    rows_count = 0
+_WRITE_CHUNK_CHARS = 1024 * 1024
+
+
+def _keep_row(index: int, sample_every: Optional[int]) -> bool:
+    # Sampling keeps row 0 (usually the header) and every Nth row after it
+    if sample_every is None or sample_every <= 1:
+        return True
+    return index % sample_every == 0
+
+
+def _select_rows(reader, max_rows: Optional[int], sample_every: Optional[int], state: Dict[str, object]):
+    # Yield tab-joined lines for the kept rows; fills state with counters
+    seen = 0
+    kept = 0
+    state["truncated"] = False
+    for row in reader:
+        if max_rows is not None and kept >= max_rows:
+            state["truncated"] = True
+            break
+        if _keep_row(seen, sample_every):
+            yield _row_to_tabs(row)
+            kept = kept + 1
+        seen = seen + 1
+    state["rows"] = kept
+    state["rows_seen"] = seen
+
+
+def _stream_lines(lines, out_path: Path) -> int:
+    """Write lines to out_path with the same result as normalize_newlines("\n".join(lines)).
+
+    Each line is held back until the next one arrives so the final line can
+    get the whole-text trailing-newline rule. Output is flushed in chunks, so
+    memory stays bounded by the longest row plus the chunk size. Returns the
+    number of characters written.
+    """
+    chars = 0
+    buf: List[str] = []
+    buf_len = 0
+    pending: Optional[str] = None
+    with open(out_path, "w", encoding="utf-8") as f:
+        for line in lines:
+            if pending is not None:
+                # pending + separator; a trailing CR merges with the separator
+                piece = normalize_newlines(pending + "\n")
+                buf.append(piece)
+                buf_len = buf_len + len(piece)
+                if buf_len >= _WRITE_CHUNK_CHARS:
+                    f.write("".join(buf))
+                    chars = chars + buf_len
+                    buf = []
+                    buf_len = 0
+            pending = line
+        if pending is None:
+            pending = ""
+        piece = normalize_newlines(pending)
+        buf.append(piece)
+        buf_len = buf_len + len(piece)
+        f.write("".join(buf))
+        chars = chars + buf_len
+    return chars
+
+
+def _parse_delimited(
+    p: Path,
+    base: Path,
+    delimiter: str,
+    stream: Optional[bool],
+    max_rows: Optional[int],
+    sample_every: Optional[int],
+    out_name: Optional[str],
+) -> Dict[str, object]:
+    name = out_name if out_name else p.stem + ".txt"
+    state: Dict[str, object] = {}
+    result: Dict[str, object] = {}
     with open(p, "r", encoding="utf-8", newline="") as f:
-        reader = csv.reader(f, delimiter="\t")
-        for row in reader:
-            line = _row_to_tabs(row)
-            lines.append(line)
-            rows_count = rows_count + 1
-    text = "\n".join(lines)
-    text = normalize_newlines(text)
-    out_path = _write_out(base, p.stem, text)
-    return {"out_path": str(out_path), "text": text, "rows": rows_count}
-
-
-def parse_xlsx(src_path: Path, base_dir: Path) -> Dict[str, object]:
-    from openpyxl import load_workbook  # local import to keep optional
+        reader = csv.reader(f, delimiter=delimiter)
+        lines = _select_rows(reader, max_rows, sample_every, state)
+        if should_stream(p, stream):
+            out_path = ensure_output_dir(base) / name
+            result["chars"] = _stream_lines(lines, out_path)
+        else:
+            collected: List[str] = []
+            for line in lines:
+                collected.append(line)
+            text = "\n".join(collected)
+            text = normalize_newlines(text)
+            out_path = _write_out(base, name, text)
+            result["text"] = text
+    result["out_path"] = str(out_path)
+    result["rows"] = state["rows"]
+    result["truncated"] = state["truncated"]
+    if sample_every is not None and sample_every > 1:
+        result["sampled_every"] = sample_every
+        result["rows_seen"] = state["rows_seen"]
+    return result
 
-    p = Path(src_path)
-    base = Path(base_dir)
-    wb = load_workbook(filename=str(p), read_only=True, data_only=True)
 
-    lines: List[str] = []
-    sheets_meta: List[Dict[str, object]] = []
+def parse_csv(
+    src_path: Path,
+    base_dir: Path,
+    stream: Optional[bool] = None,
+    max_rows: Optional[int] = None,
+    sample_every: Optional[int] = None,
+    out_name: Optional[str] = None,
+) -> Dict[str, object]:
+    """Convert a CSV file to tab-delimited text.
+
+    stream=True writes rows straight to the output file and omits "text"
+    from the result; None streams only files above STREAM_THRESHOLD_BYTES.
+    max_rows caps the rows written ("truncated" tells whether rows were
+    dropped) and sample_every=N keeps the first row and every Nth row.
+    out_name overrides the output file name (default: <stem>.txt).
+    """
+    return _parse_delimited(Path(src_path), Path(base_dir), ",", stream, max_rows, sample_every, out_name)
+
 
+def parse_tsv(
+    src_path: Path,
+    base_dir: Path,
+    stream: Optional[bool] = None,
+    max_rows: Optional[int] = None,
+    sample_every: Optional[int] = None,
+    out_name: Optional[str] = None,
+) -> Dict[str, object]:
+    # Same options as parse_csv
+    return _parse_delimited(Path(src_path), Path(base_dir), "\t", stream, max_rows, sample_every, out_name)
+
+
+def _cells_to_strings(row) -> List[str]:
+    cols: List[str] = []
+    ci = 0
+    # row is a tuple
+    while ci < len(row):
+        val = row[ci]
+        if val is None:
+            cols.append("")
+        else:
+            cols.append(str(val))
+        ci = ci + 1
+    return cols
+
+
+def _is_empty_row(cols: List[str]) -> bool:
+    i = 0
+    while i < len(cols):
+        if cols[i] != "":
+            return False
+        i = i + 1
+    return True
+
+
+def _sheet_rows(ws, max_rows: Optional[int], prune_empty_rows: bool, state: Dict[str, object]):
+    # Yield the string cells of the rows kept for one sheet
+    kept = 0
+    pruned = 0
+    state["truncated"] = False
+    for row in ws.iter_rows(values_only=True):
+        cols = _cells_to_strings(row)
+        if prune_empty_rows and _is_empty_row(cols):
+            pruned = pruned + 1
+            continue
+        if max_rows is not None and kept >= max_rows:
+            state["truncated"] = True
+            break
+        yield cols
+        kept = kept + 1
+    state["rows"] = kept
+    state["pruned_rows"] = pruned
+
+
+def _used_columns(ws, max_rows: Optional[int], prune_empty_rows: bool) -> List[int]:
+    # First pass for column pruning: indices holding a value in any kept row
+    used: Dict[int, bool] = {}
+    width = 0
+    state: Dict[str, object] = {}
+    for cols in _sheet_rows(ws, max_rows, prune_empty_rows, state):
+        if len(cols) > width:
+            width = len(cols)
+        ci = 0
+        while ci < len(cols):
+            if cols[ci] != "":
+                used[ci] = True
+            ci = ci + 1
+    indices: List[int] = []
+    ci = 0
+    while ci < width:
+        if ci in used:
+            indices.append(ci)
+        ci = ci + 1
+    return indices
+
+
+def _project(cols: List[str], indices: List[int]) -> List[str]:
+    out: List[str] = []
+    i = 0
+    while i < len(indices):
+        idx = indices[i]
+        if idx < len(cols):
+            out.append(cols[idx])
+        else:
+            out.append("")
+        i = i + 1
+    return out
+
+
+def _xlsx_lines(wb, sheets_meta: List[Dict[str, object]], max_rows_per_sheet: Optional[int], prune_empty_rows: bool, prune_empty_columns: bool):
     si = 0
     while si < len(wb.sheetnames):
         name = wb.sheetnames[si]
         ws = wb[name]
         # Sheet separator
-        lines.append("=== Sheet: " + name + " ===")
-        row_count = 0
-        for row in ws.iter_rows(values_only=True):
-            # Convert row to list of strings
-            cols: List[str] = []
-            ci = 0
-            # row is a tuple
-            while ci < len(row):
-                val = row[ci]
-                if val is None:
-                    cols.append("")
-                else:
-                    cols.append(str(val))
-                ci = ci + 1
-            line = _row_to_tabs(cols)
-            lines.append(line)
-            row_count = row_count + 1
-        sheets_meta.append({"name": name, "rows": row_count})
+        yield "=== Sheet: " + name + " ==="
+        indices = None
+        if prune_empty_columns:
+            indices = _used_columns(ws, max_rows_per_sheet, prune_empty_rows)
+        state: Dict[str, object] = {}
+        width = 0
+        for cols in _sheet_rows(ws, max_rows_per_sheet, prune_empty_rows, state):
+            if len(cols) > width:
+                width = len(cols)
+            if indices is not None:
+                cols = _project(cols, indices)
+            yield _row_to_tabs(cols)
+        meta: Dict[str, object] = {"name": name, "rows": state["rows"], "truncated": state["truncated"]}
+        if prune_empty_rows:
+            meta["pruned_rows"] = state["pruned_rows"]
+        if indices is not None:
+            meta["pruned_columns"] = width - len(indices)
+        sheets_meta.append(meta)
         si = si + 1
 
-    text = "\n".join(lines)
-    text = normalize_newlines(text)
-    out_path = _write_out(base, p.stem, text)
-    return {"out_path": str(out_path), "text": text, "sheets": sheets_meta}
+
+def parse_xlsx(
+    src_path: Path,
+    base_dir: Path,
+    stream: Optional[bool] = None,
+    max_rows_per_sheet: Optional[int] = None,
+    prune_empty_rows: bool = False,
+    prune_empty_columns: bool = False,
+    out_name: Optional[str] = None,
+) -> Dict[str, object]:
+    """Convert every sheet of a workbook to tab-delimited text.
+
+    Rows are read from a read-only workbook one at a time. stream behaves as
+    for parse_csv. max_rows_per_sheet caps each sheet and the sheet's
+    "truncated" flag records whether rows were dropped. prune_empty_rows
+    drops rows without any value; prune_empty_columns drops columns that are
+    empty in every kept row of the sheet (this reads the sheet twice).
+    out_name is as for parse_csv.
+    """
+    from openpyxl import load_workbook  # local import to keep optional
+
+    p = Path(src_path)
+    base = Path(base_dir)
+    name = out_name if out_name else p.stem + ".txt"
+    wb = load_workbook(filename=str(p), read_only=True, data_only=True)
+
+    sheets_meta: List[Dict[str, object]] = []
+    result: Dict[str, object] = {}
+    try:
+        lines = _xlsx_lines(wb, sheets_meta, max_rows_per_sheet, prune_empty_rows, prune_empty_columns)
+        if should_stream(p, stream):
+            out_path = ensure_output_dir(base) / name
+            result["chars"] = _stream_lines(lines, out_path)
+        else:
+            collected: List[str] = []
+            for line in lines:
+                collected.append(line)
+            text = "\n".join(collected)
+            text = normalize_newlines(text)
+            out_path = _write_out(base, name, text)
+            result["text"] = text
+    finally:
+        wb.close()
+    result["out_path"] = str(out_path)
+    result["sheets"] = sheets_meta
+    return result
@@ -1,14 +1,12 @@
 # Parser stubs for text and markdown
 
 from pathlib import Path
-from typing import Dict
-from ..normalize import utf8_decode_remove_bom, normalize_newlines
+from typing import Dict, Optional
+from ..io import mapped_file, should_stream
+from ..normalize import STREAM_CHUNK_BYTES, iter_normalized_file, normalize_text
 from .. import mapping
 
-
-def _read_bytes(p: Path) -> bytes:
-    with open(p, "rb") as f:
-        return f.read()
+PARSER_VERSION = "2"
 
 
 def _ensure_output_dir(base_dir: Path) -> Path:
@@ -30,16 +28,50 @@ def _md_target_name(src_name: str) -> str:
     return src_name + ".txt"
 
 
-def parse_txt(src_path: Path, base_dir: Path) -> Dict[str, object]:
+def _stream_to_file(p: Path, out_path: Path, front_matter: bool, chunk_size: int) -> int:
+    # Normalize p into out_path chunk by chunk; returns characters written.
+    # A partial output file is removed if decoding fails midway.
+    chars = 0
+    fm = _new_front_matter_filter() if front_matter else None
+    try:
+        with open(p, "rb") as src, open(out_path, "w", encoding="utf-8") as out:
+            for piece in iter_normalized_file(src, chunk_size):
+                if fm is not None:
+                    piece = _front_matter_feed(fm, piece)
+                out.write(piece)
+                chars = chars + len(piece)
+            if fm is not None:
+                piece = _front_matter_finish(fm)
+                out.write(piece)
+                chars = chars + len(piece)
+    except ValueError:
+        out_path.unlink(missing_ok=True)
+        raise
+    return chars
+
+
+def parse_txt(src_path: Path, base_dir: Path, stream: Optional[bool] = None, chunk_size: int = STREAM_CHUNK_BYTES, data: Optional[bytes] = None, out_name: Optional[str] = None) -> Dict[str, object]:
+    # stream=True normalizes chunk by chunk straight into the output file and
+    # leaves "text" out of the result; None streams files above the io
+    # threshold. Both paths produce identical output.
+    # data is the file's full content when the caller already read it (the
+    # detection header of a small file); the file is then not read again.
+    # out_name overrides the output file name (default: the source name).
     p = Path(src_path)
     base = Path(base_dir)
 
-    raw = _read_bytes(p)
-    text = utf8_decode_remove_bom(raw)
-    text = normalize_newlines(text)
-
     out_dir = _ensure_output_dir(base)
-    out_path = out_dir / p.name
+    out_path = out_dir / (out_name if out_name else p.name)
+    if data is None and should_stream(p, stream):
+        chars = _stream_to_file(p, out_path, False, chunk_size)
+        map_entry = mapping.capture_paths(p, out_path)
+        return {"out_path": str(out_path), "chars": chars, "mapping": map_entry}
+
+    if data is not None:
+        text = normalize_text(data)
+    else:
+        with mapped_file(p) as raw:
+            text = normalize_text(raw)
     _write_text_file(out_path, text)
 
     map_entry = mapping.capture_paths(p, out_path)
@@ -78,18 +110,85 @@ def _strip_md_front_matter(text: str) -> str:
     return new_text
 
 
-def parse_md(src_path: Path, base_dir: Path) -> Dict[str, object]:
+# Streaming front-matter removal buffers at most this many characters from
+# the top of the file. Front matter whose closing fence lies further down is
+# kept, where the in-memory path would strip it.
+FRONT_MATTER_MAX_CHARS = 64 * 1024
+
+
+def _new_front_matter_filter() -> Dict[str, object]:
+    state: Dict[str, object] = {}
+    state["scanning"] = True
+    state["buf"] = ""
+    state["stripped"] = False
+    state["after"] = 0
+    return state
+
+
+def _front_matter_feed(state: Dict[str, object], piece: str) -> str:
+    # Hold text back until the front matter is found or ruled out
+    if not state["scanning"]:
+        state["after"] = state["after"] + len(piece)
+        return piece
+    text = state["buf"] + piece
+    nl = text.find("\n")
+    if nl == -1:
+        if len(text) > FRONT_MATTER_MAX_CHARS:
+            return _front_matter_release(state, text)
+        state["buf"] = text
+        return ""
+    if text[:nl].strip() != "---":
+        return _front_matter_release(state, text)
+    pos = nl + 1
+    while True:
+        end = text.find("\n", pos)
+        if end == -1:
+            break
+        if text[pos:end].strip() == "---":
+            state["stripped"] = True
+            return _front_matter_release(state, text[end + 1:])
+        pos = end + 1
+    if len(text) > FRONT_MATTER_MAX_CHARS:
+        return _front_matter_release(state, text)
+    state["buf"] = text
+    return ""
+
+
+def _front_matter_release(state: Dict[str, object], text: str) -> str:
+    state["scanning"] = False
+    state["buf"] = ""
+    state["after"] = len(text)
+    return text
+
+
+def _front_matter_finish(state: Dict[str, object]) -> str:
+    if state["scanning"]:
+        # The whole document fit in the buffer
+        state["scanning"] = False
+        return _strip_md_front_matter(state["buf"])
+    if state["stripped"] and state["after"] == 0:
+        return "\n"
+    return ""
+
+
+def parse_md(src_path: Path, base_dir: Path, stream: Optional[bool] = None, chunk_size: int = STREAM_CHUNK_BYTES, data: Optional[bytes] = None, out_name: Optional[str] = None) -> Dict[str, object]:
     p = Path(src_path)
     base = Path(base_dir)
 
-    raw = _read_bytes(p)
-    text = utf8_decode_remove_bom(raw)
-    text = normalize_newlines(text)
-    text = _strip_md_front_matter(text)
-
     out_dir = _ensure_output_dir(base)
-    target_name = _md_target_name(p.name)
+    target_name = out_name if out_name else _md_target_name(p.name)
     out_path = out_dir / target_name
+    if data is None and should_stream(p, stream):
+        chars = _stream_to_file(p, out_path, True, chunk_size)
+        map_entry = mapping.capture_paths(p, out_path)
+        return {"out_path": str(out_path), "chars": chars, "mapping": map_entry}
+
+    if data is not None:
+        text = normalize_text(data)
+    else:
+        with mapped_file(p) as raw:
+            text = normalize_text(raw)
+    text = _strip_md_front_matter(text)
     _write_text_file(out_path, text)
     
     map_entry = mapping.capture_paths(p, out_path)
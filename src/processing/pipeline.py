@@ -1,73 +1,744 @@
 from pathlib import Path
-from typing import Callable, Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 
 from . import detection
 from . import registry
 from . import mapping as mp
+from . import io as pio
+from . import cache as pcache
+from . import chunking as pchunking
+from . import images
+from . import isolation
+from . import metrics as pmetrics
+from .pools import pool_context
 
 
-def _call_parser(fn: Callable, src: Path, base: Path, ocr_fn: Optional[Callable] = None, rasterize_fn: Optional[Callable] = None, ocr_threshold: Optional[int] = None) -> Dict[str, object]:
-    # Try calling with the richest signature first, then fall back.
-    # Avoid reflection heavy logic; attempt known combinations.
-    try:
-        if ocr_threshold is not None:
-            return fn(src, base, ocr_threshold=ocr_threshold, rasterize_fn=rasterize_fn, ocr_fn=ocr_fn)
-    except TypeError:
-        pass
-    try:
-        return fn(src, base, ocr_fn=ocr_fn)
-    except TypeError:
-        pass
-    return fn(src, base)
+_LOG = logging.getLogger(__name__)
+
+# "extension" routes by file name only. "content" sniffs the first
+# detection.HEADER_BYTES of each file, rejects files whose bytes do not
+# match their extension, and hands small files' bytes to parsers that
+# accept data=.
+DETECT_MODES = ["extension", "content"]
+
+# Run-wide options that reach only the parsers declaring them
+_OCR_OPTIONS = ["ocr_threshold", "ocr_fn", "rasterize_fn"]
+
+# Options the pipeline fills in itself; parser_options cannot set them
+_RESERVED_OPTIONS = ["data", "page_cache", "out_name"]
+
+
+def _parser_kwargs(fmt: str, opts: Dict[str, object], ocr_fn: Optional[Callable], data: Optional[bytes], out_name: Optional[str] = None) -> Dict[str, object]:
+    # Keyword options for one parser call, limited to the options the
+    # parser declares in the registry. Per-format parser_options override
+    # the run-wide OCR settings.
+    accepted = registry.parser_options(fmt)
+    supplied: Dict[str, object] = {}
+    supplied["ocr_fn"] = ocr_fn
+    supplied["rasterize_fn"] = opts.get("rasterize_fn")
+    supplied["ocr_threshold"] = opts.get("ocr_threshold")
+    supplied["page_cache"] = opts.get("cache")
+    supplied["data"] = data
+    supplied["out_name"] = out_name
+    kwargs: Dict[str, object] = {}
+    for name in supplied:
+        if supplied[name] is not None and name in accepted:
+            kwargs[name] = supplied[name]
+    per_format = opts.get("parser_options") or {}
+    extra = per_format.get(fmt) or {}
+    for name in extra:
+        kwargs[name] = extra[name]
+    return kwargs
+
+
+def _check_parser_options(parser_options: Optional[Dict[str, Dict[str, object]]]) -> None:
+    # Reject unknown formats/options before any file is parsed
+    if parser_options is None:
+        return
+    for fmt in parser_options:
+        if registry.resolve(fmt) is None:
+            raise ValueError(f"parser options for unknown format: {fmt}")
+        accepted = registry.parser_options(fmt)
+        for name in parser_options[fmt]:
+            if name in _RESERVED_OPTIONS or name not in accepted:
+                raise ValueError(f"unsupported option for {fmt} parser: {name}")
+
+
+def _callable_name(fn: Optional[Callable]) -> Optional[str]:
+    if fn is None:
+        return None
+    # Name the engine behind an OCR cache wrapper, not functools.partial
+    while getattr(fn, "__wrapped__", None) is not None:
+        fn = fn.__wrapped__
+    module = getattr(fn, "__module__", None) or ""
+    name = getattr(fn, "__qualname__", None) or getattr(fn, "__name__", None) or type(fn).__name__
+    return module + "." + name
+
+
+def _option_fingerprint(value: object) -> object:
+    # JSON-safe stand-in for an option value
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if callable(value):
+        return _callable_name(value)
+    if isinstance(value, (list, tuple)):
+        out: List[object] = []
+        for item in value:
+            out.append(_option_fingerprint(item))
+        return out
+    return type(value).__name__
+
+
+def _options_fingerprint(opts: Dict[str, object], fmt: Optional[str] = None) -> Dict[str, object]:
+    # Parser-affecting options as stored in mapping.json for incremental runs.
+    # Run-wide OCR settings count only for formats whose parser takes them,
+    # so changing them does not invalidate text, tabular or Office entries.
+    accepted = registry.parser_options(fmt) if fmt is not None else _OCR_OPTIONS
+    fp: Dict[str, object] = {}
+    for name in _OCR_OPTIONS:
+        if name in accepted:
+            fp[name] = _option_fingerprint(opts.get(name))
+    per_format = opts.get("parser_options") or {}
+    extra = per_format.get(fmt) if fmt is not None else None
+    if extra:
+        # Only this format's options, so tuning one format does not
+        # invalidate the others
+        fp_extra: Dict[str, object] = {}
+        for name in sorted(extra.keys()):
+            fp_extra[name] = _option_fingerprint(extra[name])
+        fp["parser_options"] = fp_extra
+    return fp
+
+
+def _new_options(ocr_fn: Optional[Callable], rasterize_fn: Optional[Callable], ocr_threshold: Optional[int], incremental: bool, cache: Optional[Dict[str, object]] = None, ocr_config: Optional[Dict[str, object]] = None, detect: str = "extension", parser_options: Optional[Dict[str, Dict[str, object]]] = None, isolation_limits: Optional[Dict[str, object]] = None) -> Dict[str, object]:
+    # ocr_config: {"workers", "max_queue", "timeout"} for the shared OCR
+    # executor, applied in whichever process parses the file.
+    # parser_options: {fmt: {option: value}} passed to that format's parser
+    # isolation_limits: isolation.new_limits() to parse in subprocesses
+    if detect not in DETECT_MODES:
+        raise ValueError(f"unknown detect mode: {detect}")
+    _check_parser_options(parser_options)
+    if isolation_limits is not None:
+        for value in [ocr_fn, rasterize_fn, parser_options]:
+            if not _is_picklable(value):
+                raise ValueError("isolated parsing needs picklable OCR hooks and parser options")
+    opts: Dict[str, object] = {}
+    opts["ocr_fn"] = ocr_fn
+    opts["rasterize_fn"] = rasterize_fn
+    opts["ocr_threshold"] = ocr_threshold
+    opts["incremental"] = incremental
+    opts["cache"] = cache
+    opts["ocr_config"] = ocr_config
+    opts["detect"] = detect
+    opts["parser_options"] = parser_options
+    opts["isolation"] = isolation_limits
+    return opts
+
+
+def _detect(p: Path, mode: str) -> Tuple[Optional[str], Optional[Dict[str, object]]]:
+    # Returns (fmt, detected). detected keeps the header only when it is the
+    # whole file and the parser can take it, so pool submissions stay small.
+    if mode != "content":
+        return detection.detect_handler(p), None
+    found = detection.detect_format(p)
+    fmt = found.get("handler")
+    detected: Dict[str, object] = {}
+    detected["confidence"] = found.get("confidence")
+    detected["reason"] = found.get("reason")
+    if fmt is not None and found.get("complete") is True and "data" in registry.parser_options(fmt):
+        detected["data"] = found.get("header")
+    return fmt, detected
+
+
+def _ocr_config(opts: Dict[str, object]) -> Optional[Dict[str, object]]:
+    # OCR executor settings to apply, if any OCR can run
+    if opts.get("ocr_fn") is None:
+        return None
+    return opts.get("ocr_config")
+
+
+def _apply_ocr_config(opts: Dict[str, object]) -> None:
+    cfg = _ocr_config(opts)
+    if cfg is None or opts.get("isolation") is not None:
+        # Isolated parses OCR in the worker, which applies cfg itself
+        return
+    images.apply_ocr_config(cfg)
+
+
+# Parser result keys that are not metadata worth caching
+_UNCACHED_KEYS = ["out_path", "text", "mapping", "error", "cpu_s"]
+
 
+def _cache_meta(out: Dict[str, object]) -> Dict[str, object]:
+    meta: Dict[str, object] = {}
+    for key in out:
+        if key not in _UNCACHED_KEYS:
+            meta[key] = out[key]
+    return meta
 
-def run_pipeline_for_path(src_path: Path, base_dir: Path, ocr_fn: Optional[Callable] = None, rasterize_fn: Optional[Callable] = None, ocr_threshold: Optional[int] = None) -> Dict[str, object]:
+
+def _call_parser(fn: Callable, p: Path, base: Path, kwargs: Dict[str, object], opts: Dict[str, object]) -> Dict[str, object]:
+    limits = opts.get("isolation")
+    if limits is None:
+        return fn(p, base, **kwargs)
+    return isolation.run_parser(fn, p, base, kwargs, limits, _ocr_config(opts))
+
+
+def _parse_cached(fn: Callable, p: Path, base: Path, fmt: str, opts: Dict[str, object], fingerprint: Dict[str, object], data: Optional[bytes] = None, out_name: Optional[str] = None) -> Dict[str, object]:
+    # Look the parse up in the shared cache before calling the parser, and
+    # store the parser's output after a miss.
+    cache = opts.get("cache")
+    if cache is None:
+        return _call_parser(fn, p, base, _parser_kwargs(fmt, opts, opts.get("ocr_fn"), data, out_name), opts)
+
+    # The same cache also memoizes OCR per image, so pages shared between
+    # otherwise different documents are OCR'd once
+    ocr_fn = opts.get("ocr_fn")
+    if ocr_fn is not None and not images.is_cached_ocr_fn(ocr_fn):
+        ocr_fn = images.cached_ocr_fn(ocr_fn, cache)
+
+    parser = fmt + "@" + str(fingerprint.get("parser_version"))
+    key = pcache.make_key(str(fingerprint.get("checksum")), parser, fingerprint.get("options"))
+    meta = pcache.cache_get(cache, pcache.PARSE_NAMESPACE, key)
+    if meta is not None:
+        out_path = pio.ensure_output_dir(base) / (out_name if out_name else pio.output_name_for(fmt, p.name))
+        shutil.copyfile(str(meta["data_path"]), str(out_path))
+        out: Dict[str, object] = {}
+        for k in meta:
+            if k != "data_path":
+                out[k] = meta[k]
+        out["out_path"] = str(out_path)
+        out["cache_hit"] = True
+        return out
+
+    out = _call_parser(fn, p, base, _parser_kwargs(fmt, opts, ocr_fn, data, out_name), opts)
+    out_path = out.get("out_path")
+    if out_path and not out.get("ocr_failures"):
+        # Output with failed OCR is not cached, so a later run retries it
+        meta = _cache_meta(out)
+        if isinstance(out.get("text"), str) and "chars" not in meta:
+            # Hits carry no text; keep its length for the metrics
+            meta["chars"] = len(out.get("text"))
+        try:
+            pcache.cache_put_file(cache, pcache.PARSE_NAMESPACE, key, Path(str(out_path)), meta)
+        except OSError as e:
+            # A full or read-only cache must not fail the parse
+            _LOG.info("parse cache store failed: %s", e)
+    return out
+
+
+def _source_checksum(p: Path, size: int, mtime_ns: int, prev: Optional[Dict[str, object]], trust_stat: bool, data: Optional[bytes] = None) -> str:
+    # size/mtime match the previous run: reuse its checksum instead of re-hashing
+    if trust_stat and prev is not None and prev.get("checksum"):
+        if prev.get("size") == size and prev.get("mtime_ns") == mtime_ns:
+            return str(prev.get("checksum"))
+    if data is not None and len(data) == size:
+        # Same format as io.file_checksum, from bytes already in memory
+        return "sha256:" + hashlib.sha256(data).hexdigest()
+    return pio.file_checksum(p)
+
+
+def _can_reuse(prev: Optional[Dict[str, object]], fmt: str, fingerprint: Dict[str, object], out_name: Optional[str] = None) -> bool:
+    if prev is None:
+        return False
+    if prev.get("error") is not None:
+        return False
+    if prev.get("format") != fmt:
+        return False
+    if prev.get("checksum") != fingerprint.get("checksum"):
+        return False
+    if prev.get("parser_version") != fingerprint.get("parser_version"):
+        return False
+    if prev.get("options") != fingerprint.get("options"):
+        return False
+    out_path = prev.get("out_path")
+    if not out_path or not Path(str(out_path)).exists():
+        return False
+    if out_name and Path(str(out_path)).name != out_name:
+        # The output name was reassigned (e.g. a colliding file appeared)
+        return False
+    return True
+
+
+def _process_one(src_path: Path, base_dir: Path, fmt: Optional[str], opts: Dict[str, object], prev: Optional[Dict[str, object]] = None, detected: Optional[Dict[str, object]] = None, out_name: Optional[str] = None) -> Tuple[Dict[str, object], Dict[str, object]]:
+    # Parse a single file and build its mapping entry without touching mapping.json.
+    # Returns (entry, result); callers decide how the entry is recorded.
+    # prev is the file's entry from an earlier run, used in incremental mode.
+    # detected is the content-detection record from _detect, if any.
+    # out_name is the output file name reserved for this file, if any.
     p = Path(src_path)
     base = Path(base_dir)
-    fmt = detection.detect_handler(p)
 
     entry: Dict[str, object] = {}
     entry["source"] = str(p)
     entry["format"] = fmt if fmt is not None else ""
     result: Dict[str, object] = {}
+    data = None
+    if detected is not None:
+        entry["confidence"] = detected.get("confidence")
+        data = detected.get("data")
 
     if fmt is None:
         # Unsupported; record error
         msg = "unsupported file type"
+        if detected is not None and detected.get("reason"):
+            msg = "unsupported file type: " + str(detected.get("reason"))
         entry["error"] = msg
-        mp.upsert_item(base, entry)
         result["error"] = msg
         result["ocr_used"] = False
-        return result
+        return entry, result
 
-    fn = registry.resolve(fmt)
+    try:
+        fn = registry.resolve(fmt)
+    except Exception as e:
+        # Lazily imported parser (or third-party plugin) failed to load
+        fn = None
+        _LOG.info("parser for '%s' failed to load: %s", fmt, e)
     if fn is None:
         msg = "no parser for format"
         entry["error"] = msg
-        mp.upsert_item(base, entry)
         result["error"] = msg
         result["ocr_used"] = False
-        return result
+        return entry, result
 
+    incremental = opts.get("incremental") is True
+    _apply_ocr_config(opts)
+    clock = pmetrics.start()
+    input_bytes = None
     try:
-        out = _call_parser(fn, p, base, ocr_fn=ocr_fn, rasterize_fn=rasterize_fn, ocr_threshold=ocr_threshold)
+        st = os.stat(p)
+        input_bytes = st.st_size
+        fingerprint: Dict[str, object] = {}
+        fingerprint["size"] = st.st_size
+        fingerprint["mtime_ns"] = st.st_mtime_ns
+        # The checksum only serves incremental reuse and cache keys
+        fingerprint["checksum"] = None
+        if incremental or opts.get("cache") is not None:
+            fingerprint["checksum"] = _source_checksum(p, st.st_size, st.st_mtime_ns, prev, incremental, data)
+        fingerprint["parser_version"] = registry.parser_version(fmt)
+        fingerprint["options"] = _options_fingerprint(opts, fmt)
+
+        if incremental and _can_reuse(prev, fmt, fingerprint, out_name):
+            # Unchanged input: keep the existing processed text
+            entry = dict(prev)
+            entry["size"] = fingerprint["size"]
+            entry["mtime_ns"] = fingerprint["mtime_ns"]
+            result["out_path"] = entry.get("out_path")
+            result["ocr_used"] = entry.get("ocr_used") is True
+            result["skipped"] = True
+            result["error"] = None
+            return entry, result
+
+        out = _parse_cached(fn, p, base, fmt, opts, fingerprint, data, out_name)
         # success
         entry["out_path"] = out.get("out_path")
         if out.get("ocr_used") is True:
             entry["ocr_used"] = True
         else:
             entry["ocr_used"] = False
-        mp.upsert_item(base, entry)
+        if "ocr_pages" in out:
+            entry["ocr_pages"] = out.get("ocr_pages")
+        for key in ["checksum", "size", "mtime_ns", "parser_version", "options"]:
+            if key == "checksum" and fingerprint[key] is None:
+                continue
+            entry[key] = fingerprint[key]
+        doc_metrics = pmetrics.elapsed(clock, input_bytes)
+        pmetrics.add_parser_counts(doc_metrics, out)
+        entry["metrics"] = doc_metrics
         result = out
+        result["metrics"] = doc_metrics
         result["error"] = None
         if "ocr_used" not in result:
             result["ocr_used"] = False
-        return result
+        return entry, result
     except Exception as e:
         # Failure; record error entry
         msg = str(e)
         entry["error"] = msg
-        mp.upsert_item(base, entry)
+        if isinstance(e, isolation.IsolationError):
+            # timeout / memory / zip_size / crashed
+            entry["failure"] = e.reason
+        entry["metrics"] = pmetrics.elapsed(clock, input_bytes)
         result["error"] = msg
         result["ocr_used"] = False
-        return result
+        return entry, result
+
+
+def _log_entry(entry: Dict[str, object]) -> None:
+    # One structured event per recorded document (see metrics.event)
+    # The fields also ride on the record as record.document, since a
+    # redacting formatter may rewrite the message
+    if _LOG.isEnabledFor(logging.INFO):
+        fields = pmetrics.event(entry)
+        _LOG.info(json.dumps(fields, ensure_ascii=False, sort_keys=True), extra={"document": fields})
+
+
+def run_pipeline_for_path(src_path: Path, base_dir: Path, ocr_fn: Optional[Callable] = None, rasterize_fn: Optional[Callable] = None, ocr_threshold: Optional[int] = None, store: Optional[Dict[str, object]] = None, mapping_backend: str = "json", incremental: bool = False, cache: Optional[Dict[str, object]] = None, detect: str = "extension", parser_options: Optional[Dict[str, Dict[str, object]]] = None, out_name: Optional[str] = None, isolation_limits: Optional[Dict[str, object]] = None) -> Dict[str, object]:
+    # With a mapping store (mapping.new_store) the entry is batched in memory.
+    # Without one, the "jsonl" backend appends to mapping.jsonl (compact later
+    # with mapping.compact_journal) and "json" rewrites mapping.json.
+    # In incremental mode an unchanged file is not re-parsed; the result then
+    # carries "skipped": True and no "text" (read it from out_path). With a
+    # parse cache (cache.new_cache) a hit copies cached text instead of parsing
+    # and carries "cache_hit": True, also without "text".
+    # detect="content" routes by magic bytes instead of the extension (see
+    # DETECT_MODES). parser_options ({fmt: {option: value}}) tunes a format's
+    # parser, e.g. {"csv": {"max_rows": 1000}, "pdf": {"page_workers": 4}}.
+    # out_name replaces the parser's default output file name.
+    # The entry's "metrics" (see metrics.py) are also returned as
+    # result["metrics"] for parsed files and logged as a structured event.
+    # With isolation_limits (isolation.new_limits) the parser runs in a
+    # subprocess under those limits; its result then carries no "text", and
+    # a parse stopped by a limit records the reason as the entry's "failure".
+    p = Path(src_path)
+    base = Path(base_dir)
+    opts = _new_options(ocr_fn, rasterize_fn, ocr_threshold, incremental, cache, detect=detect, parser_options=parser_options, isolation_limits=isolation_limits)
+    fmt, detected = _detect(p, detect)
+    prev = None
+    if incremental:
+        if store is not None:
+            prev = mp.store_get(store, str(p))
+        else:
+            prev = mp.find_item(mp.read_mapping(base), str(p))
+    entry, result = _process_one(p, base, fmt, opts, prev, detected, out_name)
+    if store is not None:
+        mp.store_upsert(store, entry)
+    elif mapping_backend == "jsonl":
+        mp.append_journal(base, entry)
+    else:
+        mp.upsert_item(base, entry)
+    _log_entry(entry)
+    return result
+
+
+def _process_entry(src_path: Path, base_dir: Path, fmt: Optional[str], opts: Dict[str, object], prev: Optional[Dict[str, object]], detected: Optional[Dict[str, object]] = None, out_name: Optional[str] = None) -> Tuple[Dict[str, object], bool]:
+    # Worker entry point for run_pipeline_for_dir. Only the mapping entry is
+    # sent back so large extracted texts never cross the process boundary.
+    entry, result = _process_one(src_path, base_dir, fmt, opts, prev, detected, out_name)
+    return entry, result.get("skipped") is True
+
+
+def _is_hidden(name: str) -> bool:
+    return len(name) > 0 and name[0] == "."
+
+
+def walk_source_dir(source_dir: Path, exclude_dirs: Optional[List[Path]] = None) -> List[Path]:
+    """Return every file under source_dir in a deterministic (sorted) order.
+
+    Hidden files and directories (leading dot) are skipped, as is anything
+    below one of exclude_dirs.
+    """
+    root = Path(source_dir)
+    excluded: List[str] = []
+    if exclude_dirs is not None:
+        i = 0
+        while i < len(exclude_dirs):
+            excluded.append(os.path.abspath(str(exclude_dirs[i])))
+            i = i + 1
+
+    files: List[Path] = []
+    for dirpath, dirnames, filenames in os.walk(str(root)):
+        kept_dirs: List[str] = []
+        for d in sorted(dirnames):
+            if _is_hidden(d):
+                continue
+            if os.path.abspath(os.path.join(dirpath, d)) in excluded:
+                continue
+            kept_dirs.append(d)
+        # os.walk honours in-place edits, which also fixes traversal order
+        dirnames[:] = kept_dirs
+        for name in sorted(filenames):
+            if _is_hidden(name):
+                continue
+            files.append(Path(dirpath) / name)
+    files.sort(key=str)
+    return files
+
+
+def _is_picklable(obj: object) -> bool:
+    if obj is None:
+        return True
+    try:
+        pickle.dumps(obj)
+        return True
+    except Exception:
+        return False
+
+
+def _default_process_workers() -> int:
+    n = os.cpu_count()
+    if n is None or n < 1:
+        return 1
+    return n
+
+
+def _default_thread_workers() -> int:
+    n = os.cpu_count()
+    if n is None or n < 1:
+        n = 1
+    if n + 4 > 32:
+        return 32
+    return n + 4
+
+
+def _worker_specs() -> Tuple[Dict[str, Dict[str, object]], List[str]]:
+    # Runtime-registered parsers to replay in pool workers, and the formats
+    # whose parser cannot be sent there (e.g. a lambda); those stay on threads
+    ship: Dict[str, Dict[str, object]] = {}
+    local_only: List[str] = []
+    added = registry.added_specs()
+    for fmt in added:
+        if _is_picklable(added[fmt]):
+            ship[fmt] = added[fmt]
+        else:
+            local_only.append(fmt)
+    return ship, local_only
+
+
+def _planned_formats(files: List[Path], detect: str) -> List[Optional[str]]:
+    # Formats used to reserve output names. With content detection the final
+    # format is only known once a file is sniffed; names come from the
+    # extension's handler, which names outputs the same way as any format
+    # the content can override it with, and any file may need one.
+    planned: List[Optional[str]] = []
+    i = 0
+    while i < len(files):
+        if detect == "content":
+            planned.append(detection.extension_handler(files[i]) or "")
+        else:
+            planned.append(detection.detect_handler(files[i]))
+        i = i + 1
+    return planned
+
+
+def _parser_modules(fmts: List[Optional[str]]) -> List[str]:
+    modules: List[str] = []
+    for fmt in fmts:
+        name = registry.parser_module(fmt) if fmt else None
+        if name is not None and name not in modules:
+            modules.append(name)
+    return modules
+
+
+def _error_entry(src_path: Path, fmt: Optional[str], msg: str) -> Dict[str, object]:
+    entry: Dict[str, object] = {}
+    entry["source"] = str(src_path)
+    entry["format"] = fmt if fmt is not None else ""
+    entry["error"] = msg
+    return entry
+
+
+def run_pipeline_for_dir(
+    source_dir: Path,
+    base_dir: Path,
+    ocr_fn: Optional[Callable] = None,
+    rasterize_fn: Optional[Callable] = None,
+    ocr_threshold: Optional[int] = None,
+    process_workers: Optional[int] = None,
+    thread_workers: Optional[int] = None,
+    max_in_flight: Optional[int] = None,
+    mapping_batch_size: int = 200,
+    mapping_backend: str = "json",
+    incremental: bool = False,
+    cache: Optional[Dict[str, object]] = None,
+    ocr_workers: Optional[int] = None,
+    ocr_queue: Optional[int] = None,
+    ocr_timeout: Optional[float] = images.DEFAULT_OCR_TIMEOUT,
+    detect: str = "extension",
+    parser_options: Optional[Dict[str, Dict[str, object]]] = None,
+    isolation_limits: Optional[Dict[str, object]] = None,
+    chunk_settings: Optional[Dict[str, object]] = None,
+) -> Dict[str, object]:
+    """Process every file below source_dir into base_dir/processed_documents.
+
+    Formats whose parser declares the cpu_bound capability (registry) go to
+    a process pool of process_workers, the rest to a thread pool of
+    thread_workers. A worker count of 0 disables that pool: CPU-bound files
+    then fall back to the thread pool, and with both pools disabled files
+    run inline. At most max_in_flight files are outstanding at any time
+    (default: twice the total worker count). Parsers added with
+    registry.register_parser are registered again in each pool process; one
+    that cannot be pickled runs on the thread pool instead.
+
+    Output file names are reserved for the whole walk before any file is
+    scheduled (io.reserve_output_names): files whose outputs would share a
+    name, such as a/report.pdf and b/report.docx, get a suffix hashed from
+    their relative path, so no two workers ever write the same file.
+
+    Entries are recorded in walk order regardless of completion order, so
+    mapping.json does not depend on how many workers ran. They go through a
+    mapping store that rewrites mapping.json every mapping_batch_size entries
+    and once more when the run ends, or with mapping_backend="jsonl" appends
+    each entry to mapping.jsonl and compacts it when the run ends.
+
+    With incremental=True, files whose checksum, parser version and options
+    match their mapping entry from an earlier run are not re-parsed; their
+    existing processed text is kept. With a parse cache (cache.new_cache),
+    files whose content was parsed before with the same parser version and
+    options, in any run or base_dir, are copied from the cache.
+
+    OCR calls in each worker process share one executor (images) sized by
+    ocr_workers/ocr_queue, and give up on an image after ocr_timeout seconds.
+
+    Each parser is called once per file with the options it declares in the
+    registry: the OCR hooks and threshold, the parse cache as page_cache,
+    and parser_options[fmt] ({fmt: {option: value}}), which is checked
+    against the declarations before any file is parsed. Option values must
+    be picklable when the process pool is used.
+
+    OCR hooks must be picklable (module-level functions) to be used from the
+    process pool; otherwise every file is scheduled on threads.
+
+    With detect="content" each file's header is sniffed in this process
+    before it is scheduled: files whose content does not match a supported
+    format are recorded as errors without reaching a parser, and the
+    detected format (not the extension) picks the parser and pool.
+
+    With isolation_limits (isolation.new_limits) every parse runs in its
+    own subprocess with a wall-clock timeout and a memory cap, after a
+    decompressed-size check for zip containers. A file that trips a limit
+    or kills its subprocess is recorded with the error and a "failure"
+    reason while the rest of the run continues. The process pool is then
+    not used: its process_workers are added to the thread pool, and each
+    thread drives one long-lived parse worker, replaced only after a
+    failure.
+
+    Each entry carries the document's "metrics" (wall and CPU time, input
+    bytes, output chars and page/row/sheet/OCR counts; see metrics.py),
+    which are also logged as one structured event per file as it is
+    recorded. metrics.build_report ranks them. A skipped file's entry keeps
+    the metrics of the run that parsed it.
+
+    With chunk_settings (chunking.new_settings) the run ends with a chunking
+    stage: every processed text is split into token-sized chunks, indexed
+    in processed_documents/chunks.jsonl and chunk_index.json (see
+    chunking.build_chunk_index), and the summary gains "chunks".
+
+    Returns {"total", "ok", "errors", "skipped", "items", "skipped_sources"}
+    where items are the mapping entries in walk order and skipped_sources
+    the sources of the skipped ones.
+    """
+    src_root = Path(source_dir)
+    base = Path(base_dir)
+    if not src_root.is_dir():
+        raise FileNotFoundError(f"source directory not found: {src_root}")
+
+    # Validated before any pool starts
+    ocr_config: Dict[str, object] = {"workers": ocr_workers, "max_queue": ocr_queue, "timeout": ocr_timeout}
+    opts = _new_options(ocr_fn, rasterize_fn, ocr_threshold, incremental, cache, ocr_config, detect, parser_options, isolation_limits)
+    files = walk_source_dir(src_root, exclude_dirs=[base / "processed_documents"])
+    planned = _planned_formats(files, detect)
+    out_names = pio.reserve_output_names(files, src_root, planned)
+
+    n_proc = process_workers if process_workers is not None else _default_process_workers()
+    n_thr = thread_workers if thread_workers is not None else _default_thread_workers()
+    if n_proc > 0 and (not _is_picklable(ocr_fn) or not _is_picklable(rasterize_fn)):
+        _LOG.info("process pool disabled: OCR hooks are not picklable")
+        n_proc = 0
+    if n_proc > 0 and not _is_picklable(parser_options):
+        _LOG.info("process pool disabled: parser options are not picklable")
+        n_proc = 0
+    if isolation_limits is not None:
+        # Subprocesses are started from threads; pool processes could not
+        # start their own
+        n_thr = n_thr + n_proc
+        n_proc = 0
+        isolation.preload(_parser_modules(planned))
+
+    limit = max_in_flight
+    if limit is None or limit < 1:
+        limit = 2 * (n_proc + n_thr)
+        if limit < 1:
+            limit = 1
+
+    proc_pool = None
+    thr_pool = None
+    local_only: List[str] = []
+    if n_proc > 0:
+        ship, local_only = _worker_specs()
+        proc_pool = ProcessPoolExecutor(max_workers=n_proc, mp_context=pool_context(), initializer=registry.install_specs, initargs=(ship,))
+    if n_thr > 0:
+        thr_pool = ThreadPoolExecutor(max_workers=n_thr)
+
+    store = mp.new_store(base, batch_size=mapping_batch_size, backend=mapping_backend)
+    formats: List[Optional[str]] = []
+    done: Dict[int, Tuple[Dict[str, object], bool]] = {}
+    pending: Dict[object, int] = {}
+    items: List[Dict[str, object]] = []
+    skipped_sources: List[str] = []
+    errors = 0
+    skipped = 0
+    next_submit = 0
+    next_emit = 0
+
+    try:
+        while next_emit < len(files):
+            # Keep the window of submitted-but-unrecorded files bounded
+            while next_submit < len(files) and next_submit - next_emit < limit:
+                p = files[next_submit]
+                if detect == "content":
+                    fmt, detected = _detect(p, detect)
+                else:
+                    fmt, detected = planned[next_submit], None
+                formats.append(fmt)
+                pool = thr_pool
+                if proc_pool is not None and fmt is not None and fmt not in local_only and registry.capabilities(fmt)["cpu_bound"]:
+                    pool = proc_pool
+                prev = None
+                if incremental:
+                    prev = mp.store_get(store, str(p))
+                if pool is None:
+                    done[next_submit] = _process_entry(p, base, fmt, opts, prev, detected, out_names[next_submit])
+                else:
+                    fut = pool.submit(_process_entry, p, base, fmt, opts, prev, detected, out_names[next_submit])
+                    pending[fut] = next_submit
+                next_submit = next_submit + 1
+
+            if next_emit not in done and len(pending) > 0:
+                finished, _ = wait(list(pending.keys()), return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    idx = pending.pop(fut)
+                    try:
+                        done[idx] = fut.result()
+                    except Exception as e:
+                        # Worker crashed (e.g. broken pool); keep going
+                        done[idx] = (_error_entry(files[idx], formats[idx], str(e)), False)
+
+            # Record finished entries in walk order
+            while next_emit in done:
+                entry, was_skipped = done.pop(next_emit)
+                if entry.get("error") is not None:
+                    errors = errors + 1
+                if was_skipped:
+                    skipped = skipped + 1
+                    skipped_sources.append(str(entry.get("source")))
+                mp.store_upsert(store, entry)
+                _log_entry(entry)
+                items.append(entry)
+                next_emit = next_emit + 1
+    finally:
+        mp.store_flush(store)
+        if isolation_limits is not None:
+            isolation.shutdown_workers()
+        if proc_pool is not None:
+            proc_pool.shutdown(wait=True, cancel_futures=True)
+        if thr_pool is not None:
+            thr_pool.shutdown(wait=True, cancel_futures=True)
+
+    summary: Dict[str, object] = {}
+    summary["total"] = len(items)
+    summary["ok"] = len(items) - errors
+    summary["errors"] = errors
+    summary["skipped"] = skipped
+    summary["items"] = items
+    summary["skipped_sources"] = skipped_sources
+    if chunk_settings is not None:
+        summary["chunks"] = pchunking.build_chunk_index(base, chunk_settings)
+    return summary
@@ -0,0 +1,33 @@
+# Process pool helpers shared by the pipeline, the parsers and isolation
+# Functional style, no OOP
+from typing import List
+import multiprocessing
+
+
+def pool_context():
+    """Start method for every process this package creates.
+
+    forkserver (else spawn) and never fork: the pipeline, OCR and parse
+    workers run threads, and a forked child would inherit their locks in
+    whatever state they were in.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    if "forkserver" in methods:
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def split_ranges(items: List[object], parts: int) -> List[List[object]]:
+    # Up to parts contiguous slices, so each worker walks neighbouring
+    # pages or slides
+    chunks: List[List[object]] = []
+    if parts < 1:
+        parts = 1
+    size = (len(items) + parts - 1) // parts
+    if size < 1:
+        size = 1
+    i = 0
+    while i < len(items):
+        chunks.append(items[i: i + size])
+        i = i + size
+    return chunks
@@ -1,33 +1,299 @@
 # Registry mapping from detected format keys to parser callables
 # Functional style, no OOP or regex
+#
+# Parsers are registered as "module:function" references and imported on
+# first use, so a run over text files never imports pypdf, python-docx,
+# python-pptx or openpyxl. Third-party packages add formats through the
+# ENTRY_POINT_GROUP entry points, e.g. in their pyproject.toml:
+#
+#   [project.entry-points."ai_coding_automated_setup.parsers"]
+#   html = "my_package.html_parser:parse_html"
+#
+# The entry point name is the format key and the file extension routed to
+# it. The parser may carry "capabilities" and "options" list attributes and
+# its module a PARSER_VERSION string.
+#
+# Every parser is called once per file as fn(src_path, base_dir, **kwargs)
+# with keyword options drawn from its declared option names only.
 
-from .parsers import txt_md
-from .parsers import docx_pptx
-from .parsers import tabular
-from .parsers import pdf as pdf_mod
-from .parsers import image_svg
-
-
-_REGISTRY = {
-    "txt": txt_md.parse_txt,
-    "md": txt_md.parse_md,
-    "docx": docx_pptx.parse_docx,
-    "pptx": docx_pptx.parse_pptx,
-    "xlsx": tabular.parse_xlsx,
-    "csv": tabular.parse_csv,
-    "tsv": tabular.parse_tsv,
-    "pdf": pdf_mod.parse_pdf,
-    "png": image_svg.parse_image,
-    "jpeg": image_svg.parse_image,
-    "svg": image_svg.parse_svg,
+import importlib
+import inspect
+import logging
+import sys
+from importlib import metadata
+from typing import Callable, Dict, List, Optional, Union
+
+
+_LOG = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "ai_coding_automated_setup.parsers"
+
+# Capability flags a parser can declare:
+#   streaming      handles inputs larger than memory (stream= option)
+#   page_parallel  can split one document across its own worker pool
+#   needs_ocr      takes OCR hooks (ocr_fn, rasterize_fn)
+#   cpu_bound      dominated by CPU work; the pipeline runs it on processes
+CAPABILITIES = ["streaming", "page_parallel", "needs_ocr", "cpu_bound"]
+
+
+def _capabilities(names: Optional[List[str]]) -> Dict[str, bool]:
+    caps: Dict[str, bool] = {}
+    for cap in CAPABILITIES:
+        caps[cap] = False
+    if names is None:
+        return caps
+    i = 0
+    while i < len(names):
+        if names[i] not in caps:
+            raise ValueError(f"unknown parser capability: {names[i]}")
+        caps[names[i]] = True
+        i = i + 1
+    return caps
+
+
+def _spec(target: Union[str, Callable], capabilities: Optional[List[str]], options: Optional[List[str]] = None, version: Optional[str] = None, extensions: Optional[List[str]] = None) -> Dict[str, object]:
+    # capabilities/options None means "read them from the parser when it is
+    # loaded"
+    spec: Dict[str, object] = {}
+    spec["target"] = target
+    spec["capabilities"] = _capabilities(capabilities) if capabilities is not None else None
+    spec["options"] = list(options) if options is not None else None
+    spec["version"] = version
+    spec["extensions"] = list(extensions) if extensions is not None else []
+    return spec
+
+
+_TEXT_OPTIONS = ["stream", "chunk_size", "data", "out_name"]
+_DELIMITED_OPTIONS = ["stream", "max_rows", "sample_every", "out_name"]
+_IMAGE_OPTIONS = ["ocr_fn", "ocr_executor", "out_name"]
+
+# Built-in parsers. Their extensions are routed by detection itself.
+_SPECS: Dict[str, Dict[str, object]] = {
+    "txt": _spec(".parsers.txt_md:parse_txt", ["streaming"], _TEXT_OPTIONS),
+    "md": _spec(".parsers.txt_md:parse_md", ["streaming"], _TEXT_OPTIONS),
+    "docx": _spec(".parsers.docx_pptx:parse_docx", ["cpu_bound"], ["engine", "headers_footers", "notes", "out_name"]),
+    "pptx": _spec(".parsers.docx_pptx:parse_pptx", ["cpu_bound", "page_parallel"], ["engine", "notes", "tables", "slide_workers", "out_name"]),
+    "xlsx": _spec(".parsers.tabular:parse_xlsx", ["cpu_bound", "streaming"], ["stream", "max_rows_per_sheet", "prune_empty_rows", "prune_empty_columns", "out_name"]),
+    "csv": _spec(".parsers.tabular:parse_csv", ["streaming"], _DELIMITED_OPTIONS),
+    "tsv": _spec(".parsers.tabular:parse_tsv", ["streaming"], _DELIMITED_OPTIONS),
+    "pdf": _spec(
+        ".parsers.pdf:parse_pdf",
+        ["cpu_bound", "page_parallel", "needs_ocr"],
+        ["ocr_threshold", "rasterize_fn", "ocr_fn", "page_workers", "page_cache", "rasterize_page_fn", "ocr_executor", "out_name"],
+    ),
+    "png": _spec(".parsers.image_svg:parse_image", ["needs_ocr"], _IMAGE_OPTIONS),
+    "jpeg": _spec(".parsers.image_svg:parse_image", ["needs_ocr"], _IMAGE_OPTIONS),
+    "svg": _spec(".parsers.image_svg:parse_svg", [], ["out_name"]),
 }
 
+# The built-in specs as shipped; anything else in _SPECS was added at
+# runtime and is unknown to a fresh interpreter (e.g. a pool worker)
+_BUILTIN_SPECS: Dict[str, Dict[str, object]] = dict(_SPECS)
+
+# Resolved parsers and output versions, filled on first use. Incremental
+# runs re-parse any file recorded with a different version, so a parser
+# module bumps its PARSER_VERSION whenever the text it extracts for the
+# same input changes.
+_REGISTRY: Dict[str, Callable] = {}
+_VERSIONS: Dict[str, Optional[str]] = {}
+
+_DISCOVERY = {"done": False}
+
+
+def _import_target(target: str) -> Callable:
+    sep = target.find(":")
+    if sep == -1:
+        raise ValueError(f"parser target must be 'module:function': {target}")
+    module_name = target[:sep]
+    if module_name.startswith("."):
+        module = importlib.import_module(module_name, __package__)
+    else:
+        module = importlib.import_module(module_name)
+    obj = module
+    for part in target[sep + 1:].split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _declared_options(fn: Callable) -> List[str]:
+    # A parser without an "options" attribute declares its keyword
+    # parameters after (src_path, base_dir); read once when it is loaded
+    declared = getattr(fn, "options", None)
+    if declared is not None:
+        return list(declared)
+    names: List[str] = []
+    try:
+        params = list(inspect.signature(fn).parameters.values())
+    except (TypeError, ValueError):
+        return names
+    i = 2
+    while i < len(params):
+        if params[i].kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY):
+            names.append(params[i].name)
+        i = i + 1
+    return names
+
+
+def _load(fmt: str) -> Optional[Callable]:
+    spec = _SPECS.get(fmt)
+    if spec is None:
+        return None
+    target = spec["target"]
+    fn = target if callable(target) else _import_target(str(target))
+    if spec["capabilities"] is None:
+        spec["capabilities"] = _capabilities(getattr(fn, "capabilities", None))
+    if spec["options"] is None:
+        spec["options"] = _declared_options(fn)
+    version = spec["version"]
+    if version is None:
+        module = sys.modules.get(getattr(fn, "__module__", ""))
+        version = getattr(module, "PARSER_VERSION", None)
+    _REGISTRY[fmt] = fn
+    _VERSIONS[fmt] = version
+    return fn
+
+
+def discover_parsers() -> List[str]:
+    """Register parsers from installed ENTRY_POINT_GROUP entry points.
+
+    Runs once; later calls return []. Entry points never replace a format
+    that is already registered. Returns the formats added.
+    """
+    if _DISCOVERY["done"]:
+        return []
+    _DISCOVERY["done"] = True
+    added: List[str] = []
+    try:
+        eps = metadata.entry_points(group=ENTRY_POINT_GROUP)
+    except Exception as e:
+        _LOG.info("parser entry point discovery failed: %s", e)
+        return added
+    for ep in eps:
+        if ep.name in _SPECS:
+            _LOG.info("skip: parser entry point '%s' duplicates a registered format", ep.name)
+            continue
+        _SPECS[ep.name] = _spec(ep.value, None, None, None, [ep.name])
+        added.append(ep.name)
+    return added
+
+
+def register_parser(fmt: str, target: Union[str, Callable], capabilities: Optional[List[str]] = None, version: Optional[str] = None, extensions: Optional[List[str]] = None, options: Optional[List[str]] = None) -> None:
+    """Register (or replace) the parser for fmt.
+
+    target is a callable or a "module:function" reference imported on first
+    use. capabilities lists CAPABILITIES flags (default: taken from the
+    parser's "capabilities" attribute). options names the keyword options
+    the parser accepts (default: its "options" attribute, else its keyword
+    parameters). version defaults to the parser module's PARSER_VERSION.
+    extensions are lower-case file extensions, without the dot, that
+    detection routes to fmt.
+    """
+    if not isinstance(fmt, str) or fmt == "":
+        raise ValueError("parser format must be a non-empty string")
+    if not callable(target) and not isinstance(target, str):
+        raise ValueError("parser target must be a callable or 'module:function'")
+    _SPECS[fmt] = _spec(target, capabilities, options, version, extensions)
+    _REGISTRY.pop(fmt, None)
+    _VERSIONS.pop(fmt, None)
+
+
+def added_specs() -> Dict[str, Dict[str, object]]:
+    """Specs registered or replaced since import, by format.
+
+    Pass them to install_specs in a worker process so it resolves the same
+    parsers as this one. Entry point formats are included; the worker would
+    find them too, but this saves it a scan.
+    """
+    added: Dict[str, Dict[str, object]] = {}
+    for fmt in _SPECS:
+        if _SPECS[fmt] is not _BUILTIN_SPECS.get(fmt):
+            added[fmt] = dict(_SPECS[fmt])
+    return added
+
+
+def install_specs(specs: Dict[str, Dict[str, object]]) -> None:
+    # Counterpart of added_specs, e.g. as a process pool initializer
+    for fmt in specs:
+        _SPECS[fmt] = dict(specs[fmt])
+        _REGISTRY.pop(fmt, None)
+        _VERSIONS.pop(fmt, None)
+
+
+def unregister_parser(fmt: str) -> None:
+    _SPECS.pop(fmt, None)
+    _REGISTRY.pop(fmt, None)
+    _VERSIONS.pop(fmt, None)
+
+
+def formats() -> List[str]:
+    discover_parsers()
+    return list(_SPECS.keys())
+
+
+def format_for_extension(ext: str) -> Optional[str]:
+    # Extension routing for parsers registered with extensions (built-ins
+    # are routed by detection directly)
+    discover_parsers()
+    for fmt in _SPECS:
+        if ext in _SPECS[fmt]["extensions"]:
+            return fmt
+    return None
+
+
+def parser_module(fmt) -> Optional[str]:
+    # Absolute module name of fmt's parser, without importing it
+    spec = _SPECS.get(fmt)
+    if spec is None or not isinstance(spec["target"], str):
+        return None
+    module_name = str(spec["target"]).split(":")[0]
+    if module_name.startswith("."):
+        return __package__ + module_name
+    return module_name
+
 
 def get_registry():
+    # Loads every registered parser; prefer resolve() for a single format
+    for fmt in formats():
+        if fmt not in _REGISTRY:
+            _load(fmt)
     return _REGISTRY
 
 
 def resolve(fmt):
     if fmt in _REGISTRY:
         return _REGISTRY[fmt]
-    return None
+    if fmt not in _SPECS:
+        discover_parsers()
+    return _load(fmt)
+
+
+def parser_version(fmt):
+    if fmt in _VERSIONS:
+        return _VERSIONS[fmt]
+    if resolve(fmt) is None:
+        return None
+    return _VERSIONS.get(fmt)
+
+
+def capabilities(fmt) -> Dict[str, bool]:
+    """Capability flags of fmt's parser; all False for unknown formats."""
+    if fmt not in _SPECS:
+        discover_parsers()
+    spec = _SPECS.get(fmt)
+    if spec is None:
+        return _capabilities(None)
+    if spec["capabilities"] is None:
+        _load(fmt)
+    return dict(spec["capabilities"])
+
+
+def parser_options(fmt) -> List[str]:
+    """Keyword options fmt's parser accepts; [] for unknown formats."""
+    if fmt not in _SPECS:
+        discover_parsers()
+    spec = _SPECS.get(fmt)
+    if spec is None:
+        return []
+    if spec["options"] is None:
+        _load(fmt)
+    return list(spec["options"])
@@ -8,6 +8,7 @@ from typing import Any, Dict, List, Optional, Union, cast
 import httpx
 from typing_extensions import TypedDict
 from src.providers.retry import async_retry
+from src.processing import chunking
 import os
 
 from src.providers.interface import (
@@ -23,6 +24,9 @@ from src.providers.interface import (
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Tokens budgeted for each chunk's "### source (part i of n)" heading
+CHUNK_HEADING_TOKENS = 16
+
 # Type aliases
 Message = Dict[str, str]
 MessageList = List[Message]
@@ -46,6 +50,13 @@ class AnthropicProvider:
                 - stop_sequences: List of stop sequences (default: ["\n\nHuman:"])
                 - timeout: Request timeout in seconds (default: 30.0)
                 - max_retries: Maximum number of retries for failed requests (default: 3)
+                - context_token_budget: Token budget for document context; when set,
+                  documents are chunked and only the chunks that fit are sent
+                  (default: None, full documents)
+                - context_chunk_tokens: Chunk size used with a budget (default: 512)
+                - context_chunk_dir: Base directory of a persisted chunk index
+                  (processed_documents/chunks.jsonl) to draw budgeted context from
+                  when no processed_docs are passed (default: None)
         """
         # Resolve API key from direct value or environment variable name
         api_key_value = config.get("api_key")
@@ -69,6 +80,9 @@ class AnthropicProvider:
         self.stop_sequences = config.get("stop_sequences", ["\n\nHuman:"])
         self.timeout = config.get("timeout", 30.0)
         self.max_retries = config.get("max_retries", 3)
+        self.context_token_budget = config.get("context_token_budget")
+        self.context_chunk_tokens = config.get("context_chunk_tokens", chunking.DEFAULT_CHUNK_TOKENS)
+        self.context_chunk_dir = config.get("context_chunk_dir")
         
         # HTTP client
         self.client = httpx.AsyncClient(
@@ -98,6 +112,9 @@ class AnthropicProvider:
             "stop_sequences": self.stop_sequences,
             "timeout": self.timeout,
             "max_retries": self.max_retries,
+            "context_token_budget": self.context_token_budget,
+            "context_chunk_tokens": self.context_chunk_tokens,
+            "context_chunk_dir": self.context_chunk_dir,
         }
     
     @classmethod
@@ -108,7 +125,9 @@ class AnthropicProvider:
     async def prepare_prompt(
         self, 
         prompt_bundle: Dict[str, str],
-        processed_docs: Optional[List[Dict[str, Any]]] = None
+        processed_docs: Optional[List[Dict[str, Any]]] = None,
+        token_budget: Optional[int] = None,
+        chunk_dir: Optional[str] = None
     ) -> str:
         """Prepare a prompt for the Anthropic API.
         
@@ -117,6 +136,14 @@ class AnthropicProvider:
                 Should contain keys like "plan", "tickets", "checklist", etc.
             processed_docs: List of processed documents to include in the prompt.
                 Each document should be a dictionary with at least a "text" key.
+            token_budget: Token budget for the document context (default: the
+                context_token_budget config). With a budget, documents are split
+                into chunks and the chunks most relevant to the prompt bundle are
+                sent, up to the budget; without one, every document is sent whole.
+            chunk_dir: Base directory whose chunk index (built by process-docs
+                --chunk-tokens) supplies the chunks when processed_docs is not
+                given (default: the context_chunk_dir config). Used only with a
+                token budget; the index's own chunk size applies.
                 
         Returns:
             A JSON string containing the prepared prompt and metadata.
@@ -132,7 +159,19 @@ class AnthropicProvider:
         user_prompt_parts = []
         
         # Add document content if provided
-        if processed_docs:
+        budget = token_budget if token_budget is not None else self.context_token_budget
+        index_dir = chunk_dir if chunk_dir is not None else self.context_chunk_dir
+        chunks = None
+        if budget is not None and processed_docs:
+            settings = chunking.new_settings(self.context_chunk_tokens)
+            chunks = chunking.document_chunks(processed_docs, settings)
+        elif budget is not None and index_dir is not None:
+            chunks = chunking.load_chunks(index_dir)
+        if chunks is not None:
+            docs_section = self._budgeted_context(prompt_bundle, chunks, budget)
+            if docs_section.strip():
+                user_prompt_parts.append(docs_section.strip())
+        elif processed_docs:
             docs_section = "## Context\n\n"
             for i, doc in enumerate(processed_docs, 1):
                 doc_text = doc.get("text", "").strip()
@@ -164,6 +203,30 @@ class AnthropicProvider:
             **prompt_bundle  # Include all prompt templates in the output
         })
     
+    def _budgeted_context(
+        self,
+        prompt_bundle: Dict[str, str],
+        chunks: List[Dict[str, Any]],
+        budget: int
+    ) -> str:
+        """Build the context section from the chunks that fit the budget.
+
+        Chunks come from chunking.document_chunks or chunking.load_chunks;
+        persisted ones are read from their text file by byte offsets.
+        """
+        query_parts = []
+        for value in prompt_bundle.values():
+            if value:
+                query_parts.append(str(value))
+        query = " ".join(query_parts)
+        selected = chunking.select_chunks(chunks, budget, query, overhead_tokens=CHUNK_HEADING_TOKENS)
+        docs_section = "## Context\n\n"
+        for chunk in selected:
+            text = chunking.chunk_text(chunk).strip()
+            if text:
+                docs_section += f"### {chunk['source']} (part {chunk['index'] + 1} of {chunk['count']})\n{text}\n\n"
+        return docs_section
+    
     async def call(self, prepared_prompt: str) -> Dict[str, Any]:
         """Call the Anthropic API with the prepared prompt.
         
@@ -0,0 +1,141 @@
+from pathlib import Path
+import json
+import os
+
+from src.processing import cache as pc
+from src.processing import mapping as mp
+from src.processing import pipeline as pl
+from src.processing import registry
+
+
+def test_put_get_and_stats(tmp_path: Path):
+    cache = pc.new_cache(tmp_path / "cache", max_bytes=10_000)
+    key = pc.make_key("sha256:abc", "txt@1", {"ocr_threshold": None})
+    assert pc.cache_get(cache, "parse", key) is None
+
+    src = tmp_path / "payload.txt"
+    src.write_text("hello", encoding="utf-8")
+    pc.cache_put_file(cache, "parse", key, src, {"rows": 3})
+    meta = pc.cache_get(cache, "parse", key)
+    assert meta["rows"] == 3
+    assert Path(meta["data_path"]).read_text(encoding="utf-8") == "hello"
+
+    pc.cache_put_text(cache, "ocr", "k" * 64, "ocr text")
+    assert pc.cache_get_text(cache, "ocr", "k" * 64) == "ocr text"
+
+    stats = pc.cache_stats(cache)
+    assert stats["entries"] == 2
+    assert stats["namespaces"]["parse"]["entries"] == 1
+    assert stats["bytes"] > 0
+
+
+def test_keys_depend_on_parser_and_options():
+    a = pc.make_key("sha256:x", "pdf@1", {"ocr_threshold": 10})
+    b = pc.make_key("sha256:x", "pdf@1", {"ocr_threshold": 20})
+    c = pc.make_key("sha256:x", "pdf@2", {"ocr_threshold": 10})
+    assert len(set([a, b, c])) == 3
+    assert a == pc.make_key("sha256:x", "pdf@1", {"ocr_threshold": 10})
+
+
+def test_prune_evicts_least_recently_used(tmp_path: Path):
+    cache = pc.new_cache(tmp_path / "cache", max_bytes=1_000_000)
+    i = 0
+    while i < 3:
+        pc.cache_put_text(cache, "parse", str(i) * 64, "x" * 100)
+        meta = pc._paths(cache, "parse", str(i) * 64)["meta"]
+        os.utime(meta, (1000 + i, 1000 + i))
+        i = i + 1
+    # Reading entry 0 makes it the most recently used
+    assert pc.cache_get(cache, "parse", "0" * 64) is not None
+
+    per_entry = pc.cache_stats(cache)["bytes"] // 3
+    res = pc.cache_prune(cache, max_bytes=per_entry * 2)
+    assert res["removed"] == 1
+    assert pc.cache_get(cache, "parse", "1" * 64) is None
+    assert pc.cache_get(cache, "parse", "0" * 64) is not None
+    assert pc.cache_get(cache, "parse", "2" * 64) is not None
+
+
+def test_put_prunes_when_over_cap(tmp_path: Path):
+    cache = pc.new_cache(tmp_path / "cache", max_bytes=500)
+    i = 0
+    while i < 10:
+        pc.cache_put_text(cache, "parse", str(i) * 64, "y" * 200)
+        i = i + 1
+    assert pc.cache_stats(cache)["bytes"] <= 500
+
+
+def test_put_prunes_to_a_low_watermark_and_counts_other_writers(tmp_path: Path, monkeypatch):
+    cache = pc.new_cache(tmp_path / "cache", max_bytes=10_000)
+    walks = []
+    real = pc._list_entries
+    monkeypatch.setattr(pc, "_list_entries", lambda c: walks.append(1) or real(c))
+    i = 0
+    while i < 200:
+        pc.cache_put_text(cache, "parse", "%064d" % i, "y" * 200)
+        i = i + 1
+    assert pc.cache_stats(cache)["bytes"] <= 10_000
+    # Pruning leaves 10% headroom (about 5 entries here), so only every few
+    # puts walks the cache, not every put once it is full
+    assert len(walks) < 50
+
+    # Another process filled the cache behind this dict's estimate
+    other = pc.new_cache(tmp_path / "cache", max_bytes=10_000)
+    other["approx_bytes"] = 0
+    j = 0
+    while j < 100:
+        pc.cache_put_text(other, "ocr", "%064d" % j, "z" * 200)
+        j = j + 1
+    assert pc.cache_stats(cache)["bytes"] <= 10_000
+
+
+def test_pipeline_reuses_cache_across_base_dirs(tmp_path: Path, monkeypatch):
+    cache = pc.new_cache(tmp_path / "cache")
+    src = tmp_path / "shared.csv"
+    src.write_text("a,b\n1,2\n", encoding="utf-8")
+
+    first = pl.run_pipeline_for_path(src, tmp_path / "proj1", cache=cache)
+    assert first.get("cache_hit") is None
+    assert first["rows"] == 2
+
+    calls = []
+
+    def boom(*args, **kwargs):
+        calls.append(args)
+        raise AssertionError("parser should not run on a cache hit")
+
+    monkeypatch.setitem(registry._REGISTRY, "csv", boom)
+    second = pl.run_pipeline_for_path(src, tmp_path / "proj2", cache=cache)
+    assert calls == []
+    assert second["cache_hit"] is True
+    assert second["rows"] == 2
+    out2 = Path(second["out_path"])
+    assert out2 == tmp_path / "proj2" / "processed_documents" / "text" / "shared.txt"
+    assert out2.read_text(encoding="utf-8") == Path(first["out_path"]).read_text(encoding="utf-8")
+    entry = mp.find_item(mp.read_mapping(tmp_path / "proj2"), str(src))
+    assert entry["out_path"] == str(out2)
+
+
+def _last_json_line(text: str):
+    lines = text.strip().splitlines()
+    return json.loads(lines[-1])
+
+
+def test_cli_cache_stats_and_prune(tmp_path: Path, capsys):
+    from src.cli import main
+
+    cache = pc.new_cache(tmp_path / "cache")
+    pc.cache_put_text(cache, "parse", "a" * 64, "z" * 50)
+
+    code = main(["cache", "stats", "--cache-dir", str(tmp_path / "cache")])
+    out, err = capsys.readouterr()
+    assert code == 0
+    stats = _last_json_line(out)
+    assert stats["entries"] == 1
+    assert stats["namespaces"]["parse"]["entries"] == 1
+
+    code = main(["cache", "prune", "--cache-dir", str(tmp_path / "cache"), "--max-bytes", "0"])
+    out, err = capsys.readouterr()
+    assert code == 0
+    assert _last_json_line(out)["removed"] == 1
+    assert pc.cache_stats(cache)["entries"] == 0
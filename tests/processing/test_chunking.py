@@ -0,0 +1,144 @@
+from pathlib import Path
+import json
+
+import pytest
+
+from src.cli import main
+from src.processing import chunking
+from src.processing import pipeline as pl
+
+
+def _words(n: int, tag: str) -> str:
+    parts = []
+    i = 0
+    while i < n:
+        parts.append(tag + str(i))
+        i = i + 1
+    return " ".join(parts)
+
+
+def test_approx_tokens():
+    assert chunking.approx_tokens("") == 0
+    assert chunking.approx_tokens("a" * 35) == 10
+    # CJK counts about one token per character
+    assert chunking.approx_tokens("中文字符") == 4
+
+
+def test_split_text_follows_boundaries_and_covers_text():
+    paras = []
+    i = 0
+    while i < 6:
+        paras.append(_words(30, "p" + str(i) + "w"))
+        i = i + 1
+    text = "\n\n".join(paras) + "\n"
+    spans = chunking.split_text(text, max_tokens=120)
+    assert len(spans) > 1
+    pos = 0
+    for span in spans:
+        assert span["start"] == pos
+        assert span["tokens"] <= 120
+        pos = span["end"]
+    assert pos == len(text)
+    # Whole paragraphs only: every chunk after the first starts a paragraph
+    for span in spans[1:]:
+        assert text[span["start"] - 2:span["start"]] == "\n\n"
+
+    # One huge line falls back to words, then characters
+    long_word = "x" * 2000
+    for span in chunking.split_text(_words(400, "w") + " " + long_word, max_tokens=50):
+        assert span["tokens"] <= 50
+
+
+def test_split_text_overlap_and_custom_counter():
+    text = _words(200, "w")
+
+    def count_words(s):
+        return len(s.split())
+
+    spans = chunking.split_text(text, max_tokens=50, overlap_tokens=10, count_fn=count_words)
+    assert spans[0]["tokens"] == 50
+    assert spans[1]["start"] < spans[0]["end"]
+    overlap = text[spans[1]["start"]:spans[0]["end"]]
+    assert count_words(overlap) == 10
+    assert spans[-1]["end"] == len(text)
+    with pytest.raises(ValueError):
+        chunking.new_settings(max_tokens=10, overlap_tokens=10)
+
+
+def test_chunk_ids_are_stable_and_offsets_address_the_file(tmp_path: Path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.txt").write_text("é" * 100 + "\n\n" + _words(300, "a") + "\n\n" + "中文" * 50, encoding="utf-8")
+    (src / "b.md").write_text("# b\n\n" + _words(300, "b"), encoding="utf-8")
+    (src / "bad.bin").write_bytes(b"\x00")
+
+    settings = chunking.new_settings(max_tokens=100)
+    summary = pl.run_pipeline_for_dir(src, tmp_path, process_workers=0, thread_workers=0, chunk_settings=settings)
+    assert summary["chunks"]["documents"] == 2
+    assert summary["chunks"]["reused"] == 0
+
+    chunks = chunking.load_chunks(tmp_path)
+    assert len(chunks) == summary["chunks"]["chunks"]
+    for chunk in chunks:
+        text = Path(chunk["out_path"]).read_text(encoding="utf-8")
+        assert chunking.chunk_text(chunk) == text[chunk["start"]:chunk["end"]]
+    ids = []
+    for chunk in chunks:
+        ids.append(chunk["id"])
+    assert len(set(ids)) == len(ids)
+
+    index = json.loads(chunking.index_path(tmp_path).read_text(encoding="utf-8"))
+    assert index["settings"]["max_tokens"] == 100
+    assert len(index["docs"]) == 2
+
+    # Unchanged texts are reused, and ids do not change
+    again = chunking.build_chunk_index(tmp_path, settings)
+    assert again["reused"] == 2
+    ids_again = []
+    for chunk in chunking.load_chunks(tmp_path):
+        ids_again.append(chunk["id"])
+    assert ids_again == ids
+
+    # Other settings rebuild everything
+    assert chunking.build_chunk_index(tmp_path, chunking.new_settings(max_tokens=60))["reused"] == 0
+
+
+def test_select_chunks_within_budget():
+    docs = [
+        {"text": _words(200, "alpha"), "metadata": {"source": "a.txt"}},
+        {"text": _words(200, "beta") + "\n\ndatabase migration plan", "metadata": {"source": "b.txt"}},
+        {"text": "short", "metadata": {}},
+    ]
+    chunks = chunking.document_chunks(docs, chunking.new_settings(max_tokens=80))
+    assert chunks[-1]["source"] == "document_3"
+
+    picked = chunking.select_chunks(chunks, 200)
+    total = 0
+    sources = []
+    for chunk in picked:
+        total = total + chunk["tokens"]
+        if chunk["source"] not in sources:
+            sources.append(chunk["source"])
+    assert total <= 200
+    # Breadth-first: every document gets its first chunk
+    assert sources == ["a.txt", "b.txt", "document_3"]
+
+    target = None
+    for chunk in chunks:
+        if "database migration plan" in chunk["text"]:
+            target = chunk
+    assert target["index"] > 0
+    # The chunk sharing words with the query wins the budget
+    relevant = chunking.select_chunks(chunks, target["tokens"], query="Write the database migration plan")
+    assert relevant == [target]
+    assert chunking.select_chunks(chunks, 0) == []
+
+
+def test_cli_chunk_flags(tmp_path: Path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.txt").write_text(_words(500, "w"), encoding="utf-8")
+    code = main(["process-docs", "--source-dir", str(src), "--base-dir", str(tmp_path), "--workers", "0", "--io-workers", "0", "--chunk-tokens", "200", "--chunk-overlap", "20"])
+    assert code == 0
+    assert len(chunking.load_chunks(tmp_path)) > 1
+    assert main(["process-docs", "--source-dir", str(src), "--base-dir", str(tmp_path), "--chunk-tokens", "0"]) == 2
@@ -67,3 +67,100 @@ def test_svg_text_extraction(tmp_path: Path):
     assert "Beta" in out.get("text", "")
     assert out.get("ocr_used") is False
     assert str(out.get("out_path")).endswith(str(Path("processed_documents") / "text" / "vector.txt"))
+
+
+def _svg_doc(body: str) -> str:
+    return "<?xml version=\"1.0\"?><svg xmlns=\"http://www.w3.org/2000/svg\">" + body + "</svg>"
+
+
+def test_svg_tspans_titles_and_descriptions(tmp_path: Path):
+    from src.processing.parsers import image_svg
+
+    src = tmp_path / "poster.svg"
+    src.write_text(_svg_doc(
+        "<title>Poster</title><desc>Quarterly\n   results</desc>"
+        "<g><text x=\"0\" y=\"0\">\n  <tspan x=\"0\" y=\"10\">Line one</tspan>\n  <tspan x=\"0\" y=\"30\">Line <tspan font-weight=\"bold\">two</tspan> end</tspan>\n</text></g>"
+        "<text>Hello <tspan fill=\"red\">World</tspan>!</text>"
+    ), encoding="utf-8")
+    out = image_svg.parse_svg(src, tmp_path)
+    assert out["text"] == "Poster\nQuarterly results\nLine one\nLine two end\nHello World!\n"
+
+
+def test_svg_skips_large_non_text_subtrees(tmp_path: Path):
+    from src.processing.parsers import image_svg
+
+    blob = "A" * 2000000
+    src = tmp_path / "export.svg"
+    src.write_text(_svg_doc(
+        "<defs><image href=\"data:image/png;base64," + blob + "\"/></defs>"
+        "<path d=\"" + "M0 0 L1 1 " * 20000 + "\"/><text>Caption</text>"
+    ), encoding="utf-8")
+    assert image_svg.parse_svg(src, tmp_path)["text"] == "Caption\n"
+
+    broken = tmp_path / "broken.svg"
+    broken.write_text(_svg_doc("<text>Kept</text><text>cut"), encoding="utf-8")
+    broken.write_text(broken.read_text(encoding="utf-8")[:-len("</svg>")], encoding="utf-8")
+    assert image_svg.parse_svg(broken, tmp_path)["text"] == "Kept\n"
+
+
+def _shout(data: bytes) -> str:
+    return "OCR " + str(len(data))
+
+
+def test_parse_batch_keeps_order_and_isolates_failures(tmp_path: Path):
+    from src.processing.parsers import image_svg
+
+    sources = []
+    i = 0
+    while i < 40:
+        p = tmp_path / "in" / f"s{i:02d}.svg"
+        p.parent.mkdir(exist_ok=True)
+        _make_svg(p, [f"Label {i}"])
+        sources.append(p)
+        i = i + 1
+    png = tmp_path / "in" / "scan.png"
+    png.write_bytes(b"12345")
+    sources.insert(3, png)
+    sources.insert(5, tmp_path / "in" / "missing.png")
+    sources.append(tmp_path / "in" / "missing.svg")
+
+    out_names = [None] * len(sources)
+    out_names[0] = "first.txt"
+    results = image_svg.parse_batch(sources, tmp_path / "out", workers=2, ocr_fn=_shout, out_names=out_names)
+    assert len(results) == len(sources)
+    k = 0
+    while k < len(sources):
+        assert results[k]["source"] == str(sources[k])
+        k = k + 1
+    text_dir = tmp_path / "out" / "processed_documents" / "text"
+    assert (text_dir / "first.txt").read_text(encoding="utf-8") == "Label 0\n"
+    assert (text_dir / "s39.txt").read_text(encoding="utf-8") == "Label 39\n"
+    assert results[3]["ocr_used"] is True
+    assert (text_dir / "scan.txt").read_text(encoding="utf-8") == "OCR 5"
+    # An unreadable image gets no OCR text; a missing SVG is an error
+    assert results[5]["ocr_used"] is False
+    assert "error" in results[-1]
+    assert "text" not in results[1]
+
+
+def test_parse_batch_maps_images_for_ocr(tmp_path: Path):
+    from src.processing.parsers import image_svg
+
+    seen = []
+
+    def ocr(data) -> str:
+        seen.append(type(data))
+        return "page " + bytes(data[:2]).decode("ascii")
+    ocr.accepts_memoryview = True
+
+    sources = []
+    i = 0
+    while i < 3:
+        p = tmp_path / f"scan{i}.png"
+        p.write_bytes(f"p{i}".encode("ascii") + b"\0" * 64)
+        sources.append(p)
+        i = i + 1
+    results = image_svg.parse_batch(sources, tmp_path / "out", ocr_fn=ocr)
+    assert seen == [memoryview, memoryview, memoryview]
+    assert (tmp_path / "out" / "processed_documents" / "text" / "scan2.txt").read_text(encoding="utf-8") == "page p2"
+    assert results[0]["ocr_used"] is True
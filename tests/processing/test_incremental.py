@@ -0,0 +1,120 @@
+from pathlib import Path
+import os
+
+from src.processing import mapping as mp
+from src.processing import pipeline as pl
+from src.processing import registry
+
+
+def _make_src(root: Path):
+    root.mkdir()
+    (root / "a.txt").write_text("alpha", encoding="utf-8")
+    (root / "b.csv").write_text("x,y\n1,2\n", encoding="utf-8")
+
+
+def _run(src: Path, base: Path, **kwargs):
+    return pl.run_pipeline_for_dir(src, base, process_workers=0, thread_workers=0, incremental=True, **kwargs)
+
+
+def test_entries_record_checksum_and_stat(tmp_path: Path):
+    src = tmp_path / "src"
+    _make_src(src)
+    base = tmp_path / "out"
+    summary = _run(src, base)
+    assert summary["skipped"] == 0
+
+    entry = mp.find_item(mp.read_mapping(base), str(src / "a.txt"))
+    assert entry["checksum"].startswith("sha256:")
+    assert entry["size"] == 5
+    assert entry["mtime_ns"] == os.stat(src / "a.txt").st_mtime_ns
+    assert entry["parser_version"] == registry.parser_version("txt")
+    # txt takes no OCR settings, so they are not part of its fingerprint
+    assert "ocr_threshold" not in entry["options"]
+
+
+def test_unchanged_files_are_skipped(tmp_path: Path):
+    src = tmp_path / "src"
+    _make_src(src)
+    base = tmp_path / "out"
+    _run(src, base)
+    before = mp.read_mapping(base)
+
+    summary = _run(src, base)
+    assert summary["skipped"] == 2
+    assert summary["errors"] == 0
+    assert mp.read_mapping(base) == before
+
+
+def test_touched_but_identical_file_is_skipped_by_checksum(tmp_path: Path):
+    src = tmp_path / "src"
+    _make_src(src)
+    base = tmp_path / "out"
+    _run(src, base)
+
+    st = os.stat(src / "a.txt")
+    os.utime(src / "a.txt", ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+    summary = _run(src, base)
+    assert summary["skipped"] == 2
+    entry = mp.find_item(mp.read_mapping(base), str(src / "a.txt"))
+    assert entry["mtime_ns"] == st.st_mtime_ns + 5_000_000_000
+
+
+def test_changed_content_options_version_or_missing_output_reparse(tmp_path: Path, monkeypatch):
+    src = tmp_path / "src"
+    _make_src(src)
+    base = tmp_path / "out"
+    _run(src, base)
+
+    (src / "a.txt").write_text("alpha beta", encoding="utf-8")
+    summary = _run(src, base)
+    assert summary["skipped"] == 1
+    assert (base / "processed_documents" / "text" / "a.txt").read_text(encoding="utf-8") == "alpha beta\n"
+
+    # Options of one format reparse only that format's files
+    csv_opts = {"csv": {"max_rows": 5}}
+    summary = _run(src, base, parser_options=csv_opts)
+    assert summary["skipped"] == 1
+
+    monkeypatch.setitem(registry._VERSIONS, "csv", "test-bump")
+    summary = _run(src, base, parser_options=csv_opts)
+    assert summary["skipped"] == 1
+
+    os.remove(base / "processed_documents" / "text" / "a.txt")
+    summary = _run(src, base, parser_options=csv_opts)
+    assert summary["skipped"] == 1
+    assert (base / "processed_documents" / "text" / "a.txt").exists()
+
+
+def test_run_pipeline_for_path_incremental(tmp_path: Path):
+    src = tmp_path / "note.md"
+    src.write_text("# hi\n", encoding="utf-8")
+
+    first = pl.run_pipeline_for_path(src, tmp_path, incremental=True)
+    assert first.get("skipped") is None
+    second = pl.run_pipeline_for_path(src, tmp_path, incremental=True)
+    assert second["skipped"] is True
+    assert second["error"] is None
+    assert second["out_path"] == first["out_path"]
+
+
+def test_ocr_settings_only_invalidate_formats_that_use_them(tmp_path: Path):
+    src = tmp_path / "src"
+    _make_src(src)
+    base = tmp_path / "out"
+    _run(src, base)
+    summary = _run(src, base, ocr_threshold=500)
+    assert summary["skipped"] == 2
+
+
+def test_plain_runs_do_not_hash_sources(tmp_path: Path, monkeypatch):
+    src = tmp_path / "src"
+    _make_src(src)
+    hashed = []
+    real = pl.pio.file_checksum
+    monkeypatch.setattr(pl.pio, "file_checksum", lambda p: hashed.append(p) or real(p))
+    pl.run_pipeline_for_dir(src, tmp_path / "out", process_workers=0, thread_workers=0)
+    assert hashed == []
+    entry = mp.find_item(mp.read_mapping(tmp_path / "out"), str(src / "a.txt"))
+    assert "checksum" not in entry
+    _run(src, tmp_path / "inc")
+    assert len(hashed) == 2
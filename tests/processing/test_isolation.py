@@ -0,0 +1,179 @@
+from pathlib import Path
+import os
+import signal
+import time
+import zipfile
+
+import pytest
+
+from src.cli import main
+from src.processing import isolation
+from src.processing import mapping as mp
+from src.processing import pipeline as pl
+from src.processing import registry
+
+
+# Misbehaving parsers; module-level so isolated subprocesses can import them
+
+def parse_hang(src_path, base_dir, out_name=None):
+    time.sleep(60)
+    return {}
+
+
+def parse_hog(src_path, base_dir, out_name=None):
+    blocks = []
+    while True:
+        blocks.append(bytearray(64 * 1024 * 1024))
+
+
+def parse_crash(src_path, base_dir, out_name=None):
+    os.kill(os.getpid(), signal.SIGSEGV)
+
+
+def parse_raise(src_path, base_dir, out_name=None):
+    raise ValueError("bad table")
+
+
+def parse_busy(src_path, base_dir, ocr_fn=None, out_name=None):
+    # Burns CPU and reports the OCR executor settings it runs under
+    from src.processing import images
+    n = 0
+    i = 0
+    while i < 2000000:
+        n = n + i
+        i = i + 1
+    out = Path(base_dir) / "busy.txt"
+    out.write_text(str(n), encoding="utf-8")
+    cfg = images.executor_config(images.get_ocr_executor())
+    return {"out_path": str(out), "ocr_workers": cfg["workers"], "ocr_timeout": cfg["timeout"]}
+
+
+def shout(data):
+    return "OCR"
+
+
+@pytest.fixture
+def bad_parsers():
+    names = ["hang", "hog", "crash", "oops"]
+    fns = [parse_hang, parse_hog, parse_crash, parse_raise]
+    i = 0
+    while i < len(names):
+        registry.register_parser(names[i], fns[i], extensions=[names[i]])
+        i = i + 1
+    yield names
+    for name in names:
+        registry.unregister_parser(name)
+
+
+def _bomb(path: Path, size: int) -> None:
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as z:
+        z.writestr("[Content_Types].xml", "<Types/>")
+        z.writestr("word/document.xml", b"\0" * size)
+
+
+def test_check_zip_uses_declared_sizes(tmp_path: Path):
+    bomb = tmp_path / "bomb.docx"
+    _bomb(bomb, 4 * 1024 * 1024)
+    assert bomb.stat().st_size < 64 * 1024
+    with pytest.raises(isolation.IsolationError) as info:
+        isolation.check_zip(bomb, 1024 * 1024)
+    assert info.value.reason == "zip_size"
+    isolation.check_zip(bomb, 8 * 1024 * 1024)
+    plain = tmp_path / "a.txt"
+    plain.write_text("PK but not a zip", encoding="utf-8")
+    isolation.check_zip(plain, 1)
+
+
+def test_isolated_run_records_each_failure_and_continues(tmp_path: Path, bad_parsers):
+    src = tmp_path / "src"
+    src.mkdir()
+    for name in bad_parsers:
+        (src / ("x." + name)).write_bytes(b"x")
+    (src / "ok.txt").write_text("fine\r\n", encoding="utf-8")
+    _bomb(src / "bomb.docx", 4 * 1024 * 1024)
+
+    limits = isolation.new_limits(timeout=3.0, memory_bytes=1024 * 1024 * 1024, max_unzipped_bytes=1024 * 1024)
+    t0 = time.perf_counter()
+    summary = pl.run_pipeline_for_dir(src, tmp_path / "out", process_workers=2, thread_workers=2, isolation_limits=limits)
+    # The hung parse is killed at the timeout, not after 60s
+    assert time.perf_counter() - t0 < 30
+
+    by_name = {}
+    for entry in mp.read_mapping(tmp_path / "out")["items"]:
+        by_name[Path(entry["source"]).name] = entry
+    assert by_name["x.hang"]["failure"] == "timeout"
+    assert by_name["x.hog"]["failure"] == "memory"
+    assert by_name["x.crash"]["failure"] == "crashed"
+    assert "SIGSEGV" in by_name["x.crash"]["error"]
+    assert by_name["bomb.docx"]["failure"] == "zip_size"
+    assert by_name["x.oops"]["error"] == "bad table"
+    assert "failure" not in by_name["x.oops"]
+    assert "error" not in by_name["ok.txt"]
+    assert by_name["ok.txt"]["metrics"]["output_chars"] == len("fine\n")
+    assert summary["errors"] == 5
+    out = tmp_path / "out" / "processed_documents" / "text" / "ok.txt"
+    assert out.read_text(encoding="utf-8") == "fine\n"
+
+
+def test_isolated_path_matches_in_process_output(tmp_path: Path):
+    src = tmp_path / "t.csv"
+    src.write_text("a,b\n1,2\n", encoding="utf-8")
+    plain = pl.run_pipeline_for_path(src, tmp_path / "one")
+    isolated = pl.run_pipeline_for_path(src, tmp_path / "two", isolation_limits=isolation.new_limits())
+    assert isolated["error"] is None
+    assert "text" not in isolated
+    assert isolated["rows"] == plain["rows"]
+    assert Path(isolated["out_path"]).read_text(encoding="utf-8") == Path(plain["out_path"]).read_text(encoding="utf-8")
+
+
+def test_isolation_rejects_unpicklable_hooks(tmp_path: Path):
+    (tmp_path / "src").mkdir()
+    with pytest.raises(ValueError):
+        pl.run_pipeline_for_dir(tmp_path / "src", tmp_path, ocr_fn=lambda data: "", isolation_limits=isolation.new_limits())
+
+
+def test_worker_is_replaced_after_a_timeout(tmp_path: Path):
+    src = tmp_path / "a.txt"
+    src.write_text("x", encoding="utf-8")
+    limits = isolation.new_limits(timeout=1.0)
+    with pytest.raises(isolation.IsolationError):
+        isolation.run_parser(parse_hang, src, tmp_path, {}, limits)
+    out = isolation.run_parser(registry.resolve("txt"), src, tmp_path, {}, limits)
+    assert out["chars"] == 2
+    isolation.shutdown_workers()
+
+
+def test_cli_isolate_flag(tmp_path: Path):
+    src = tmp_path / "src"
+    src.mkdir()
+    _bomb(src / "bomb.docx", 4 * 1024 * 1024)
+    (src / "a.md").write_text("# a\n", encoding="utf-8")
+    code = main(["process-docs", "--source-dir", str(src), "--base-dir", str(tmp_path), "--workers", "1", "--io-workers", "1", "--isolate", "--max-unzipped-bytes", "1000000"])
+    assert code == 0
+    by_name = {}
+    for entry in mp.read_mapping(tmp_path)["items"]:
+        by_name[Path(entry["source"]).name] = entry
+    assert by_name["bomb.docx"]["failure"] == "zip_size"
+    assert "error" not in by_name["a.md"]
+
+
+def test_isolated_parse_reports_worker_cpu_and_ocr_config(tmp_path: Path):
+    registry.register_parser("busy", parse_busy, extensions=["busy"])
+    try:
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / "a.busy").write_text("x", encoding="utf-8")
+        cfg = {"workers": 3, "max_queue": 2, "timeout": 7.0}
+        pl.run_pipeline_for_dir(tmp_path / "src", tmp_path / "out", ocr_fn=shout, ocr_workers=3, ocr_queue=2, ocr_timeout=7.0, isolation_limits=isolation.new_limits())
+        items = mp.read_mapping(tmp_path / "out")["items"]
+    finally:
+        registry.unregister_parser("busy")
+        isolation.shutdown_workers()
+    assert len(items) == 1
+    entry = items[0]
+    assert entry.get("error") is None
+    # The parent thread only waits on the pipe; the loop runs in the worker
+    assert entry["metrics"]["cpu_s"] > 0.02
+    out = isolation.run_parser(parse_busy, tmp_path / "src" / "a.busy", tmp_path, {}, isolation.new_limits(), cfg)
+    assert out["ocr_workers"] == 3
+    assert out["ocr_timeout"] == 7.0
+    isolation.shutdown_workers()
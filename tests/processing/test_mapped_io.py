@@ -0,0 +1,70 @@
+from pathlib import Path
+import hashlib
+
+from src.processing import cache as pc
+from src.processing import images
+from src.processing import io as pio
+from src.processing.parsers.image_svg import parse_image
+
+
+def test_mapped_file_views_content_and_checksum(tmp_path: Path):
+    f = tmp_path / "data.bin"
+    f.write_bytes(b"\xef\xbb\xbfhello")
+    with pio.mapped_file(f) as view:
+        assert isinstance(view, memoryview)
+        assert view.readonly
+        assert bytes(view[3:]) == b"hello"
+    assert pio.file_checksum(f) == "sha256:" + hashlib.sha256(b"\xef\xbb\xbfhello").hexdigest()
+
+    empty = tmp_path / "empty.bin"
+    empty.write_bytes(b"")
+    with pio.mapped_file(empty) as view:
+        assert len(view) == 0
+    assert pio.file_checksum(empty) == "sha256:" + hashlib.sha256(b"").hexdigest()
+
+
+def test_mapped_file_tolerates_slices_kept_past_close(tmp_path: Path):
+    f = tmp_path / "data.bin"
+    f.write_bytes(b"abcdef")
+    kept = []
+    with pio.mapped_file(f) as view:
+        kept.append(view[1:4])
+    assert bytes(kept[0]) == b"bcd"
+
+
+def test_parse_image_hands_views_only_to_hooks_that_accept_them(tmp_path: Path):
+    img = tmp_path / "scan.png"
+    img.write_bytes(b"pixels")
+    seen = []
+
+    def plain(data):
+        seen.append(type(data))
+        return "plain"
+
+    def zero_copy(data):
+        seen.append(type(data))
+        return "zero copy " + bytes(data[:3]).decode("ascii")
+
+    zero_copy.accepts_memoryview = True
+
+    assert parse_image(img, tmp_path, ocr_fn=plain)["text"] == "plain"
+    assert parse_image(img, tmp_path, ocr_fn=zero_copy)["text"] == "zero copy pix"
+    assert seen == [bytes, memoryview]
+
+
+def test_ocr_cache_keys_views_like_bytes(tmp_path: Path):
+    f = tmp_path / "scan.png"
+    f.write_bytes(b"letterhead")
+    calls = []
+
+    def engine(data):
+        calls.append(type(data))
+        return "ocr"
+
+    ocr = images.cached_ocr_fn(engine, pc.new_cache(tmp_path / "cache"))
+    with pio.mapped_file(f) as view:
+        assert images.ocr_cache_key(view, "e") == images.ocr_cache_key(b"letterhead", "e")
+        assert ocr(view) == "ocr"
+    assert ocr(b"letterhead") == "ocr"
+    # The engine does not accept views, so it got one bytes copy on the miss
+    assert calls == [bytes]
@@ -0,0 +1,123 @@
+from pathlib import Path
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from src.processing import mapping as mp
+from src.processing import pipeline as pl
+
+
+def test_append_and_compact_journal(tmp_path: Path):
+    mp.write_mapping(tmp_path, {"items": [{"source": "a", "format": "txt"}]})
+    mp.append_journal(tmp_path, {"source": "b", "format": "md"})
+    mp.append_journal(tmp_path, {"source": "a", "format": "pdf"})
+
+    assert len(mp.replay_journal(tmp_path)) == 2
+    applied = mp.compact_journal(tmp_path)
+    assert applied == 2
+
+    doc = mp.read_mapping(tmp_path)
+    assert doc["items"] == [{"source": "a", "format": "pdf"}, {"source": "b", "format": "md"}]
+    assert not mp.journal_path(tmp_path).exists()
+    assert mp.replay_journal(tmp_path) == []
+
+
+def test_recovery_skips_torn_record_and_replays(tmp_path: Path):
+    mp.append_journal(tmp_path, {"source": "a", "format": "txt"})
+    with open(mp.journal_path(tmp_path), "a", encoding="utf-8") as f:
+        f.write("{\"source\": \"b\", \"for")
+
+    # A new store replays the journal left by the crashed run
+    store = mp.new_store(tmp_path)
+    assert mp.store_get(store, "a") == {"source": "a", "format": "txt"}
+    assert mp.store_get(store, "b") is None
+    assert not mp.journal_path(tmp_path).exists()
+
+
+def test_interrupted_compaction_is_replayed(tmp_path: Path):
+    mp.append_journal(tmp_path, {"source": "a"})
+    # Simulate a crash right after the journal was renamed aside
+    mp.journal_path(tmp_path).replace(mp.journal_path(tmp_path).with_suffix(".jsonl.compacting"))
+    mp.append_journal(tmp_path, {"source": "b"})
+
+    assert mp.recover_mapping(tmp_path) == 2
+    items = mp.read_mapping(tmp_path)["items"]
+    assert items == [{"source": "a"}, {"source": "b"}]
+
+
+@pytest.mark.skipif(mp.fcntl is None, reason="journal locking needs fcntl")
+def test_compaction_waits_for_an_append_in_flight(tmp_path: Path):
+    mp.append_journal(tmp_path, {"source": "a"})
+    # A writer that opened the journal before compaction started
+    fd = mp._open_journal_locked(tmp_path)
+    done = []
+    t = threading.Thread(target=lambda: done.append(mp.compact_journal(tmp_path)))
+    t.start()
+    time.sleep(0.2)
+    assert done == []
+    os.write(fd, b'{"source":"b"}\n')
+    os.close(fd)
+    t.join(10)
+    assert done == [2]
+    assert mp.read_mapping(tmp_path)["items"] == [{"source": "a"}, {"source": "b"}]
+
+
+def _append_many(base_dir: str, tag: str, n: int) -> None:
+    i = 0
+    while i < n:
+        mp.append_journal(Path(base_dir), {"source": tag + str(i)})
+        i = i + 1
+
+
+@pytest.mark.skipif(mp.fcntl is None, reason="journal locking needs fcntl")
+def test_compaction_keeps_records_from_other_processes(tmp_path: Path):
+    ctx = multiprocessing.get_context("spawn")
+    procs = []
+    for tag in ["p", "q", "r"]:
+        proc = ctx.Process(target=_append_many, args=(str(tmp_path), tag, 300))
+        proc.start()
+        procs.append(proc)
+    while len(procs) > 0:
+        mp.compact_journal(tmp_path)
+        if not procs[0].is_alive():
+            procs.pop(0).join()
+    mp.compact_journal(tmp_path)
+    assert len(mp.read_mapping(tmp_path)["items"]) == 900
+
+
+def test_pipeline_jsonl_backend_appends_per_file(tmp_path: Path):
+    src = tmp_path / "note.txt"
+    src.write_text("hello", encoding="utf-8")
+
+    pl.run_pipeline_for_path(src, tmp_path, mapping_backend="jsonl")
+    pl.run_pipeline_for_path(src, tmp_path, mapping_backend="jsonl")
+    assert not mp.mapping_path(tmp_path).exists()
+    assert len(mp.replay_journal(tmp_path)) == 2
+
+    mp.compact_journal(tmp_path)
+    items = mp.read_mapping(tmp_path)["items"]
+    assert len(items) == 1
+    assert items[0]["source"] == str(src)
+
+
+def test_run_pipeline_for_dir_jsonl_backend_matches_json(tmp_path: Path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.txt").write_text("a", encoding="utf-8")
+    (src / "b.md").write_text("# b", encoding="utf-8")
+    (src / "c.bin").write_bytes(b"x")
+
+    pl.run_pipeline_for_dir(src, tmp_path / "json", process_workers=0, thread_workers=2)
+    pl.run_pipeline_for_dir(src, tmp_path / "jsonl", process_workers=0, thread_workers=2, mapping_backend="jsonl")
+
+    json_items = mp.read_mapping(tmp_path / "json")["items"]
+    jsonl_items = mp.read_mapping(tmp_path / "jsonl")["items"]
+    assert len(json_items) == len(jsonl_items) == 3
+    i = 0
+    while i < 3:
+        assert json_items[i]["source"] == jsonl_items[i]["source"]
+        i = i + 1
+    assert not mp.journal_path(tmp_path / "jsonl").exists()
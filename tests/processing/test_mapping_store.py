@@ -0,0 +1,95 @@
+from pathlib import Path
+import json
+import threading
+
+from src.processing import mapping as mp
+from src.processing import pipeline as pl
+
+
+def _read_items(base: Path):
+    with open(mp.mapping_path(base), "r", encoding="utf-8") as f:
+        return json.load(f)["items"]
+
+
+def test_store_batches_writes_and_flushes(tmp_path: Path):
+    store = mp.new_store(tmp_path, batch_size=3, flush_interval=1000.0)
+    mp.store_upsert(store, {"source": "a", "format": "txt"})
+    mp.store_upsert(store, {"source": "b", "format": "txt"})
+    # Nothing written until the batch fills
+    assert not mp.mapping_path(tmp_path).exists()
+
+    mp.store_upsert(store, {"source": "a", "format": "md"})
+    items = _read_items(tmp_path)
+    assert len(items) == 2
+    assert items[0] == {"source": "a", "format": "md"}
+
+    mp.store_upsert(store, {"source": "c", "format": "txt"})
+    assert len(_read_items(tmp_path)) == 2
+    mp.store_flush(store)
+    assert len(_read_items(tmp_path)) == 3
+    assert mp.store_get(store, "c") == {"source": "c", "format": "txt"}
+    assert mp.store_get(store, "missing") is None
+
+
+def test_store_flushes_on_interval(tmp_path: Path):
+    clock = {"t": 0.0}
+
+    def now():
+        return clock["t"]
+
+    store = mp.new_store(tmp_path, batch_size=100, flush_interval=5.0, now_fn=now)
+    mp.store_upsert(store, {"source": "a"})
+    assert not mp.mapping_path(tmp_path).exists()
+    clock["t"] = 6.0
+    mp.store_upsert(store, {"source": "b"})
+    assert len(_read_items(tmp_path)) == 2
+
+
+def test_store_is_backward_compatible_with_existing_mapping(tmp_path: Path):
+    mp.write_mapping(tmp_path, {"items": [{"source": "old", "format": "txt"}], "extra": 1})
+    store = mp.new_store(tmp_path, batch_size=10)
+    mp.store_upsert(store, {"source": "old", "format": "md"})
+    mp.store_upsert(store, {"source": "new", "format": "txt"})
+    mp.store_flush(store)
+
+    doc = mp.read_mapping(tmp_path)
+    assert doc["extra"] == 1
+    assert doc["items"] == [{"source": "old", "format": "md"}, {"source": "new", "format": "txt"}]
+
+
+def test_store_concurrent_upserts_from_threads(tmp_path: Path):
+    store = mp.new_store(tmp_path, batch_size=7)
+
+    def feed(prefix: str):
+        i = 0
+        while i < 50:
+            mp.store_upsert(store, {"source": prefix + str(i)})
+            i = i + 1
+
+    threads = []
+    for prefix in ["a", "b", "c", "d"]:
+        t = threading.Thread(target=feed, args=(prefix,))
+        threads.append(t)
+        t.start()
+    for t in threads:
+        t.join()
+    mp.store_flush(store)
+
+    items = _read_items(tmp_path)
+    assert len(items) == 200
+    seen = set()
+    for it in items:
+        seen.add(it["source"])
+    assert len(seen) == 200
+
+
+def test_run_pipeline_for_path_uses_store(tmp_path: Path):
+    src = tmp_path / "note.txt"
+    src.write_text("hello", encoding="utf-8")
+    store = mp.new_store(tmp_path, batch_size=10)
+
+    out = pl.run_pipeline_for_path(src, tmp_path, store=store)
+    assert out.get("error") is None
+    assert not mp.mapping_path(tmp_path).exists()
+    mp.store_flush(store)
+    assert _read_items(tmp_path)[0]["source"] == str(src)
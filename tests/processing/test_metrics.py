@@ -0,0 +1,114 @@
+from pathlib import Path
+import json
+import logging
+
+from src.cli import main
+from src.processing import cache as pc
+from src.processing import mapping as mp
+from src.processing import metrics
+from src.processing import pipeline as pl
+
+
+def test_entry_metrics_for_text_and_tables(tmp_path: Path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.txt").write_text("hello\r\nworld", encoding="utf-8")
+    (src / "t.csv").write_text("a,b\n1,2\n3,4\n", encoding="utf-8")
+    (src / "x.bin").write_bytes(b"\x00")
+
+    summary = pl.run_pipeline_for_dir(src, tmp_path, process_workers=0, thread_workers=0)
+    doc = mp.read_mapping(tmp_path)
+    by_name = {}
+    for it in doc["items"]:
+        by_name[Path(it["source"]).name] = it
+
+    m = by_name["a.txt"]["metrics"]
+    assert m["input_bytes"] == len("hello\r\nworld")
+    assert m["output_chars"] == len("hello\nworld\n")
+    assert m["wall_s"] >= 0 and m["cpu_s"] >= 0
+    assert by_name["t.csv"]["metrics"]["rows"] == 3
+    assert "metrics" not in by_name["x.bin"]
+    assert summary["items"][0]["metrics"] == by_name["a.txt"]["metrics"]
+
+
+def test_failed_parse_is_timed(tmp_path: Path):
+    bad = tmp_path / "broken.docx"
+    bad.write_bytes(b"not a zip")
+    res = pl.run_pipeline_for_path(bad, tmp_path)
+    assert res["error"] is not None
+    entry = mp.find_item(mp.read_mapping(tmp_path), str(bad))
+    assert entry["metrics"]["input_bytes"] == len(b"not a zip")
+    assert "output_chars" not in entry["metrics"]
+
+
+def test_cache_hits_and_skips_keep_counts(tmp_path: Path):
+    src = tmp_path / "a.txt"
+    src.write_text("abc\n", encoding="utf-8")
+    cache = pc.new_cache(tmp_path / "cache")
+    pl.run_pipeline_for_path(src, tmp_path / "one", cache=cache)
+    res = pl.run_pipeline_for_path(src, tmp_path / "two", cache=cache)
+    assert res["metrics"]["cache_hit"] is True
+    assert res["metrics"]["output_chars"] == 4
+
+    d = tmp_path / "dir"
+    d.mkdir()
+    (d / "b.txt").write_text("abcdef\n", encoding="utf-8")
+    pl.run_pipeline_for_dir(d, tmp_path / "three", process_workers=0, thread_workers=0, incremental=True)
+    summary = pl.run_pipeline_for_dir(d, tmp_path / "three", process_workers=0, thread_workers=0, incremental=True)
+    assert summary["skipped_sources"] == [str(d / "b.txt")]
+    assert summary["items"][0]["metrics"]["output_chars"] == 7
+    report = metrics.build_report(summary["items"], 10, summary["skipped_sources"])
+    assert report["formats"]["txt"]["skipped"] == 1
+    assert report["slowest"] == []
+
+
+def test_structured_log_event_per_document(tmp_path: Path, caplog):
+    src = tmp_path / "a.md"
+    src.write_text("# t\n", encoding="utf-8")
+    with caplog.at_level(logging.INFO, logger="src.processing.pipeline"):
+        pl.run_pipeline_for_path(src, tmp_path)
+    events = []
+    for record in caplog.records:
+        fields = getattr(record, "document", None)
+        if fields is not None:
+            events.append(fields)
+    assert len(events) == 1
+    assert events[0]["event"] == "document_processed"
+    assert events[0]["source"] == str(src)
+    assert events[0]["format"] == "md"
+    assert events[0]["input_bytes"] == 4
+
+
+def test_build_report_ranks_and_totals():
+    items = [
+        {"source": "a.pdf", "format": "pdf", "metrics": {"wall_s": 0.5, "cpu_s": 0.4, "input_bytes": 100, "pages": 3, "ocr_pages": 1}},
+        {"source": "b.pdf", "format": "pdf", "metrics": {"wall_s": 2.0, "cpu_s": 1.5, "input_bytes": 300, "pages": 7}},
+        {"source": "c.txt", "format": "txt", "metrics": {"wall_s": 1.0, "cpu_s": 0.1, "input_bytes": 10}},
+        {"source": "d.csv", "format": "csv", "error": "boom", "metrics": {"wall_s": 1.0, "cpu_s": 0.2, "input_bytes": 5}},
+        {"source": "e.bin", "format": "", "error": "unsupported file type"},
+    ]
+    report = metrics.build_report(items, top=2, skipped_sources=["c.txt"])
+    assert report["files"] == 5
+    slow = []
+    for row in report["slowest"]:
+        slow.append(row["source"])
+    assert slow == ["b.pdf", "d.csv"]
+    assert report["slowest"][1]["error"] == "boom"
+    pdf = report["formats"]["pdf"]
+    assert pdf["files"] == 2 and pdf["pages"] == 10 and pdf["ocr_pages"] == 1
+    assert pdf["wall_s"] == 2.5 and pdf["input_bytes"] == 400
+    assert report["formats"]["txt"]["skipped"] == 1
+    assert report["formats"]["txt"]["wall_s"] == 0
+    assert report["formats"][""]["errors"] == 1
+
+
+def test_cli_report_flag(tmp_path: Path, capsys):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.txt").write_text("x\n", encoding="utf-8")
+    code = main(["process-docs", "--source-dir", str(src), "--base-dir", str(tmp_path), "--workers", "0", "--io-workers", "0", "--report"])
+    assert code == 0
+    lines = capsys.readouterr().out.strip().splitlines()
+    report = json.loads(lines[-1])
+    assert report["formats"]["txt"]["files"] == 1
+    assert report["slowest"][0]["source"] == str(src / "a.txt")
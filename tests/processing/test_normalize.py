@@ -20,3 +20,68 @@ def test_header_footer_stripping_simple():
     text = "CONFIDENTIAL HEADER\nActual content line\nAnother line\nPage 1"
     out = norm.strip_simple_headers_footers(text, header_prefixes=["CONFIDENTIAL"], footer_prefixes=["Page "])
     assert out == "Actual content line\nAnother line"
+
+
+def _chained(text, newlines=True, control_chars=True, trim_trailing=False, strip_blank_lines=False):
+    if newlines:
+        text = norm.normalize_newlines(text)
+    if control_chars:
+        text = norm.remove_control_chars(text)
+    if trim_trailing:
+        text = norm.trim_trailing_spaces_per_line(text)
+    if strip_blank_lines:
+        text = norm.strip_outer_blank_lines(text)
+    return text
+
+
+def test_step_functions_keep_their_contract():
+    assert norm.normalize_newlines("a\r\nb\rc") == "a\nb\nc\n"
+    assert norm.remove_control_chars("a\x00b\tc\x1f\x7fd\ne\r") == "ab\tc\x7fd\ne"
+    assert norm.join_columns_to_tabs(["a", None, 3, ""]) == "a\t\t3\t"
+    assert norm.join_columns_to_tabs([]) == ""
+    assert norm.trim_trailing_spaces_per_line("a \t\n b  \n") == "a\n b\n"
+    assert norm.strip_outer_blank_lines(" \n\ta\n \t\nb\n\n") == "\ta\nb"
+    assert norm.utf8_decode_remove_bom(b"\xef\xbb\xbfhi") == "hi"
+
+
+def test_fused_normalizer_matches_chained_steps():
+    samples = [
+        "",
+        "plain",
+        "a\r\nb\rc\n",
+        "a\n\x00",
+        "ends with cr\r",
+        "ends with crlf\r\n",
+        "\x01\x02ctl\x1b[0m\tkept\x0b\x0c\n",
+        "  pad  \t\n\n\t \nlast  ",
+        "\r\n\r\n",
+        "é中\r\x00\U0001f600",
+    ]
+    flags = [
+        (True, True, False, False),
+        (True, False, False, False),
+        (False, True, False, False),
+        (True, True, True, False),
+        (True, True, True, True),
+        (False, False, False, True),
+    ]
+    i = 0
+    while i < len(samples):
+        j = 0
+        while j < len(flags):
+            f = flags[j]
+            expected = _chained(samples[i], f[0], f[1], f[2], f[3])
+            got = norm.normalize_text(samples[i], newlines=f[0], control_chars=f[1], trim_trailing=f[2], strip_blank_lines=f[3])
+            assert got == expected, (samples[i], f)
+            j = j + 1
+        i = i + 1
+
+
+def test_fused_normalizer_decodes_bytes():
+    assert norm.normalize_text(b"\xef\xbb\xbfa\r\nb\x00") == "a\nb\n"
+    assert norm.normalize_text(memoryview(b"x\ry")) == "x\ny\n"
+    try:
+        norm.normalize_text(b"\xef\xbb\xbf\xff")
+        assert False, "expected ValueError"
+    except ValueError as e:
+        assert "Invalid UTF-8" in str(e)
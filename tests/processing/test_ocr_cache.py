@@ -0,0 +1,77 @@
+from pathlib import Path
+import pickle
+
+from src.processing import cache as pc
+from src.processing import images
+from src.processing import pipeline as pl
+
+
+CALLS = []
+
+
+def counting_ocr(data: bytes) -> str:
+    CALLS.append(data)
+    return "text of " + data.decode("utf-8")
+
+
+def test_cached_ocr_fn_runs_engine_once_per_image(tmp_path: Path):
+    del CALLS[:]
+    cache = pc.new_cache(tmp_path / "cache")
+    ocr = images.cached_ocr_fn(counting_ocr, cache, settings={"lang": "eng"})
+    assert ocr(b"scan") == "text of scan"
+    assert ocr(b"scan") == "text of scan"
+    assert ocr(b"other") == "text of other"
+    assert len(CALLS) == 2
+
+    # Persisted: a fresh cache dict over the same root still hits
+    again = images.cached_ocr_fn(counting_ocr, pc.new_cache(tmp_path / "cache"), settings={"lang": "eng"})
+    assert again(b"scan") == "text of scan"
+    assert len(CALLS) == 2
+
+    # Different engine settings do not share results
+    deu = images.cached_ocr_fn(counting_ocr, cache, settings={"lang": "deu"})
+    deu(b"scan")
+    assert len(CALLS) == 3
+    assert pc.cache_stats(cache)["namespaces"]["ocr"]["entries"] == 3
+
+
+def test_failed_ocr_is_not_cached(tmp_path: Path):
+    cache = pc.new_cache(tmp_path / "cache")
+    state = {"fail": True}
+
+    def flaky(data: bytes) -> str:
+        if state["fail"]:
+            raise RuntimeError("engine busy")
+        return "ok"
+
+    ocr = images.cached_ocr_fn(flaky, cache)
+    try:
+        ocr(b"img")
+        assert False, "expected the engine error to propagate"
+    except RuntimeError:
+        pass
+    state["fail"] = False
+    assert ocr(b"img") == "ok"
+
+
+def test_wrapper_pickles_and_keeps_engine_name(tmp_path: Path):
+    ocr = images.cached_ocr_fn(counting_ocr, pc.new_cache(tmp_path / "cache"))
+    restored = pickle.loads(pickle.dumps(ocr))
+    assert images.is_cached_ocr_fn(restored)
+    assert pl._callable_name(ocr) == pl._callable_name(counting_ocr)
+
+
+def test_pipeline_reuses_ocr_across_parse_cache_misses(tmp_path: Path):
+    del CALLS[:]
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.png").write_bytes(b"letterhead")
+    cache = pc.new_cache(tmp_path / "cache")
+
+    pl.run_pipeline_for_dir(src, tmp_path / "out1", ocr_fn=counting_ocr, process_workers=0, thread_workers=0, cache=cache)
+    # A new threshold changes the parse key, but the image was already OCR'd
+    summary = pl.run_pipeline_for_dir(src, tmp_path / "out2", ocr_fn=counting_ocr, ocr_threshold=5, process_workers=0, thread_workers=0, cache=cache)
+    assert summary["errors"] == 0
+    assert len(CALLS) == 1
+    out = tmp_path / "out2" / "processed_documents" / "text" / "a.txt"
+    assert out.read_text(encoding="utf-8") == "text of letterhead"
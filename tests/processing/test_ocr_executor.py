@@ -0,0 +1,145 @@
+from pathlib import Path
+import threading
+import time
+
+import pytest
+
+from src.processing import images
+from src.processing.parsers.image_svg import parse_image
+
+
+def _upper(data: bytes) -> str:
+    return data.decode("utf-8").upper()
+
+
+def test_run_ocr_batch_keeps_input_order():
+    ex = images.new_ocr_executor(workers=4, max_queue=2)
+    try:
+        delays = {b"a": 0.05, b"b": 0.0, b"c": 0.03, b"d": 0.0}
+
+        def slow(data: bytes) -> str:
+            time.sleep(delays[data])
+            return _upper(data)
+
+        assert images.run_ocr_batch(slow, [b"a", b"b", b"c", b"d"], ex) == ["A", "B", "C", "D"]
+    finally:
+        images.shutdown_ocr_executor(ex)
+
+
+def test_queue_depth_is_bounded():
+    ex = images.new_ocr_executor(workers=2, max_queue=1)
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+    release = threading.Event()
+
+    def blocking(data: bytes) -> str:
+        with lock:
+            state["active"] = state["active"] + 1
+            if state["active"] > state["peak"]:
+                state["peak"] = state["active"]
+        release.wait(5)
+        with lock:
+            state["active"] = state["active"] - 1
+        return "x"
+
+    submitted = []
+
+    def submit_many():
+        i = 0
+        while i < 6:
+            submitted.append(images.submit_ocr(blocking, b"i", ex))
+            i = i + 1
+
+    t = threading.Thread(target=submit_many)
+    t.start()
+    time.sleep(0.2)
+    # 2 running + 1 queued; the submitter is blocked on the fourth call
+    assert len(submitted) == 3
+    release.set()
+    t.join(5)
+    assert len(submitted) == 6
+    i = 0
+    while i < len(submitted):
+        assert images.ocr_result(submitted[i], ex) == "x"
+        i = i + 1
+    assert state["peak"] == 2
+    images.shutdown_ocr_executor(ex)
+
+
+def test_timeout_and_errors_yield_empty_text():
+    ex = images.new_ocr_executor(workers=1, max_queue=1, timeout=0.05)
+    done = threading.Event()
+
+    def hang(data: bytes) -> str:
+        done.wait(2)
+        return "late"
+
+    def boom(data: bytes) -> str:
+        raise RuntimeError("engine crashed")
+
+    try:
+        assert images.run_ocr(hang, b"x", ex) == ""
+        done.set()
+        assert images.run_ocr(boom, b"x", ex) == ""
+    finally:
+        done.set()
+        images.shutdown_ocr_executor(ex)
+
+
+def test_ocr_failures_are_logged_counted_and_setup_errors_raise(tmp_path: Path, caplog):
+    ex = images.new_ocr_executor(workers=1, max_queue=1)
+
+    def boom(data: bytes) -> str:
+        raise RuntimeError("bad page")
+
+    def no_binary(data: bytes) -> str:
+        raise FileNotFoundError("tesseract is not installed")
+
+    try:
+        failures = []
+        with caplog.at_level("WARNING", logger="src.processing.images"):
+            assert images.run_ocr(boom, b"x", ex, failures) == ""
+        assert failures == ["bad page"]
+        assert "bad page" in caplog.text
+
+        with pytest.raises(images.OCRSetupError):
+            images.run_ocr(no_binary, b"x", ex)
+
+        img = tmp_path / "scan.png"
+        img.write_bytes(b"img")
+        out = parse_image(img, tmp_path / "out", ocr_fn=boom, ocr_executor=ex)
+        assert out["ocr_failures"] == 1
+        with pytest.raises(images.OCRSetupError):
+            parse_image(img, tmp_path / "out", ocr_fn=no_binary, ocr_executor=ex)
+    finally:
+        images.shutdown_ocr_executor(ex)
+
+
+def test_configure_reuses_executor_with_same_settings():
+    first = images.configure_ocr_executor(workers=2, max_queue=3, timeout=10.0)
+    assert images.configure_ocr_executor(workers=2, max_queue=3, timeout=10.0) is first
+    second = images.configure_ocr_executor(workers=3, max_queue=3, timeout=10.0)
+    assert second is not first
+    assert images.get_ocr_executor() is second
+    assert images.executor_config(second) == {"workers": 3, "max_queue": 3, "timeout": 10.0}
+
+
+def test_parse_image_uses_executor_and_handles_timeout(tmp_path: Path):
+    img = tmp_path / "scan.png"
+    img.write_bytes(b"hello")
+    base = tmp_path / "out"
+
+    ex = images.new_ocr_executor(workers=1, max_queue=0, timeout=0.05)
+    try:
+        res = parse_image(img, base, ocr_fn=_upper, ocr_executor=ex)
+        assert res["ocr_used"] is True
+        assert Path(res["out_path"]).read_text(encoding="utf-8") == "HELLO"
+
+        def hang(data: bytes) -> str:
+            time.sleep(0.5)
+            return "late"
+
+        res = parse_image(img, base, ocr_fn=hang, ocr_executor=ex)
+        assert res["ocr_used"] is False
+    finally:
+        images.shutdown_ocr_executor(ex)
@@ -121,3 +121,235 @@ def test_pptx_control_chars_removed_and_cr_normalized(tmp_path: Path):
     assert text == "A\nB\n---\nC\n"
     for ch in text:
         assert (ord(ch) >= 32) or (ch == "\n") or (ch == "\t")
+
+
+_W = "xmlns:w=\"http://schemas.openxmlformats.org/wordprocessingml/2006/main\""
+
+
+def _mk_docx_parts(path: Path, parts):
+    # parts: {zip member name: xml string}
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        for name in parts:
+            z.writestr(name, parts[name])
+    path.write_bytes(buf.getvalue())
+
+
+def _wdoc(body: str) -> str:
+    return "<?xml version=\"1.0\" encoding=\"UTF-8\"?><w:document " + _W + "><w:body>" + body + "</w:body></w:document>"
+
+
+def test_docx_xml_engine_handles_attributes_runs_and_tables(tmp_path: Path):
+    from src.processing.parsers import docx_pptx
+
+    body = (
+        "<w:p><w:pPr><w:tabs><w:tab w:val=\"left\" w:pos=\"720\"/></w:tabs></w:pPr>"
+        "<w:r><w:t xml:space=\"preserve\">Fish </w:t></w:r><w:r><w:t>&amp; chips</w:t></w:r></w:p>"
+        "<w:p/>"
+        "<w:p><w:r><w:t>a</w:t><w:tab/><w:t>b</w:t><w:br/><w:t>c</w:t></w:r></w:p>"
+        "<w:tbl><w:tr>"
+        "<w:tc><w:p><w:r><w:t>r1c1</w:t></w:r></w:p><w:p><w:r><w:t>more</w:t></w:r></w:p></w:tc>"
+        "<w:tc><w:p><w:r><w:t>r1c2</w:t></w:r></w:p></w:tc>"
+        "</w:tr><w:tr>"
+        "<w:tc><w:tbl><w:tr><w:tc><w:p><w:r><w:t>in</w:t></w:r></w:p></w:tc>"
+        "<w:tc><w:p><w:r><w:t>ner</w:t></w:r></w:p></w:tc></w:tr></w:tbl></w:tc>"
+        "<w:tc><w:p/></w:tc>"
+        "</w:tr></w:tbl>"
+        "<w:p><w:r><w:t>after</w:t></w:r></w:p>"
+    )
+    src = tmp_path / "rich.docx"
+    _mk_docx_parts(src, {"word/document.xml": _wdoc(body)})
+
+    out = docx_pptx.parse_docx(src, tmp_path)
+    assert out["engine"] == "xml"
+    assert out["text"] == "Fish & chips\n\na\tb\nc\nr1c1 more\tr1c2\nin\tner\t\nafter\n"
+
+
+def _held_at_end(monkeypatch, module, tag_suffix):
+    # Wrap iterparse to count the elements still attached under the first
+    # element ending in tag_suffix when its end tag is reached
+    real = module.ET.iterparse
+    held = []
+
+    def counting(stream, events=None):
+        for event, elem in real(stream, events=events):
+            if event == "end" and elem.tag.endswith(tag_suffix) and len(held) == 0:
+                held.append(len(list(elem.iter())) - 1)
+            yield event, elem
+
+    monkeypatch.setattr(module.ET, "iterparse", counting)
+    return held
+
+
+def test_docx_xml_engine_releases_finished_paragraphs(tmp_path: Path, monkeypatch):
+    from src.processing.parsers import docx_pptx
+
+    body = ""
+    i = 0
+    while i < 5000:
+        body += "<w:p><w:r><w:t>p" + str(i) + "</w:t></w:r></w:p>"
+        if i % 1000 == 0:
+            body += "<w:tbl><w:tr><w:tc><w:p><w:r><w:t>cell</w:t></w:r></w:p></w:tc></w:tr></w:tbl>"
+        i = i + 1
+    src = tmp_path / "long.docx"
+    _mk_docx_parts(src, {"word/document.xml": _wdoc(body + "<w:sectPr/>")})
+
+    held = _held_at_end(monkeypatch, docx_pptx, "}body")
+    out = docx_pptx.parse_docx(src, tmp_path)
+    assert out["text"].startswith("p0\ncell\np1\n")
+    assert out["text"].endswith("p4999\n")
+    # Only the trailing section properties are still attached to the body
+    assert held == [1]
+
+
+def test_docx_xml_engine_reads_headers_footers_and_notes(tmp_path: Path):
+    from src.processing.parsers import docx_pptx
+
+    def part(root: str, inner: str) -> str:
+        return "<w:" + root + " " + _W + ">" + inner + "</w:" + root + ">"
+
+    notes = (
+        "<w:footnote w:type=\"separator\" w:id=\"-1\"><w:p><w:r><w:separator/></w:r></w:p></w:footnote>"
+        "<w:footnote w:id=\"1\"><w:p><w:r><w:t>A footnote</w:t></w:r></w:p></w:footnote>"
+    )
+    src = tmp_path / "parts.docx"
+    _mk_docx_parts(src, {
+        "word/document.xml": _wdoc("<w:p><w:r><w:t>Body</w:t></w:r></w:p>"),
+        "word/header10.xml": part("hdr", "<w:p><w:r><w:t>Header ten</w:t></w:r></w:p>"),
+        "word/header2.xml": part("hdr", "<w:p><w:r><w:t>Header two</w:t></w:r></w:p><w:p/>"),
+        "word/footer1.xml": part("ftr", "<w:p><w:r><w:t>Footer</w:t></w:r></w:p>"),
+        "word/footnotes.xml": part("footnotes", notes),
+        "word/endnotes.xml": part("endnotes", "<w:endnote w:id=\"1\"><w:p><w:r><w:t>An endnote</w:t></w:r></w:p></w:endnote>"),
+    })
+
+    out = docx_pptx.parse_docx(src, tmp_path)
+    assert out["text"] == "Header two\nHeader ten\nBody\nFooter\nA footnote\nAn endnote\n"
+
+    out = docx_pptx.parse_docx(src, tmp_path, headers_footers=False, notes=False)
+    assert out["text"] == "Body\n"
+
+
+def test_docx_malformed_xml_falls_back_to_literal_scan(tmp_path: Path):
+    from src.processing.parsers import docx_pptx
+
+    src = tmp_path / "broken.docx"
+    _mk_docx_parts(src, {"word/document.xml": "<w:document><w:p><w:r><w:t>One</w:t></w:r><w:t>Two</w:t><oops"})
+    out = docx_pptx.parse_docx(src, tmp_path)
+    assert out["text"] == "One\nTwo\n"
+
+
+def test_docx_engine_selection(tmp_path: Path):
+    from src.processing.parsers import docx_pptx
+
+    src = tmp_path / "sample.docx"
+    _mk_minimal_docx(src, ["Hello", "World"])
+    # A bare document.xml is not a package python-docx can open: falls back
+    out = docx_pptx.parse_docx(src, tmp_path, engine="python-docx")
+    assert out["engine"] == "xml"
+    assert out["text"] == "Hello\nWorld\n"
+
+    with pytest.raises(ValueError):
+        docx_pptx.parse_docx(src, tmp_path, engine="nope")
+
+
+def test_pptx_fallback_streams_runs_with_attributes(tmp_path: Path):
+    from src.processing.parsers import docx_pptx
+
+    xml = (
+        "<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
+        "<p:sld xmlns:p=\"http://schemas.openxmlformats.org/presentationml/2006/main\" "
+        "xmlns:a=\"http://schemas.openxmlformats.org/drawingml/2006/main\">"
+        "<p:cSld><p:spTree><p:sp><p:txBody><a:p><a:r><a:rPr lang=\"en-US\"/><a:t xml:space=\"preserve\">R&amp;D </a:t></a:r>"
+        "<a:r><a:t>plan</a:t></a:r></a:p></p:txBody></p:sp></p:spTree></p:cSld></p:sld>"
+    )
+    src = tmp_path / "deck.pptx"
+    _mk_docx_parts(src, {"ppt/slides/slide1.xml": xml})
+    out = docx_pptx.parse_pptx(src, tmp_path)
+    assert out["text"] == "R&D \nplan\n"
+
+
+def _mk_real_pptx(path: Path, count: int, table_on=None, move_last_first=False):
+    pptx = pytest.importorskip("pptx")
+    from pptx.util import Inches
+
+    prs = pptx.Presentation()
+    i = 0
+    while i < count:
+        s = prs.slides.add_slide(prs.slide_layouts[5])
+        s.shapes.title.text = "Slide " + str(i + 1)
+        if table_on == i:
+            t = s.shapes.add_table(2, 2, Inches(1), Inches(1), Inches(4), Inches(2)).table
+            t.cell(0, 0).text = "a"
+            t.cell(0, 1).text = "b"
+            t.cell(1, 0).text = "c"
+            t.cell(1, 1).text = "d"
+        s.notes_slide.notes_text_frame.text = "note " + str(i + 1)
+        i = i + 1
+    if move_last_first:
+        # Deck order differs from the slideN.xml numbering
+        lst = prs.slides._sldIdLst
+        last = lst[len(lst) - 1]
+        lst.remove(last)
+        lst.insert(0, last)
+    prs.save(str(path))
+
+
+def test_pptx_follows_deck_order_with_notes_and_tables(tmp_path: Path):
+    from src.processing.parsers import docx_pptx
+
+    src = tmp_path / "deck.pptx"
+    _mk_real_pptx(src, 3, table_on=1, move_last_first=True)
+
+    expected = "Slide 3\nNotes:\nnote 3\n---\nSlide 1\nNotes:\nnote 1\n---\nSlide 2\na\tb\nc\td\nNotes:\nnote 2\n"
+    out = docx_pptx.parse_pptx(src, tmp_path, notes=True)
+    assert out["engine"] == "xml"
+    assert out["slides"] == 3
+    assert out["text"] == expected
+    # Both engines produce the same text
+    out = docx_pptx.parse_pptx(src, tmp_path, engine="python-pptx", notes=True)
+    assert out["engine"] == "python-pptx"
+    assert out["text"] == expected
+
+    out = docx_pptx.parse_pptx(src, tmp_path, tables=False)
+    assert out["text"] == "Slide 3\n---\nSlide 1\n---\nSlide 2\n"
+
+
+def test_pptx_fallback_orders_slides_numerically(tmp_path: Path):
+    from src.processing.parsers import docx_pptx
+
+    slides = []
+    i = 0
+    while i < 12:
+        slides.append(["s" + str(i + 1)])
+        i = i + 1
+    src = tmp_path / "many.pptx"
+    _mk_minimal_pptx(src, slides)
+    out = docx_pptx.parse_pptx(src, tmp_path)
+    assert out["text"].split("\n---\n")[9:12] == ["s10", "s11", "s12\n"]
+
+
+def test_pptx_parallel_slides_match_serial(tmp_path: Path, monkeypatch):
+    from src.processing.parsers import docx_pptx
+
+    src = tmp_path / "deck.pptx"
+    _mk_real_pptx(src, 9, table_on=4, move_last_first=True)
+    serial = docx_pptx.parse_pptx(src, tmp_path / "serial", notes=True)
+    monkeypatch.setattr(docx_pptx, "PARALLEL_MIN_SLIDES", 2)
+    parallel = docx_pptx.parse_pptx(src, tmp_path / "parallel", notes=True, slide_workers=2)
+    assert parallel["text"] == serial["text"]
+
+def test_pptx_xml_engine_releases_finished_shapes(tmp_path: Path, monkeypatch):
+    from src.processing.parsers import docx_pptx
+
+    texts = []
+    i = 0
+    while i < 3000:
+        texts.append("t" + str(i))
+        i = i + 1
+    src = tmp_path / "wide.pptx"
+    _mk_minimal_pptx(src, [texts])
+
+    held = _held_at_end(monkeypatch, docx_pptx, "}spTree")
+    out = docx_pptx.parse_pptx(src, tmp_path)
+    assert out["text"] == "\n".join(texts) + "\n"
+    assert held == [0]
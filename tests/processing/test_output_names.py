@@ -0,0 +1,56 @@
+from pathlib import Path
+
+from src.processing import io as pio
+from src.processing import pipeline as pl
+
+
+def test_reserve_output_names_suffixes_later_collisions(tmp_path: Path):
+    root = tmp_path
+    files = [root / "a" / "report.pdf", root / "b" / "report.docx", root / "c" / "Report.TXT", root / "notes.md", root / "x.bin"]
+    names = pio.reserve_output_names(files, root, ["pdf", "docx", "txt", "md", None])
+    assert names[0] == "report.txt"
+    assert names[1].startswith("report-") and names[1].endswith(".txt")
+    assert names[2].startswith("Report-") and names[2].endswith(".TXT")
+    assert names[3] == "notes.txt"
+    assert names[4] is None
+    # Suffixes depend on the relative path only
+    again = pio.reserve_output_names([root / "z.pdf", root / "b" / "report.docx"], root, ["pdf", "pdf"])
+    assert again[1] == "report.txt"
+    assert pio.reserve_output_names(files[:2], root, ["pdf", "docx"]) == names[:2]
+
+
+def test_dir_run_writes_one_output_per_source(tmp_path: Path):
+    src = tmp_path / "src"
+    (src / "a").mkdir(parents=True)
+    (src / "b").mkdir()
+    (src / "a" / "report.txt").write_text("from a", encoding="utf-8")
+    (src / "b" / "report.txt").write_text("from b", encoding="utf-8")
+    (src / "b" / "report.md").write_text("from md", encoding="utf-8")
+
+    summary = pl.run_pipeline_for_dir(src, tmp_path / "out", process_workers=0, thread_workers=4)
+    assert summary["errors"] == 0
+    outs = []
+    texts = []
+    for item in summary["items"]:
+        outs.append(item["out_path"])
+        texts.append(Path(str(item["out_path"])).read_text(encoding="utf-8"))
+    assert len(set(outs)) == 3
+    assert Path(outs[0]).name == "report.txt"
+    assert texts == ["from a\n", "from md\n", "from b\n"]
+
+
+def test_new_collision_keeps_existing_names(tmp_path: Path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "deck.txt").write_text("deck notes", encoding="utf-8")
+    base = tmp_path / "out"
+    pl.run_pipeline_for_dir(src, base, process_workers=0, thread_workers=0, incremental=True)
+
+    (src / "z").mkdir()
+    (src / "z" / "deck.csv").write_text("a,b\n", encoding="utf-8")
+    summary = pl.run_pipeline_for_dir(src, base, process_workers=0, thread_workers=0, incremental=True)
+    assert summary["skipped"] == 1
+    first, second = summary["items"]
+    assert Path(str(first["out_path"])).name == "deck.txt"
+    assert Path(str(second["out_path"])).name.startswith("deck-")
+    assert Path(str(first["out_path"])).read_text(encoding="utf-8") == "deck notes\n"
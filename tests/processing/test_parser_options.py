@@ -0,0 +1,80 @@
+from pathlib import Path
+
+import pytest
+
+from src.cli import main
+from src.processing import mapping as mp
+from src.processing import pipeline as pl
+from src.processing import registry
+
+
+CALLS = []
+
+
+def parse_fragile(src_path, base_dir, flavor="plain"):
+    # Fails with a TypeError from deep inside the parse
+    CALLS.append(flavor)
+    raise TypeError("bad cell value")
+
+
+def test_parser_runs_once_even_when_it_raises_type_error(tmp_path: Path):
+    del CALLS[:]
+    registry.register_parser("frag", parse_fragile, extensions=["frag"])
+    try:
+        src = tmp_path / "a.frag"
+        src.write_text("x", encoding="utf-8")
+        res = pl.run_pipeline_for_path(src, tmp_path, ocr_threshold=5, parser_options={"frag": {"flavor": "spicy"}})
+        assert res["error"] == "bad cell value"
+        assert CALLS == ["spicy"]
+    finally:
+        registry.unregister_parser("frag")
+
+
+def test_declared_options_come_from_registry_or_signature():
+    assert "max_rows" in registry.parser_options("csv")
+    assert "engine" in registry.parser_options("docx")
+    assert registry.parser_options("svg") == ["out_name"]
+    registry.register_parser("frag", parse_fragile)
+    try:
+        assert registry.parser_options("frag") == ["flavor"]
+    finally:
+        registry.unregister_parser("frag")
+
+
+def test_per_format_options_reach_the_parser_and_the_fingerprint(tmp_path: Path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "t.csv").write_text("a,b\n1,2\n3,4\n", encoding="utf-8")
+    (src / "n.txt").write_text("note", encoding="utf-8")
+
+    pl.run_pipeline_for_dir(src, tmp_path, process_workers=0, thread_workers=0, incremental=True)
+    summary = pl.run_pipeline_for_dir(
+        src, tmp_path, process_workers=0, thread_workers=0, incremental=True, parser_options={"csv": {"max_rows": 1}}
+    )
+    # Only the tuned format is re-parsed
+    assert summary["skipped"] == 1
+    out = tmp_path / "processed_documents" / "text" / "t.txt"
+    assert out.read_text(encoding="utf-8") == "a\tb\n"
+    entry = mp.find_item(mp.read_mapping(tmp_path), str(src / "t.csv"))
+    assert entry["options"]["parser_options"] == {"max_rows": 1}
+
+
+def test_unknown_options_are_rejected_up_front(tmp_path: Path):
+    (tmp_path / "src").mkdir()
+    with pytest.raises(ValueError):
+        pl.run_pipeline_for_dir(tmp_path / "src", tmp_path, parser_options={"csv": {"rows": 1}})
+    with pytest.raises(ValueError):
+        pl.run_pipeline_for_dir(tmp_path / "src", tmp_path, parser_options={"odt": {}})
+    with pytest.raises(ValueError):
+        pl.run_pipeline_for_dir(tmp_path / "src", tmp_path, parser_options={"txt": {"data": b"x"}})
+
+
+def test_cli_parser_option_flag(tmp_path: Path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "t.csv").write_text("a,b\n1,2\n", encoding="utf-8")
+    code = main(["process-docs", "--source-dir", str(src), "--base-dir", str(tmp_path), "--workers", "0", "--io-workers", "0", "--parser-option", "csv.max_rows=1"])
+    assert code == 0
+    assert (tmp_path / "processed_documents" / "text" / "t.txt").read_text(encoding="utf-8") == "a\tb\n"
+    assert main(["process-docs", "--source-dir", str(src), "--parser-option", "csv.rows=1"]) == 2
+    assert main(["process-docs", "--source-dir", str(src), "--parser-option", "max_rows"]) == 2
@@ -81,3 +81,170 @@ def test_pdf_missing_tesseract_binary_is_handled(tmp_path: Path):
     # Even though rasterize fails, parser should not crash and should not mark ocr_used
     out = pdf.parse_pdf(src, tmp_path, ocr_threshold=10, rasterize_fn=missing_tesseract, ocr_fn=lambda b: "should not run")
     assert out.get("ocr_used") is False
+
+
+def _make_multipage_pdf(path: Path, pages):
+    c = canvas.Canvas(str(path), pagesize=letter)
+    width, height = letter
+    i = 0
+    while i < len(pages):
+        c.drawString(72, height - 72, pages[i])
+        c.showPage()
+        i += 1
+    c.save()
+
+
+def test_pdf_parallel_pages_match_sequential(tmp_path: Path, monkeypatch):
+    from src.processing.parsers import pdf
+
+    src = tmp_path / "multi.pdf"
+    labels = []
+    i = 0
+    while i < 8:
+        labels.append("Page number " + str(i))
+        i += 1
+    _make_multipage_pdf(src, labels)
+
+    sequential = pdf._extract_text_pypdf(src)
+    monkeypatch.setattr(pdf, "PARALLEL_MIN_PAGES", 2)
+    parallel = pdf._extract_text_pypdf(src, page_workers=2)
+    assert parallel == sequential
+    assert "Page number 7" in parallel[7]
+
+    out = pdf.parse_pdf(src, tmp_path, page_workers=2)
+    assert out["pages"] == 8
+    assert out["text"].index("Page number 0") < out["text"].index("Page number 7")
+
+
+def test_pdf_page_cache_only_redoes_missing_pages(tmp_path: Path, monkeypatch):
+    from src.processing import cache as pc
+    from src.processing.parsers import pdf
+
+    src = tmp_path / "cached.pdf"
+    _make_multipage_pdf(src, ["one", "two", "three", "four"])
+    page_cache = pc.new_cache(tmp_path / "cache")
+
+    original = pdf._extract_page
+    calls = []
+
+    def flaky(reader, index):
+        calls.append(index)
+        if index == 2:
+            return None
+        return original(reader, index)
+
+    monkeypatch.setattr(pdf, "_extract_page", flaky)
+    first = pdf._extract_text_pypdf(src, page_cache=page_cache)
+    assert first[2] == ""
+    assert calls == [0, 1, 2, 3]
+
+    calls.clear()
+
+    def counting(reader, index):
+        calls.append(index)
+        return original(reader, index)
+
+    monkeypatch.setattr(pdf, "_extract_page", counting)
+    second = pdf._extract_text_pypdf(src, page_cache=page_cache)
+    assert calls == [2]
+    assert "three" in second[2]
+    assert second[0] == first[0]
+    assert pc.cache_stats(page_cache)["namespaces"][pdf.PAGE_NAMESPACE]["entries"] == 4
+
+
+def test_pdf_per_page_ocr_only_for_low_coverage_pages(tmp_path: Path):
+    from src.processing.parsers import pdf
+
+    src = tmp_path / "mixed.pdf"
+    _make_multipage_pdf(src, ["First page has plenty of text", "", "Third page has plenty of text", ""])
+
+    rasterized = []
+
+    def rasterize_page(path, index):
+        rasterized.append(index)
+        return ("<img" + str(index) + ">").encode("utf-8")
+
+    def fake_ocr(image_bytes):
+        if image_bytes == b"<img1>":
+            return "Scanned second page"
+        return "   "
+
+    from src.processing import images
+
+    executor = images.new_ocr_executor(workers=3, max_queue=1)
+    out = pdf.parse_pdf(src, tmp_path, ocr_threshold=5, rasterize_page_fn=rasterize_page, ocr_fn=fake_ocr, ocr_executor=executor)
+    images.shutdown_ocr_executor(executor)
+    assert sorted(rasterized) == [1, 3]
+    assert out["ocr_pages"] == [2]
+    assert out["ocr_used"] is True
+    text = out["text"]
+    assert text.index("First page") < text.index("Scanned second page") < text.index("Third page")
+
+
+def test_pdf_rasterizes_pages_as_ocr_slots_free_up(tmp_path: Path):
+    import threading
+    import time
+    from src.processing import images
+    from src.processing.parsers import pdf
+
+    src = tmp_path / "scanned.pdf"
+    _make_multipage_pdf(src, [""] * 12)
+
+    lock = threading.Lock()
+    state = {"live": 0, "peak": 0, "ocr_started_before_last_render": False, "renders": 0}
+
+    def rasterize_page(path, index):
+        with lock:
+            state["renders"] = state["renders"] + 1
+            state["live"] = state["live"] + 1
+            state["peak"] = max(state["peak"], state["live"])
+        return ("<img" + str(index) + ">").encode("utf-8")
+
+    def slow_ocr(image_bytes):
+        with lock:
+            if state["renders"] < 12:
+                state["ocr_started_before_last_render"] = True
+        time.sleep(0.02)
+        with lock:
+            state["live"] = state["live"] - 1
+        return "page text " + image_bytes.decode("utf-8")
+
+    executor = images.new_ocr_executor(workers=1, max_queue=1)
+    out = pdf.parse_pdf(src, tmp_path, ocr_threshold=5, rasterize_page_fn=rasterize_page, ocr_fn=slow_ocr, ocr_executor=executor)
+    images.shutdown_ocr_executor(executor)
+    assert len(out["ocr_pages"]) == 12
+    # One image being OCR'd, one queued, one waiting to be submitted
+    assert state["peak"] <= 3
+    assert state["ocr_started_before_last_render"] is True
+
+
+def test_pdf_whole_document_rasterizer_picks_low_pages(tmp_path: Path):
+    from src.processing.parsers import pdf
+
+    src = tmp_path / "mixed2.pdf"
+    _make_multipage_pdf(src, ["", "Second page has plenty of text"])
+
+    seen = []
+
+    def fake_ocr(image_bytes):
+        seen.append(image_bytes)
+        return "OCR page one"
+
+    out = pdf.parse_pdf(src, tmp_path, ocr_threshold=5, rasterize_fn=lambda p: [b"p0", b"p1"], ocr_fn=fake_ocr)
+    assert seen == [b"p0"]
+    assert out["ocr_pages"] == [1]
+    assert "OCR page one" in out["text"]
+    assert "Second page" in out["text"]
+
+
+def test_pipeline_records_ocr_pages_in_mapping(tmp_path: Path):
+    from src.processing import mapping as mp
+    from src.processing import pipeline as pl
+
+    src = tmp_path / "scan.pdf"
+    _make_multipage_pdf(src, ["Readable text on the first page", ""])
+
+    pl.run_pipeline_for_path(src, tmp_path, ocr_threshold=5, rasterize_fn=lambda p: [b"a", b"b"], ocr_fn=lambda b: "scanned")
+    entry = mp.find_item(mp.read_mapping(tmp_path), str(src))
+    assert entry["ocr_used"] is True
+    assert entry["ocr_pages"] == [2]
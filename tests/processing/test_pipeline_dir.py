@@ -0,0 +1,109 @@
+from pathlib import Path
+import io
+import json
+import zipfile
+
+from src.processing import mapping as mp
+from src.processing import pipeline as pl
+
+
+def _mk_minimal_docx(path: Path, paragraphs):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        xml = (
+            "<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
+            "<w:document xmlns:w=\"http://schemas.openxmlformats.org/wordprocessingml/2006/main\">"
+            "<w:body>"
+        )
+        for p in paragraphs:
+            xml += "<w:p><w:r><w:t>" + p + "</w:t></w:r></w:p>"
+        xml += "</w:body></w:document>"
+        z.writestr("word/document.xml", xml)
+    path.write_bytes(buf.getvalue())
+
+
+def _make_tree(root: Path):
+    (root / "a").mkdir(parents=True)
+    (root / "b" / "c").mkdir(parents=True)
+    (root / ".hidden").mkdir()
+    (root / "a" / "one.txt").write_text("one\r\n", encoding="utf-8")
+    (root / "a" / "two.md").write_text("# two\n", encoding="utf-8")
+    (root / "b" / "table.csv").write_text("x,y\n1,2\n", encoding="utf-8")
+    _mk_minimal_docx(root / "b" / "c" / "doc.docx", ["Hello", "World"])
+    (root / "b" / "blob.bin").write_bytes(b"\x00\x01")
+    (root / ".hidden" / "skip.txt").write_text("hidden", encoding="utf-8")
+
+
+def _summary_view(base: Path):
+    doc = json.loads(mp.mapping_path(base).read_text(encoding="utf-8"))
+    view = []
+    for it in doc["items"]:
+        out_name = ""
+        if it.get("out_path"):
+            out_name = Path(it["out_path"]).name
+        view.append((it["source"], it["format"], out_name, it.get("error")))
+    return view
+
+
+def test_walk_source_dir_is_sorted_and_skips_hidden_and_excluded(tmp_path: Path):
+    _make_tree(tmp_path / "src")
+    (tmp_path / "src" / "processed_documents" / "text").mkdir(parents=True)
+    (tmp_path / "src" / "processed_documents" / "text" / "old.txt").write_text("x", encoding="utf-8")
+
+    files = pl.walk_source_dir(tmp_path / "src", exclude_dirs=[tmp_path / "src" / "processed_documents"])
+    names = []
+    for f in files:
+        names.append(str(f.relative_to(tmp_path / "src")))
+    assert names == sorted(names)
+    assert "a/one.txt" in names
+    assert ".hidden/skip.txt" not in names
+    assert "processed_documents/text/old.txt" not in names
+
+
+def test_run_pipeline_for_dir_inline_records_all_files(tmp_path: Path):
+    src = tmp_path / "src"
+    _make_tree(src)
+    base = tmp_path / "out"
+
+    summary = pl.run_pipeline_for_dir(src, base, process_workers=0, thread_workers=0)
+    assert summary["total"] == 5
+    assert summary["errors"] == 1
+    assert summary["ok"] == 4
+
+    text_dir = base / "processed_documents" / "text"
+    assert (text_dir / "one.txt").read_text(encoding="utf-8") == "one\n"
+    assert (text_dir / "doc.txt").read_text(encoding="utf-8") == "Hello\nWorld\n"
+
+    by_source = {}
+    for it in summary["items"]:
+        by_source[it["source"]] = it
+    assert by_source[str(src / "b" / "blob.bin")]["error"] == "unsupported file type"
+
+
+def test_run_pipeline_for_dir_mapping_independent_of_worker_count(tmp_path: Path):
+    src = tmp_path / "src"
+    _make_tree(src)
+
+    base_serial = tmp_path / "serial"
+    base_parallel = tmp_path / "parallel"
+    pl.run_pipeline_for_dir(src, base_serial, process_workers=0, thread_workers=0)
+    pl.run_pipeline_for_dir(src, base_parallel, process_workers=2, thread_workers=3, max_in_flight=2)
+
+    assert _summary_view(base_serial) == _summary_view(base_parallel)
+
+
+def test_cli_process_docs_runs_directory(tmp_path: Path, capsys):
+    from src.cli import main
+
+    src = tmp_path / "src"
+    _make_tree(src)
+    base = tmp_path / "out"
+
+    code = main(["process-docs", "--source-dir", str(src), "--base-dir", str(base), "--workers", "0", "--io-workers", "2"])
+    out, err = capsys.readouterr()
+    assert code == 0
+    assert "process-docs finished" in out or "process-docs finished" in err
+    assert mp.mapping_path(base).exists()
+
+    code = main(["process-docs", "--source-dir", str(tmp_path / "missing")])
+    assert code == 2
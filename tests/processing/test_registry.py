@@ -42,3 +42,119 @@ def test_resolve_unknown_returns_none():
 
     assert registry.resolve("zip") is None
     assert registry.resolve("jpg") is None  # detection normalizes jpg -> jpeg
+
+
+def test_parsers_are_imported_on_first_resolve():
+    import subprocess
+    import sys
+
+    code = (
+        "import sys\n"
+        "from src.processing import pipeline, registry\n"
+        "assert 'src.processing.parsers.pdf' not in sys.modules\n"
+        "assert 'src.processing.parsers.docx_pptx' not in sys.modules\n"
+        "registry.resolve('txt')\n"
+        "assert 'src.processing.parsers.txt_md' in sys.modules\n"
+        "assert 'src.processing.parsers.pdf' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_capabilities_drive_scheduling_flags():
+    from src.processing import registry
+
+    assert registry.capabilities("pdf")["cpu_bound"] is True
+    assert registry.capabilities("pdf")["needs_ocr"] is True
+    assert registry.capabilities("txt")["streaming"] is True
+    assert registry.capabilities("txt")["cpu_bound"] is False
+    assert registry.capabilities("nope") == registry._capabilities(None)
+
+
+def parse_html_stub(src_path, base_dir):
+    from pathlib import Path
+
+    out = Path(base_dir) / "processed_documents" / "text" / (Path(src_path).stem + ".txt")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text("html", encoding="utf-8")
+    return {"out_path": str(out)}
+
+
+parse_html_stub.capabilities = ["streaming"]
+
+
+def test_register_parser_routes_new_extension(tmp_path):
+    from src.processing import detection, registry
+    from src.processing import pipeline as pl
+
+    registry.register_parser("html", __name__ + ":parse_html_stub", version="7", extensions=["html", "htm"])
+    try:
+        assert detection.detect_handler(tmp_path / "page.htm") == "html"
+        assert registry.capabilities("html")["streaming"] is True
+        src = tmp_path / "page.html"
+        src.write_text("<p>x</p>", encoding="utf-8")
+        res = pl.run_pipeline_for_path(src, tmp_path)
+        assert res["error"] is None
+        assert registry.parser_version("html") == "7"
+    finally:
+        registry.unregister_parser("html")
+    assert detection.detect_handler(tmp_path / "page.html") is None
+
+
+def test_entry_points_are_discovered_once(monkeypatch):
+    from importlib import metadata
+    from src.processing import registry
+
+    seen = []
+
+    def fake_entry_points(group):
+        seen.append(group)
+        return [metadata.EntryPoint("eml", __name__ + ":parse_html_stub", group)]
+
+    monkeypatch.setattr(registry.metadata, "entry_points", fake_entry_points)
+    monkeypatch.setitem(registry._DISCOVERY, "done", False)
+    try:
+        assert registry.resolve("eml") is parse_html_stub
+        assert registry.format_for_extension("eml") == "eml"
+        assert registry.capabilities("eml")["streaming"] is True
+        assert registry.resolve("odt") is None
+        assert seen == [registry.ENTRY_POINT_GROUP]
+    finally:
+        registry.unregister_parser("eml")
+
+
+def parse_pid_stub(src_path, base_dir, out_name=None):
+    import os
+    from pathlib import Path
+
+    out = Path(base_dir) / "processed_documents" / "text" / (out_name or Path(src_path).stem + ".txt")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(str(os.getpid()), encoding="utf-8")
+    return {"out_path": str(out)}
+
+
+def test_runtime_cpu_bound_parsers_run_in_the_process_pool(tmp_path):
+    import os
+    from pathlib import Path
+    from src.processing import registry
+    from src.processing import pipeline as pl
+
+    registry.register_parser("heavy", __name__ + ":parse_pid_stub", capabilities=["cpu_bound"], extensions=["heavy"])
+    registry.register_parser("dense", parse_pid_stub, capabilities=["cpu_bound"], extensions=["dense"])
+    # Not picklable: kept on the thread pool
+    registry.register_parser("local", lambda s, b, out_name=None: parse_pid_stub(s, b, out_name), capabilities=["cpu_bound"], extensions=["local"])
+    src = tmp_path / "src"
+    src.mkdir()
+    for name in ["a.heavy", "b.dense", "c.local"]:
+        (src / name).write_text("x", encoding="utf-8")
+    try:
+        summary = pl.run_pipeline_for_dir(src, tmp_path / "out", process_workers=2, thread_workers=1)
+    finally:
+        for fmt in ["heavy", "dense", "local"]:
+            registry.unregister_parser(fmt)
+    assert summary["errors"] == 0
+    pids = {}
+    for entry in summary["items"]:
+        pids[Path(entry["source"]).name] = Path(entry["out_path"]).read_text(encoding="utf-8")
+    assert pids["a.heavy"] != str(os.getpid())
+    assert pids["b.dense"] != str(os.getpid())
+    assert pids["c.local"] == str(os.getpid())
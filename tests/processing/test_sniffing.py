@@ -0,0 +1,143 @@
+from pathlib import Path
+import io
+import zipfile
+
+from src.processing import detection
+from src.processing import pipeline as pl
+
+
+def _zip(path: Path, names) -> None:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        for name in names:
+            z.writestr(name, "<x/>")
+    path.write_bytes(buf.getvalue())
+
+
+def test_signatures_agreeing_with_extension(tmp_path: Path):
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b"%PDF-1.7\n%binary\n")
+    png = tmp_path / "a.png"
+    png.write_bytes(b"\x89PNG\r\n\x1a\n" + b"\x00" * 16)
+    jpg = tmp_path / "a.jpg"
+    jpg.write_bytes(b"\xff\xd8\xff\xe0" + b"\x00" * 16)
+    for path, fmt in [(pdf, "pdf"), (png, "png"), (jpg, "jpeg")]:
+        found = detection.detect_format(path)
+        assert found["handler"] == fmt
+        assert found["confidence"] == 1.0
+        assert found["complete"] is True
+
+
+def test_office_zips_are_told_apart_by_members(tmp_path: Path):
+    docx = tmp_path / "a.docx"
+    _zip(docx, ["[Content_Types].xml", "word/document.xml"])
+    pptx = tmp_path / "a.pptx"
+    _zip(pptx, ["[Content_Types].xml", "ppt/presentation.xml"])
+    xlsx = tmp_path / "a.xlsx"
+    _zip(xlsx, ["[Content_Types].xml", "xl/workbook.xml"])
+    assert detection.detect_format(docx)["handler"] == "docx"
+    assert detection.detect_format(pptx)["handler"] == "pptx"
+    assert detection.detect_format(xlsx)["handler"] == "xlsx"
+
+    # A pptx saved as .docx goes to the parser its content needs
+    renamed = tmp_path / "deck.docx"
+    _zip(renamed, ["ppt/presentation.xml"])
+    found = detection.detect_format(renamed)
+    assert found["handler"] == "pptx"
+    assert found["confidence"] == 0.9
+
+
+def test_mismatched_and_corrupt_files_are_rejected(tmp_path: Path):
+    html = tmp_path / "report.pdf"
+    html.write_bytes(b"<!DOCTYPE html><html><body>Not found</body></html>")
+    plain_zip = tmp_path / "bundle.docx"
+    _zip(plain_zip, ["readme.txt"])
+    truncated = tmp_path / "broken.xlsx"
+    truncated.write_bytes(b"PK\x03\x04" + b"\x00" * 40)
+    legacy = tmp_path / "old.docx"
+    legacy.write_bytes(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\x00" * 40)
+    binary = tmp_path / "notes.txt"
+    binary.write_bytes(b"ab\x00\x01\x02cd")
+    wide = tmp_path / "wide.txt"
+    wide.write_bytes("hi".encode("utf-16"))
+    latin = tmp_path / "latin.md"
+    latin.write_bytes(b"caf\xe9\n")
+
+    for path in [html, plain_zip, truncated, legacy, binary, wide, latin]:
+        found = detection.detect_format(path)
+        assert found["handler"] is None, path.name
+        assert found["reason"], path.name
+    assert "html" in detection.detect_format(html)["reason"]
+    assert "OLE2" in detection.detect_format(legacy)["reason"]
+
+
+def test_text_keeps_extension_and_header_covers_small_files(tmp_path: Path):
+    md = tmp_path / "a.md"
+    md.write_bytes(b"# Title\n")
+    found = detection.detect_format(md)
+    assert found["handler"] == "md"
+    assert found["confidence"] == 0.8
+    assert found["header"] == b"# Title\n"
+    assert found["complete"] is True
+
+    big = tmp_path / "big.txt"
+    big.write_bytes(b"x" * (detection.HEADER_BYTES + 1))
+    assert detection.detect_format(big)["complete"] is False
+
+    # Multi-byte character split by the header boundary is still UTF-8
+    split = tmp_path / "split.txt"
+    split.write_bytes(b"x" * (detection.HEADER_BYTES - 1) + "é".encode("utf-8"))
+    assert detection.detect_format(split)["handler"] == "txt"
+
+    svg = tmp_path / "drawing"
+    svg.write_bytes(b"<?xml version='1.0'?><svg xmlns='http://www.w3.org/2000/svg'/>")
+    assert detection.detect_format(svg)["handler"] == "svg"
+
+    empty = tmp_path / "empty.csv"
+    empty.write_bytes(b"")
+    assert detection.detect_format(empty)["handler"] == "csv"
+    assert detection.detect_format(empty)["confidence"] == 0.5
+
+
+def test_pipeline_content_mode_rejects_before_parsing(tmp_path: Path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "fake.pdf").write_bytes(b"<html><body>error page</body></html>")
+    (src / "a.txt").write_bytes(b"hello\r\nworld")
+    _zip(src / "deck.docx", ["ppt/presentation.xml"])
+
+    summary = pl.run_pipeline_for_dir(src, tmp_path / "out", process_workers=0, thread_workers=0, detect="content")
+    by_name = {}
+    for item in summary["items"]:
+        by_name[Path(str(item["source"])).name] = item
+    assert by_name["fake.pdf"]["error"].startswith("unsupported file type: ")
+    assert by_name["deck.docx"]["format"] == "pptx"
+    assert "error" not in by_name["a.txt"]
+    assert by_name["a.txt"]["confidence"] == 0.8
+    out = tmp_path / "out" / "processed_documents" / "text" / "a.txt"
+    assert out.read_text(encoding="utf-8") == "hello\nworld\n"
+
+    # Extension mode hands the HTML to the PDF parser, which then fails
+    res = pl.run_pipeline_for_path(src / "fake.pdf", tmp_path / "out2")
+    assert res["error"] is not None
+    assert not res["error"].startswith("unsupported file type")
+
+
+def test_pdf_marker_inside_text_does_not_override_extension(tmp_path: Path):
+    notes = tmp_path / "notes.md"
+    notes.write_text("# Export notes\n\nFiles must start with %PDF-1.7 to be valid.\n", encoding="utf-8")
+    found = detection.detect_format(notes)
+    assert found["handler"] == "md"
+    assert found["confidence"] == 0.8
+
+    # A real header may follow a BOM or whitespace; junk before it is only
+    # tolerated in a .pdf file
+    spaced = tmp_path / "spaced.md"
+    spaced.write_bytes(b"\xef\xbb\xbf\n %PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    assert detection.detect_format(spaced)["handler"] == "pdf"
+    late = tmp_path / "late.pdf"
+    late.write_bytes(b"junk\x00\x01%PDF-1.4\n")
+    assert detection.detect_format(late)["handler"] == "pdf"
+    late_txt = tmp_path / "late.txt"
+    late_txt.write_bytes(b"junk\x00\x01%PDF-1.4\n")
+    assert detection.detect_format(late_txt)["handler"] is None
@@ -102,3 +102,100 @@ def test_parse_xlsx_sheets_with_separators_and_counts(tmp_path: Path):
     assert out["sheets"][0]["rows"] == 2
     assert out["sheets"][1]["name"] == "Second"
     assert out["sheets"][1]["rows"] == 2
+
+
+def test_parse_csv_stream_matches_in_memory_output(tmp_path: Path):
+    from src.processing.parsers import tabular
+
+    src = tmp_path / "tricky.csv"
+    _write_csv(src, [["H1", "H2"], ["multi\r\nline", "cr\r"], ["", "tail\n"], ["last", "row\r"]])
+
+    mem = tabular.parse_csv(src, tmp_path / "mem", stream=False)
+    streamed = tabular.parse_csv(src, tmp_path / "stream", stream=True)
+
+    assert "text" not in streamed
+    assert streamed["rows"] == mem["rows"] == 4
+    written = Path(streamed["out_path"]).read_text(encoding="utf-8")
+    assert written == mem["text"]
+    assert streamed["chars"] == len(written)
+
+
+def test_parse_csv_stream_empty_file(tmp_path: Path):
+    from src.processing.parsers import tabular
+
+    src = tmp_path / "empty.csv"
+    src.write_text("", encoding="utf-8")
+    mem = tabular.parse_csv(src, tmp_path / "mem", stream=False)
+    streamed = tabular.parse_csv(src, tmp_path / "stream", stream=True)
+    assert Path(streamed["out_path"]).read_text(encoding="utf-8") == mem["text"] == "\n"
+    assert streamed["rows"] == 0
+
+
+def test_parse_csv_row_cap_and_sampling(tmp_path: Path):
+    from src.processing.parsers import tabular
+
+    rows = [["H"]]
+    i = 1
+    while i <= 10:
+        rows.append([str(i)])
+        i = i + 1
+    src = tmp_path / "big.csv"
+    _write_csv(src, rows)
+
+    capped = tabular.parse_csv(src, tmp_path, stream=True, max_rows=3)
+    assert capped["rows"] == 3
+    assert capped["truncated"] is True
+    assert Path(capped["out_path"]).read_text(encoding="utf-8") == "H\n1\n2\n"
+
+    sampled = tabular.parse_csv(src, tmp_path, sample_every=4)
+    assert sampled["text"] == "H\n4\n8\n"
+    assert sampled["rows"] == 3
+    assert sampled["rows_seen"] == 11
+    assert sampled["truncated"] is False
+
+
+def test_parse_tsv_stream(tmp_path: Path):
+    from src.processing.parsers import tabular
+
+    src = tmp_path / "data.tsv"
+    _write_tsv(src, [["H1", "H2"], ["A", "B"]])
+    out = tabular.parse_tsv(src, tmp_path, stream=True)
+    assert Path(out["out_path"]).read_text(encoding="utf-8") == "H1\tH2\nA\tB\n"
+    assert out["rows"] == 2
+
+
+def test_parse_xlsx_stream_matches_in_memory(tmp_path: Path):
+    from src.processing.parsers import tabular
+
+    src = tmp_path / "book.xlsx"
+    _write_xlsx(src, [
+        ("Sheet1", [["H1", "H2"], ["A", 1]]),
+        ("Second", [["X"], ["Y"]])
+    ])
+    mem = tabular.parse_xlsx(src, tmp_path / "mem")
+    streamed = tabular.parse_xlsx(src, tmp_path / "stream", stream=True)
+    assert "text" not in streamed
+    assert Path(streamed["out_path"]).read_text(encoding="utf-8") == mem["text"]
+    assert streamed["sheets"] == mem["sheets"]
+    assert mem["sheets"][0]["truncated"] is False
+
+
+def test_parse_xlsx_row_cap_and_pruning(tmp_path: Path):
+    from src.processing.parsers import tabular
+
+    src = tmp_path / "sparse.xlsx"
+    _write_xlsx(src, [
+        ("Data", [["H1", None, "H3"], [None, None, None], ["a", None, "c"], ["d", None, "f"], ["g", None, "i"]]),
+        ("Small", [["only"]]),
+    ])
+
+    out = tabular.parse_xlsx(src, tmp_path, max_rows_per_sheet=3, prune_empty_rows=True, prune_empty_columns=True)
+    lines = out["text"].splitlines()
+    assert lines == ["=== Sheet: Data ===", "H1\tH3", "a\tc", "d\tf", "=== Sheet: Small ===", "only"]
+
+    data_meta = out["sheets"][0]
+    assert data_meta["rows"] == 3
+    assert data_meta["truncated"] is True
+    assert data_meta["pruned_rows"] == 1
+    assert data_meta["pruned_columns"] == 1
+    assert out["sheets"][1]["truncated"] is False
@@ -118,3 +118,85 @@ def test_parse_md_invalid_encoding_raises(tmp_path: Path):
     with pytest.raises(ValueError) as e:
         txt_md.parse_md(src, tmp_path)
     assert "Invalid UTF-8" in str(e.value)
+
+
+_STREAM_SAMPLES = [
+    b"",
+    b"\xef\xbb\xbfbom then text",
+    b"a\r\nb\rc\n\r\n\r",
+    "café 中文 \U0001f600\r\n".encode("utf-8"),
+    b"ctl\x00\x1b[0m\tkept\x0c\r",
+    b"no newline at end",
+    b"---\ntitle: x\n---\n# Body\n",
+    b"---\r\ntitle: x\r\n---\r\n",
+    b"---\nnever closed\n",
+    b" --- \nk: v\n---\n\ntext",
+]
+
+
+def test_streamed_txt_matches_in_memory_for_any_chunk_size(tmp_path: Path):
+    from src.processing.parsers import txt_md
+
+    i = 0
+    while i < len(_STREAM_SAMPLES):
+        src = tmp_path / ("s" + str(i) + ".txt")
+        src.write_bytes(_STREAM_SAMPLES[i])
+        expected = txt_md.parse_txt(src, tmp_path / "mem", stream=False)["text"]
+        for chunk in [1, 2, 3, 5, 64]:
+            out = txt_md.parse_txt(src, tmp_path / "stream", stream=True, chunk_size=chunk)
+            assert "text" not in out
+            written = Path(out["out_path"]).read_text(encoding="utf-8")
+            assert written == expected, (_STREAM_SAMPLES[i], chunk)
+            assert out["chars"] == len(expected)
+        i = i + 1
+
+
+def test_streamed_md_strips_front_matter_like_in_memory(tmp_path: Path):
+    from src.processing.parsers import txt_md
+
+    i = 0
+    while i < len(_STREAM_SAMPLES):
+        src = tmp_path / ("s" + str(i) + ".md")
+        src.write_bytes(_STREAM_SAMPLES[i])
+        expected = txt_md.parse_md(src, tmp_path / "mem", stream=False)["text"]
+        for chunk in [1, 4, 7, 64]:
+            out = txt_md.parse_md(src, tmp_path / "stream", stream=True, chunk_size=chunk)
+            written = Path(out["out_path"]).read_text(encoding="utf-8")
+            assert written == expected, (_STREAM_SAMPLES[i], chunk)
+        i = i + 1
+
+
+def test_streamed_md_keeps_oversized_front_matter(tmp_path: Path, monkeypatch):
+    from src.processing.parsers import txt_md
+
+    monkeypatch.setattr(txt_md, "FRONT_MATTER_MAX_CHARS", 16)
+    src = tmp_path / "big.md"
+    src.write_bytes(b"---\n" + b"key: value\n" * 10 + b"---\nbody\n")
+    out = txt_md.parse_md(src, tmp_path, stream=True, chunk_size=8)
+    written = Path(out["out_path"]).read_text(encoding="utf-8")
+    assert written.startswith("---\nkey: value\n")
+    assert written.endswith("---\nbody\n")
+
+
+def test_streamed_txt_invalid_encoding_raises_and_leaves_no_output(tmp_path: Path):
+    from src.processing.parsers import txt_md
+
+    src = tmp_path / "bad.txt"
+    src.write_bytes(b"fine line\n" * 10 + b"\xff\xfe\x00")
+    with pytest.raises(ValueError) as e:
+        txt_md.parse_txt(src, tmp_path, stream=True, chunk_size=16)
+    assert "Invalid UTF-8" in str(e.value)
+    assert not (tmp_path / "processed_documents" / "text" / "bad.txt").exists()
+
+    # A multi-byte character cut off at end of file is also rejected
+    src.write_bytes(b"ok \xe4\xb8")
+    with pytest.raises(ValueError):
+        txt_md.parse_txt(src, tmp_path, stream=True, chunk_size=2)
+
+
+def test_parse_txt_strips_control_characters(tmp_path: Path):
+    from src.processing.parsers import txt_md
+
+    src = tmp_path / "ctl.txt"
+    src.write_bytes(b"a\x00b\x1b\tc\r\n")
+    assert txt_md.parse_txt(src, tmp_path)["text"] == "ab\tc\n"
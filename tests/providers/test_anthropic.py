@@ -613,3 +613,60 @@ async def test_anthropic_provider_timeout_retry(mock_client_class, mock_sleep):
         await provider.call(prepared_prompt)
     assert mock_client.request.await_count == 2
     assert mock_sleep.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_anthropic_provider_prepare_prompt_with_token_budget():
+    """With a token budget only the document chunks that fit are sent."""
+    from src.providers.implementations.anthropic import AnthropicProvider
+
+    words = []
+    for i in range(2000):
+        words.append(f"filler{i}")
+    docs = [
+        {"text": " ".join(words), "metadata": {"source": "big.txt"}},
+        {"text": "Checklist owners: platform team", "metadata": {"source": "owners.txt"}},
+    ]
+    config = dict(SAMPLE_CONFIG)
+    config["context_chunk_tokens"] = 200
+    provider = AnthropicProvider(config)
+
+    full = json.loads(await provider.prepare_prompt(SAMPLE_PROMPT_BUNDLE, docs))
+    budgeted = json.loads(await provider.prepare_prompt(SAMPLE_PROMPT_BUNDLE, docs, token_budget=600))
+
+    assert "filler1999" in full["prompt"]
+    assert "filler1999" not in budgeted["prompt"]
+    assert "### big.txt (part 1 of " in budgeted["prompt"]
+    assert "Checklist owners: platform team" in budgeted["prompt"]
+    assert SAMPLE_PROMPT_BUNDLE["plan"] in budgeted["prompt"]
+    assert len(budgeted["prompt"]) < len(full["prompt"]) // 3
+
+
+@pytest.mark.asyncio
+async def test_anthropic_provider_prepare_prompt_from_chunk_index(tmp_path):
+    """A persisted chunk index supplies the budgeted context."""
+    from src.processing import chunking
+    from src.processing import pipeline as pl
+    from src.providers.implementations.anthropic import AnthropicProvider
+
+    src = tmp_path / "src"
+    src.mkdir()
+    words = []
+    for i in range(2000):
+        words.append(f"filler{i}")
+    (src / "big.txt").write_text(" ".join(words), encoding="utf-8")
+    (src / "owners.txt").write_text("Checklist owners: platform team", encoding="utf-8")
+    pl.run_pipeline_for_dir(src, tmp_path, process_workers=0, thread_workers=0, chunk_settings=chunking.new_settings(200))
+
+    config = dict(SAMPLE_CONFIG)
+    config["context_chunk_dir"] = str(tmp_path)
+    provider = AnthropicProvider(config)
+    assert provider.to_dict()["context_chunk_dir"] == str(tmp_path)
+    budgeted = json.loads(await provider.prepare_prompt(SAMPLE_PROMPT_BUNDLE, token_budget=600))
+
+    assert "filler1999" not in budgeted["prompt"]
+    assert "big.txt (part 1 of " in budgeted["prompt"]
+    assert "Checklist owners: platform team" in budgeted["prompt"]
+    # Without a budget the index is not used
+    plain = json.loads(await provider.prepare_prompt(SAMPLE_PROMPT_BUNDLE))
+    assert "## Context" not in plain["prompt"]